@@ -6,6 +6,7 @@ Ensures that the data has continuous timesteps for all sheep.
 """
 
 import math
+import os
 from pathlib import Path
 
 import click
@@ -81,6 +82,7 @@ def convert_file(in_file: Path, out_file: Path, tstart_ns: int, duration_ns: int
         with ShepherdWriter(
             file_path=out_file,
             compression=Compression.gzip1,
+            compression_threads=os.cpu_count() or 1,
             mode="harvester",
             datatype=EnergyDType.ivtrace,  # IV-trace
             window_samples=0,  # 0 since dt is IV-trace
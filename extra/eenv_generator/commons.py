@@ -1,6 +1,7 @@
 """Shared Generator-Function."""
 
 import math
+import os
 import time
 from abc import ABC
 from abc import abstractmethod
@@ -11,6 +12,7 @@ from typing import Optional
 import numpy as np
 from tqdm import trange
 
+from shepherd_core import QueuedWriter
 from shepherd_core import Writer as ShepherdWriter
 from shepherd_core import logger
 from shepherd_core.config import config
@@ -49,11 +51,13 @@ def generate_h5_files(
     """
     with ExitStack() as stack:
         # Prepare datafiles
-        file_handles: list[ShepherdWriter] = []
+        file_handles: list[QueuedWriter] = []
+        # ⤷ every file gets its own I/O-thread
         for i in range(generator.node_count):
             writer = ShepherdWriter(
                 file_path=output_dir / f"node{i}.h5",
                 compression=Compression.gzip1,
+                compression_threads=os.cpu_count() or 1,
                 mode="harvester",
                 datatype=EnergyDType.ivtrace,  # IV-trace
                 window_samples=0,  # 0 since dt is IV-trace
@@ -64,8 +68,9 @@ def generate_h5_files(
                 ),
                 verbose=False,
             )
-            file_handles.append(stack.enter_context(writer))
+            stack.enter_context(writer)
             writer.store_hostname(f"node{i}.h5")
+            file_handles.append(stack.enter_context(QueuedWriter(writer)))
 
         logger.info("Generating energy environment...")
         chunk_duration = chunk_size * STEP_WIDTH
@@ -81,6 +86,6 @@ def generate_h5_files(
             iv_pairs = generator.generate_iv_pairs(count=count)
 
             for file, (voltages, currents) in zip(file_handles, iv_pairs):
-                file.append_iv_data_si(times, voltages, currents)
+                file.put(times, voltages, currents)
         end_time = time.time()
         logger.info("Done! Generation took %.2f s", end_time - start_time)
@@ -0,0 +1,92 @@
+"""
+Compare the row-wise csv-export (prior to 2025.06.2) with the chunked exporter.
+
+- synthetic recording with 60 s @ 100 kSPS (6 M rows)
+- the row-wise version is only run on the first 100 k rows and extrapolated
+- the chunked version exports the whole file
+
+Results (lzf-compressed source, 4-core VM):
+
+row-wise      3.5 k rows/s    -> ~ 1695 s for 60 s recording (extrapolated)
+chunked     394.4 k rows/s    -> 15.2 s for 60 s recording
+                              -> 111x faster
+
+"""
+
+import time
+from datetime import datetime
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from shepherd_core import Writer
+from shepherd_core import local_tz
+from shepherd_core import logger
+from shepherd_data import Reader
+
+duration_s = 60
+rows_rowwise = 100_000
+path_here = Path(__file__).parent
+path_h5 = path_here / "bench_csv_export.h5"
+
+
+def save_csv_rowwise(h5_group: h5py.Group, csv_path: Path, rows_n: int) -> int:
+    """Reimplementation of the former element-wise Reader.save_csv()."""
+    separator = "; "
+    datasets = [str(key) for key in h5_group if isinstance(h5_group[key], h5py.Dataset)]
+    datasets.remove("time")
+    ts_gain = h5_group["time"].attrs.get("gain", 1e-9)
+    gains = {key: h5_group[key].attrs.get("gain", 1.0) for key in datasets}
+    offsets = {key: h5_group[key].attrs.get("offset", 1.0) for key in datasets}
+    with csv_path.open("w", encoding="utf-8-sig") as csv_file:
+        for idx, time_ns in enumerate(h5_group["time"][:rows_n]):
+            timestamp = datetime.fromtimestamp(time_ns * ts_gain, tz=local_tz())
+            csv_file.write(timestamp.strftime("%Y-%m-%d %H:%M:%S.%f"))
+            for key in datasets:
+                values = h5_group[key][idx] * gains[key] + offsets[key]
+                csv_file.write(f"{separator}{values}")
+            csv_file.write("\n")
+    return rows_n
+
+
+if __name__ == "__main__":
+    if not path_h5.exists():
+        with Writer(path_h5) as writer:
+            writer.store_hostname("artificial")
+            samples_n = duration_s * writer.samplerate_sps
+            rng = np.random.default_rng(seed=1)
+            writer.append_iv_data_si(
+                time.time(),
+                rng.uniform(1.8, 3.6, samples_n),
+                rng.uniform(100e-6, 2e-3, samples_n),
+            )
+
+    with Reader(path_h5, verbose=False) as reader:
+        csv_path = path_h5.with_suffix(".data.csv")
+        csv_path.unlink(missing_ok=True)
+
+        t_start = time.perf_counter()
+        save_csv_rowwise(reader["data"], csv_path, rows_rowwise)
+        rate_rowwise = rows_rowwise / (time.perf_counter() - t_start)
+        csv_path.unlink()
+
+        t_start = time.perf_counter()
+        rows_chunked = reader.save_csv(reader["data"])
+        duration_chunked = time.perf_counter() - t_start
+        rate_chunked = rows_chunked / duration_chunked
+        csv_path.unlink()
+
+    logger.info(
+        "row-wise: %.1f k rows/s -> ~ %.0f s for %d s recording (extrapolated)",
+        rate_rowwise / 1e3,
+        rows_chunked / rate_rowwise,
+        duration_s,
+    )
+    logger.info(
+        "chunked:  %.1f k rows/s -> %.1f s for %d s recording -> %.0fx",
+        rate_chunked / 1e3,
+        duration_chunked,
+        duration_s,
+        rate_chunked / rate_rowwise,
+    )
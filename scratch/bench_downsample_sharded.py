@@ -0,0 +1,63 @@
+"""
+Compare Reader.downsample() sequential & sharded (worker-processes).
+
+- synthetic recording with 120 s @ 100 kSPS, gzip-1 compressed
+- voltage gets downsampled by factor 100
+- shards start at multiples of the factor, the filter of each worker
+  settles on a warm-up region (64 periods of the factor) in front of the shard
+
+Results (VM with 1 core, so the workers can't run in parallel here):
+
+jobs = 1    0.66 s
+jobs = 2    0.77 s, max. deviation to sequential = 1.9e-13 (relative)
+jobs = 4    0.85 s, max. deviation to sequential = 2.0e-13 (relative)
+
+-> the overhead of 1 core is starting processes & reading the warm-up regions
+
+-> decompression & filtering run independently per shard,
+   so it is expected to scale with the number of physical cores
+
+"""
+
+import time
+from pathlib import Path
+
+import numpy as np
+
+from shepherd_core import Compression
+from shepherd_core import Writer
+from shepherd_core import logger
+from shepherd_data import Reader
+
+duration_s = 120
+ds_factor = 100
+path_here = Path(__file__).parent
+path_h5 = path_here / "bench_downsample_sharded.h5"
+
+if __name__ == "__main__":
+    if not path_h5.exists():
+        with Writer(path_h5, compression=Compression.gzip1, verbose=False) as writer:
+            writer.store_hostname("artificial")
+            samples_n = duration_s * writer.samplerate_sps
+            rng = np.random.default_rng(seed=1)
+            writer.append_iv_data_si(
+                time.time(),
+                2.7 + np.cumsum(rng.normal(0, 1e-4, samples_n)),
+                rng.uniform(100e-6, 2e-3, samples_n),
+            )
+
+    with Reader(path_h5, verbose=False) as reader:
+        results = {}
+        reader.downsample(reader.ds_voltage, None, end_n=100_000, ds_factor=ds_factor)
+        # ⤷ warm-up (import of scipy)
+        for jobs in [1, 2, 4]:
+            reader.jobs = jobs
+            t_start = time.perf_counter()
+            results[jobs] = reader.downsample(reader.ds_voltage, None, ds_factor=ds_factor)
+            logger.info(
+                "jobs = %d: %.2f s, max. deviation to sequential = %.2e (relative)",
+                jobs,
+                time.perf_counter() - t_start,
+                np.max(np.abs(results[jobs] / results[1] - 1)),
+            )
+    path_h5.unlink()
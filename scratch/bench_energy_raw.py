@@ -0,0 +1,112 @@
+"""
+Compare float- & raw-integer-reduction of energy / power (raw_iv_sums()).
+
+- block of 4 M samples (40 s @ 100 kSPS, like Reader.max_elements), 18 bit random data
+- float: convert voltage & current to SI (float64), multiply, sum per chunk of 10k
+- raw: exact integer sums per chunk (einsum in uint64), calibration applied to the sums
+- peak = additional memory allocated during the reduction (tracemalloc)
+
+Results (VM with 1 core):
+
+float:  25.1 ms, peak 64.1 MB
+raw:     8.5 ms, peak  0.1 MB
+raw32:  19.1 ms, peak 32.2 MB  (32 bit values -> products split into 16 bit halves)
+
+-> 3x faster & no temporary arrays for the common case (18 bit), exact integer sums
+-> Reader.power_windows() with windows of 0.5 s (not a multiple of chunks), 5 min file:
+   float 1.62 s vs. raw 1.43 s, dominated by reading & decompressing the datasets
+
+"""
+
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from shepherd_core import CalibrationSeries
+from shepherd_core import Reader
+from shepherd_core import Writer
+from shepherd_core import logger
+from shepherd_core.data_index import power_from_sums
+from shepherd_core.data_index import raw_iv_sums
+
+samples_n = 4_000_000
+chunk_n = 10_000
+path_here = Path(__file__).parent
+path_h5 = path_here / "bench_energy_raw.h5"
+rng = np.random.default_rng(seed=1)
+cal = CalibrationSeries()
+
+
+def reduce_float(voltage: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """Sum of power per chunk, with iv-data converted to SI first."""
+    power = cal.voltage.raw_to_si(voltage) * cal.current.raw_to_si(current)
+    return np.add.reduceat(power, np.arange(0, voltage.shape[0], chunk_n))
+
+
+def reduce_raw(voltage: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """Sum of power per chunk, calibration applied to the raw sums."""
+    return power_from_sums(raw_iv_sums(voltage, current, chunk_n), cal)
+
+
+def measure(fn: callable, *args: np.ndarray) -> tuple[float, float]:
+    """Return mean duration & peak of allocated memory of fn(args)."""
+    fn(*args)
+    tracemalloc.start()
+    time_start = time.perf_counter()
+    for _ in range(10):
+        fn(*args)
+    duration = (time.perf_counter() - time_start) / 10
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak
+
+
+def power_windows_float(sfr: Reader, window_n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Determine power per window like Reader.power_windows(), but with iv-data in SI."""
+    means = []
+    block_n = (sfr.max_elements // window_n) * window_n
+    for idx in range(0, sfr.samples_n, block_n):
+        power = cal.voltage.raw_to_si(sfr.ds_voltage[idx : idx + block_n]) * cal.current.raw_to_si(
+            sfr.ds_current[idx : idx + block_n]
+        )
+        starts = np.arange(0, power.shape[0], window_n)
+        means.append(np.add.reduceat(power, starts) / np.diff(np.append(starts, power.shape[0])))
+    times = cal.time.raw_to_si(sfr.ds_time[0 : sfr.samples_n : window_n])
+    return times, np.concatenate(means)
+
+
+if __name__ == "__main__":
+    voltage = rng.integers(0, 2**18, samples_n).astype("u4")
+    current = rng.integers(0, 2**18, samples_n).astype("u4")
+    if not np.allclose(reduce_float(voltage, current), reduce_raw(voltage, current), rtol=1e-9):
+        raise RuntimeError("Raw reduction deviates from float reference")
+    for name, fn, args in [
+        ("float", reduce_float, (voltage, current)),
+        ("raw", reduce_raw, (voltage, current)),
+        ("raw32", reduce_raw, (voltage << 14, current << 14)),
+    ]:
+        duration, peak = measure(fn, *args)
+        logger.info("%-6s %5.1f ms, peak %5.1f MB", name + ":", 1e3 * duration, peak / 1e6)
+
+    with Writer(path_h5, force_overwrite=True, verbose=False) as sfw:
+        for idx in range(8):
+            sfw.append_iv_data_raw(
+                10**18 + idx * samples_n * sfw.sample_interval_ns,
+                rng.integers(0, 2**18, samples_n),
+                rng.integers(0, 2**18, samples_n),
+            )
+    with Reader(path_h5, verbose=False) as sfr:
+        window_n = 50_000 - 1  # not aligned with chunks
+        sfr.power_windows(window_n)  # warm up caches
+        time_start = time.perf_counter()
+        _, means_float = power_windows_float(sfr, window_n)
+        duration_float = time.perf_counter() - time_start
+        time_start = time.perf_counter()
+        _, means_raw = sfr.power_windows(window_n)
+        duration_raw = time.perf_counter() - time_start
+        if not np.allclose(means_float, means_raw, rtol=1e-9):
+            raise RuntimeError("Reader.power_windows() deviates from float reference")
+    logger.info("power_windows(): float %.2f s, raw %.2f s", duration_float, duration_raw)
+    path_h5.unlink()
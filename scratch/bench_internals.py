@@ -0,0 +1,94 @@
+"""
+Measure memory & duration of simulate_source(monitor_internals=True) over the input length.
+
+- 10 s / 60 s @ 100 kSPS of synthetic input (ivsample)
+- BQ25504 with resistive target (1 kOhm, controlled by power-good), engine="jit"
+- internals get streamed as min & max per bucket of 100 samples into the output-file
+- former implementation preallocated runtime * samplerate * 11 float64 for all internals
+- duration includes the plot, peak of python-allocations via tracemalloc in a second run
+
+Results (VM with 1 core):
+
+            without internals   with internals   former preallocation
+10 s input: 0.7 s /  2.6 MiB    2.4 s / 22.0 MiB        83.9 MiB
+60 s input: 3.6 s /  5.3 MiB    7.2 s / 21.9 MiB       503.5 MiB
+
+-> memory with internals stays constant (~22 MiB, mostly the plot of <= 10k points per
+   signal), the former implementation needed 8.4 MiB per second of input (~3 GiB for 1 h)
+-> internals add ~0.06 s per second of input (returning them from the kernel, decimation,
+   appending in the I/O-thread) plus ~1.5 s for the plot
+-> appending costs ~7 ms per call for 21 datasets, so buckets get batched (~1 Mi samples);
+   appending per chunk of 10k samples took twice as long (13.9 s for 60 s of input)
+
+"""
+
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from shepherd_core import CalibrationEmulator
+from shepherd_core import Writer
+from shepherd_core import logger
+from shepherd_core.data_models import VirtualSourceConfig
+from shepherd_core.vsource import ResistiveTarget
+from shepherd_core.vsource import VirtualSourceModel
+from shepherd_core.vsource import simulate_source
+
+path_here = Path(__file__).parent
+path_inp = path_here / "bench_internals.h5"
+path_out = path_here / "bench_internals_emu.h5"
+config = VirtualSourceConfig(name="BQ25504")
+target = ResistiveTarget(R_Ohm=1_000, controlled=True)
+rng = np.random.default_rng(seed=1)
+
+
+def generate_input(duration_s: int) -> None:
+    """Write synthetic ivsamples (sine-shaped voltage, noisy current)."""
+    with Writer(path_inp, force_overwrite=True, verbose=False) as sfw:
+        samples_n = 1_000_000
+        for idx in range(duration_s * 100_000 // samples_n):
+            time_s = np.arange(samples_n) / 100_000 + idx * samples_n / 100_000
+            voltage_V = 2.5 + 2.0 * np.sin(time_s / 2) + rng.normal(0, 0.01, samples_n)
+            current_A = rng.uniform(0, 2e-3, samples_n)
+            sfw.append_iv_data_si(idx * samples_n / 100_000, voltage_V, current_A)
+
+
+def run(*, monitor_internals: bool) -> tuple[float, float]:
+    """Simulate and return duration [s] & peak of allocations [MiB] (second, traced run)."""
+    time_start = time.perf_counter()
+    simulate_source(
+        config, target, path_inp, path_out, monitor_internals=monitor_internals, engine="jit"
+    )
+    duration = time.perf_counter() - time_start
+    tracemalloc.start()
+    simulate_source(
+        config, target, path_inp, path_out, monitor_internals=monitor_internals, engine="jit"
+    )
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak / 2**20
+
+
+if __name__ == "__main__":
+    VirtualSourceModel(config, CalibrationEmulator()).process_chunk(
+        np.ones(10), np.ones(10), target, engine="jit"
+    )  # ⤷ compile kernels
+    for duration_s in [10, 60]:
+        generate_input(duration_s)
+        duration_off, peak_off = run(monitor_internals=False)
+        duration_on, peak_on = run(monitor_internals=True)
+        logger.info(
+            "%2d s input: without internals %5.1f s / %5.1f MiB, "
+            "with internals %5.1f s / %5.1f MiB, former preallocation %6.1f MiB",
+            duration_s,
+            duration_off,
+            peak_off,
+            duration_on,
+            peak_on,
+            duration_s * 100_000 * 11 * 8 / 2**20,
+        )
+    path_inp.unlink()
+    path_out.unlink()
+    path_out.with_suffix(".png").unlink()
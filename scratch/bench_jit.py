@@ -0,0 +1,99 @@
+"""
+Compare the engines of VirtualSourceModel.process_chunk() with the per-sample simulation.
+
+- 2 s @ 100 kSPS of synthetic input (ivsample), chunks of 10k samples
+- resistive target (1 kOhm, controlled by power-good)
+- per-sample: iterate_sampling() & target.step() for every sample (former simulate_source())
+- python: process_chunk() - vectorized for direct, loop for BQ25504
+- jit: process_chunk(engine="jit") - numba-kernels, compiled during warm-up
+
+Results (VM with 1 core):
+
+direct:  per-sample  1.79 s, python  0.02 s, jit  0.06 s -> 0.31 us / sample,   32x real-time
+BQ25504: per-sample  1.73 s, python  1.31 s, jit  0.06 s -> 0.31 us / sample,   32x real-time
+compilation of the kernels during warm-up: 12.1 s
+
+-> coupled configurations (storage, boost, buck, mppt) get ~20x faster than the python-loop,
+   1 h of 100 kSPS simulates in ~2 min instead of ~50 min (plus compilation once per process)
+-> the vectorized python-path stays the fastest for stateless configurations
+-> inlining the helpers saves ~30 % per sample, but doubles the compilation-time
+-> states live in flat (possibly aliasing) arrays and stay in memory, far from a c-loop
+
+"""
+
+import time
+
+import numpy as np
+
+from shepherd_core import CalibrationEmulator
+from shepherd_core import logger
+from shepherd_core.data_models import VirtualSourceConfig
+from shepherd_core.vsource import ResistiveTarget
+from shepherd_core.vsource import VirtualSourceModel
+
+samples_n = 200_000
+chunk_n = 10_000
+rng = np.random.default_rng(seed=1)
+target = ResistiveTarget(R_Ohm=1_000, controlled=True)
+
+
+def run_per_sample(src: VirtualSourceModel, V_inp_uV: np.ndarray, I_inp_nA: np.ndarray) -> None:
+    """Simulate like the former loop of simulate_source()."""
+    I_out_nA = 0
+    for idx in range(0, samples_n, chunk_n):
+        v_uV = V_inp_uV[idx : idx + chunk_n].copy()
+        i_nA = I_inp_nA[idx : idx + chunk_n].copy()
+        for _n in range(len(v_uV)):
+            v_uV[_n] = src.iterate_sampling(
+                V_inp_uV=int(v_uV[_n]), I_inp_nA=int(i_nA[_n]), I_out_nA=I_out_nA
+            )
+            I_out_nA = target.step(int(v_uV[_n]), pwr_good=src.cnv.get_power_good())
+            i_nA[_n] = I_out_nA
+
+
+def run_python(src: VirtualSourceModel, V_inp_uV: np.ndarray, I_inp_nA: np.ndarray) -> None:
+    """Simulate with process_chunk()."""
+    for idx in range(0, samples_n, chunk_n):
+        src.process_chunk(V_inp_uV[idx : idx + chunk_n], I_inp_nA[idx : idx + chunk_n], target)
+
+
+def run_jit(src: VirtualSourceModel, V_inp_uV: np.ndarray, I_inp_nA: np.ndarray) -> None:
+    """Simulate with the compiled kernels."""
+    for idx in range(0, samples_n, chunk_n):
+        src.process_chunk(
+            V_inp_uV[idx : idx + chunk_n], I_inp_nA[idx : idx + chunk_n], target, engine="jit"
+        )
+
+
+if __name__ == "__main__":
+    V_inp_uV = 2.5e6 + 2.5e6 * np.sin(np.arange(samples_n) / 5_000) + rng.normal(0, 1e4, samples_n)
+    I_inp_nA = rng.uniform(0, 2e6, samples_n)
+
+    time_start = time.perf_counter()
+    VirtualSourceModel(VirtualSourceConfig(name="BQ25504"), CalibrationEmulator()).process_chunk(
+        V_inp_uV[:10], I_inp_nA[:10], target, engine="jit"
+    )
+    duration_compile = time.perf_counter() - time_start
+
+    for name in ["direct", "BQ25504"]:
+        durations = {}
+        for variant, fn in [
+            ("per-sample", run_per_sample),
+            ("python", run_python),
+            ("jit", run_jit),
+        ]:
+            src = VirtualSourceModel(VirtualSourceConfig(name=name), CalibrationEmulator())
+            time_start = time.perf_counter()
+            fn(src, V_inp_uV, I_inp_nA)
+            durations[variant] = time.perf_counter() - time_start
+        logger.info(
+            "%-8s per-sample %5.2f s, python %5.2f s, jit %5.2f s -> %.2f us / sample, %4.0fx %s",
+            name + ":",
+            durations["per-sample"],
+            durations["python"],
+            durations["jit"],
+            1e6 * durations["jit"] / samples_n,
+            samples_n / 100_000 / durations["jit"],
+            "real-time",
+        )
+    logger.info("compilation of the kernels during warm-up: %.1f s", duration_compile)
@@ -0,0 +1,84 @@
+"""
+Compare Reader.read() with and without prefetching (background-thread).
+
+- synthetic recording with 60 s @ 100 kSPS, compressed with lzf & gzip-1
+- consumers: none (only reading), numpy-heavy (releases the GIL), python-loop (keeps the GIL)
+- prefetch=8 reads blocks of 8 chunks directly into a preallocated buffer
+
+Results (VM with 1 core, so reading & consuming can't run in parallel here):
+
+            consumer  prefetch=0  prefetch=8
+lzf         none      0.23 s      0.27 s
+lzf         numpy     0.98 s      0.98 s
+lzf         python    0.35 s      0.40 s
+gzip1       none      0.72 s      0.72 s
+gzip1       numpy     1.31 s      1.42 s
+gzip1       python    0.81 s      0.85 s
+
+-> no gain on a single core, the thread only adds a little overhead
+-> h5py 3.16 releases the GIL while reading (a spinning thread keeps running
+   during a long dataset-read), so with 2+ cores the read of the next chunks
+   overlaps the consumer, which is then bound by max(read, consume) instead of the sum
+
+"""
+
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from shepherd_core import Compression
+from shepherd_core import Reader
+from shepherd_core import Writer
+from shepherd_core import logger
+
+duration_s = 60
+path_here = Path(__file__).parent
+
+
+def consume_none(_voltage: np.ndarray, _current: np.ndarray) -> None:
+    """Only read data."""
+
+
+def consume_numpy(voltage: np.ndarray, current: np.ndarray) -> None:
+    """Process data vectorized (numpy releases the GIL)."""
+    for _ in range(10):
+        np.sin(np.exp(voltage * current))
+
+
+def consume_python(voltage: np.ndarray, _current: np.ndarray) -> None:
+    """Process data while keeping the GIL, similar to a (light) per-sample loop."""
+    sum(range(voltage.shape[0]))
+
+
+if __name__ == "__main__":
+    for compression in [Compression.lzf, Compression.gzip1]:
+        path_h5 = path_here / f"bench_read_prefetch_{compression.name}.h5"
+        if not path_h5.exists():
+            with Writer(path_h5, compression=compression, verbose=False) as writer:
+                writer.store_hostname("artificial")
+                samples_n = duration_s * writer.samplerate_sps
+                rng = np.random.default_rng(seed=1)
+                writer.append_iv_data_si(
+                    time.time(),
+                    rng.uniform(1.8, 3.6, samples_n),
+                    rng.uniform(100e-6, 2e-3, samples_n),
+                )
+
+        logger.info("cpu-cores: %d", os.cpu_count())
+        with Reader(path_h5, verbose=False) as reader:
+            for consumer in [consume_none, consume_numpy, consume_python]:
+                durations = []
+                for prefetch in [0, 8]:
+                    t_start = time.perf_counter()
+                    for _, voltage, current in reader.read(prefetch=prefetch):
+                        consumer(voltage, current)
+                    durations.append(time.perf_counter() - t_start)
+                logger.info(
+                    "%s %s: %.2f s -> %.2f s with prefetch",
+                    compression.name,
+                    consumer.__name__,
+                    *durations,
+                )
+        path_h5.unlink()
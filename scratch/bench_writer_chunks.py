@@ -0,0 +1,82 @@
+"""
+Compare appending with staged, pre-compressed chunks and writing through the filter-pipeline.
+
+- 5 min recording @ 100 kSPS with random data
+- appends of 1 k samples (emulator-buffer) and 12_345 samples (unaligned)
+- previous behaviour wrote every append through the filter-pipeline,
+  partially filled chunks got decompressed & recompressed for every append
+
+Results (VM with 1 core):
+
+compression  block    pipeline  staged
+None          1_000   16.9 s     5.6 s
+None         12_345    3.6 s     2.0 s
+gzip-1        1_000   28.9 s    17.5 s
+gzip-1       12_345   15.6 s    14.1 s
+lzf           1_000   25.3 s    14.6 s
+lzf          12_345    9.8 s     8.4 s
+
+-> None & gzip get compressed here and written with write_direct_chunk(),
+   lzf still passes the filter-pipeline (no python-binding), but only once per chunk
+-> small appends profit the most, runtime of gzip is dominated by zlib itself
+
+"""
+
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from shepherd_core import Compression
+from shepherd_core import Writer
+from shepherd_core import logger
+
+duration_s = 300
+path_here = Path(__file__).parent
+path_h5 = path_here / "bench_writer_chunks.h5"
+
+
+class FilterWriter(Writer):
+    """Appends like before, every append goes through the filter-pipeline."""
+
+    def _stage_append(
+        self, position: int, time: np.ndarray, voltage: np.ndarray, current: np.ndarray
+    ) -> None:
+        for dataset, values in zip(
+            (self.ds_time, self.ds_voltage, self.ds_current), (time, voltage, current)
+        ):
+            dataset[position : position + values.shape[0]] = values
+
+
+def write_file(writer_cls: type[Writer], compression: Optional[Compression], block_n: int) -> float:
+    """Write a synthetic recording with the given writer, returns duration in s."""
+    rng = np.random.default_rng(seed=1)
+    samples_n = duration_s * 100_000
+    voltage = rng.integers(0, 2**18, samples_n).astype("u4")
+    current = rng.integers(0, 2**12, samples_n).astype("u4")
+    t_start = time.perf_counter()
+    with writer_cls(path_h5, compression=compression, verbose=False) as writer:
+        writer.store_hostname("artificial")
+        time_nd = (10**18 + writer.sample_interval_ns * np.arange(samples_n)).astype("u8")
+        for idx in range(0, samples_n, block_n):
+            writer.append_iv_data_raw(
+                time_nd[idx : idx + block_n],
+                voltage[idx : idx + block_n],
+                current[idx : idx + block_n],
+            )
+    duration = time.perf_counter() - t_start
+    path_h5.unlink()
+    return duration
+
+
+if __name__ == "__main__":
+    for compression in [Compression.null, Compression.gzip1, Compression.lzf]:
+        for block_n in [1_000, 12_345]:
+            logger.info(
+                "%s, blocks of %d: pipeline %.2f s, staged %.2f s",
+                compression.name,
+                block_n,
+                write_file(FilterWriter, compression, block_n),
+                write_file(Writer, compression, block_n),
+            )
@@ -0,0 +1,81 @@
+"""
+Compare the time producers are blocked by appending directly vs. with QueuedWriter.
+
+- @ 100 kSPS, gzip-1 compressed, chunks of 10k samples in SI-units (like generators)
+- producer spends some time per chunk to generate data (random walk)
+- fast: 5 min as fast as possible, paced: 30 s in real-time (like sampling)
+- blocked = time spent in append_iv_data_si() / put(), the rest stays for the producer
+
+Results (VM with 1 core):
+
+fast  direct:  total 14.1 s, blocked per chunk median 4.2 ms, p99 6.4 ms, max 13.5 ms
+fast  queued:  total 15.0 s, blocked per chunk median 4.5 ms, p99 7.7 ms, max 12.1 ms
+paced direct:  total 30.1 s, blocked per chunk median 6.4 ms, p99 12.5 ms, max 17.3 ms
+paced queued:  total 29.9 s, blocked per chunk median 0.0 ms, p99 0.1 ms, max 0.2 ms
+
+-> real-time producers only hand over the chunk, calibration, compression & disk-io
+   happen on the I/O-thread -> jitter of the producer does not depend on the disk anymore
+-> producers faster than the writer get throttled by the bounded queue (backpressure),
+   on 1 core the total stays the same, with more cores the I/O-thread runs in
+   parallel (zlib & h5py release the GIL for most of the work)
+
+"""
+
+import time
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+
+from shepherd_core import Compression
+from shepherd_core import QueuedWriter
+from shepherd_core import Writer
+from shepherd_core import logger
+
+duration_s = 300
+duration_paced_s = 30
+chunk_n = 10_000
+path_here = Path(__file__).parent
+path_h5 = path_here / "bench_writer_queued.h5"
+
+
+def produce(append: callable, sample_interval_s: float, *, paced: bool) -> np.ndarray:
+    """Generate chunks, returns the durations the producer was blocked by appending."""
+    rng = np.random.default_rng(seed=1)
+    blocked = []
+    level = 1.0
+    chunks_n = (duration_paced_s if paced else duration_s) * 100_000 // chunk_n
+    time_ref = time.perf_counter()
+    for idx in range(chunks_n):
+        if paced:  # like sampling in real-time
+            time.sleep(max(time_ref + idx * chunk_n * sample_interval_s - time.perf_counter(), 0))
+        timestamps = (idx * chunk_n + np.arange(chunk_n)) * sample_interval_s
+        voltage = level + np.cumsum(rng.normal(0, 1e-3, chunk_n))
+        level = voltage[-1]
+        current = rng.uniform(0, 1e-3, chunk_n)
+        time_start = time.perf_counter()
+        append(timestamps, voltage, current)
+        blocked.append(time.perf_counter() - time_start)
+    return np.array(blocked)
+
+
+if __name__ == "__main__":
+    for paced, variant in product([False, True], ["direct", "queued"]):
+        time_start = time.perf_counter()
+        with Writer(path_h5, compression=Compression.gzip1, force_overwrite=True) as sfw:
+            if variant == "direct":
+                blocked = produce(sfw.append_iv_data_si, sfw.sample_interval_s, paced=paced)
+            else:
+                with QueuedWriter(sfw) as sfq:
+                    blocked = produce(sfq.put, sfw.sample_interval_s, paced=paced)
+        duration = time.perf_counter() - time_start
+        logger.info(
+            "%s %s:  total %.1f s, blocked per chunk median %.1f ms, p99 %.1f ms, max %.1f ms",
+            "paced" if paced else "fast ",
+            variant,
+            duration,
+            1e3 * np.median(blocked),
+            1e3 * np.percentile(blocked, 99),
+            1e3 * blocked.max(),
+        )
+    path_h5.unlink()
@@ -0,0 +1,62 @@
+"""
+Compare gzip-compression of chunks inline and on a pool of threads (Writer(compression_threads=n)).
+
+- 5 min recording @ 100 kSPS with random data, gzip-1 compressed
+- appends of 1 M samples (like the eenv-converter & -generator)
+- chunks get compressed concurrently (zlib releases the GIL) and written in order
+
+Results (VM with 1 core):
+
+threads = 1: 11.8 s
+threads = 2: 12.9 s
+threads = 4: 12.9 s
+
+-> no gain with 1 core, the pool only adds overhead (~10 %)
+-> zlib is ~85 % of the runtime (see bench_writer_chunks.py: gzip-1 14.1 s vs. 2.0 s without),
+   so it is expected to scale with the number of cores on the analysis-server
+
+"""
+
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from shepherd_core import Compression
+from shepherd_core import Writer
+from shepherd_core import logger
+
+duration_s = 300
+block_n = 1_000_000
+path_here = Path(__file__).parent
+path_h5 = path_here / "bench_writer_threads.h5"
+
+
+def write_file(threads: int) -> float:
+    """Write a synthetic recording with given compression-threads, returns duration in s."""
+    rng = np.random.default_rng(seed=1)
+    samples_n = duration_s * 100_000
+    voltage = rng.integers(0, 2**18, samples_n).astype("u4")
+    current = rng.integers(0, 2**12, samples_n).astype("u4")
+    t_start = time.perf_counter()
+    with Writer(
+        path_h5, compression=Compression.gzip1, compression_threads=threads, verbose=False
+    ) as writer:
+        writer.store_hostname("artificial")
+        time_nd = (10**18 + writer.sample_interval_ns * np.arange(samples_n)).astype("u8")
+        for idx in range(0, samples_n, block_n):
+            writer.append_iv_data_raw(
+                time_nd[idx : idx + block_n],
+                voltage[idx : idx + block_n],
+                current[idx : idx + block_n],
+            )
+    duration = time.perf_counter() - t_start
+    path_h5.unlink()
+    return duration
+
+
+if __name__ == "__main__":
+    logger.info("cpu-count = %d", os.cpu_count())
+    for threads in [1, 2, 4]:
+        logger.info("threads = %d: %.2f s", threads, write_file(threads))
@@ -10,7 +10,9 @@ from .data_models.base.calibration import CalibrationCape
 from .data_models.base.calibration import CalibrationEmulator
 from .data_models.base.calibration import CalibrationHarvester
 from .data_models.base.calibration import CalibrationPair
+from .data_models.base.calibration import CalibrationPairCompiled
 from .data_models.base.calibration import CalibrationSeries
+from .data_models.base.calibration import CalibrationSeriesCompiled
 from .data_models.base.timezone import local_now
 from .data_models.base.timezone import local_tz
 from .data_models.task.emulation import Compression
@@ -22,6 +24,7 @@ from .reader import Reader
 from .testbed_client.client_web import WebClient
 from .version import version
 from .writer import Writer
+from .writer_queued import QueuedWriter
 
 __version__ = version
 
@@ -31,9 +34,12 @@ __all__ = [
     "CalibrationEmulator",
     "CalibrationHarvester",
     "CalibrationPair",
+    "CalibrationPairCompiled",
     "CalibrationSeries",
+    "CalibrationSeriesCompiled",
     "Compression",
     "Inventory",
+    "QueuedWriter",
     "Reader",
     "WebClient",
     "Writer",
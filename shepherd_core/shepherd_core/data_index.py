@@ -0,0 +1,530 @@
+"""Per-chunk statistics of the iv-data, stored next to it in the hdf5-file.
+
+The Writer maintains the index while appending and the Reader answers energy-,
+statistic- and gap-queries from it, without reading & decompressing all iv-data.
+All values are kept in the raw domain, so the index stays valid when
+the calibration of the file changes.
+
+Optionally a pyramid of decimated levels (min, max & mean per bucket) can be
+stored for plotting long recordings without touching the full-resolution data.
+
+Both carry a fingerprint of the iv-data (checksum of a few chunks), so edits
+outside the Writer (i.e. h5py-scripts) are detected and the index gets rebuilt.
+Edits that miss the sampled chunks can't be detected -> rerun the index-command
+of the CLI (shepherd-data index) after modifying iv-data by other means.
+"""
+
+from __future__ import annotations
+
+import math
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from types import MappingProxyType
+from typing import TYPE_CHECKING
+from typing import Optional
+
+import h5py
+import numpy as np
+from tqdm import tqdm
+from tqdm import trange
+
+from .data_models.base.shepherd import ShpModel
+from .time_segments import time_dataset
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Mapping
+    from collections.abc import Sequence
+    from pathlib import Path
+
+    from .data_models.base.calibration import CalibrationPair
+    from .data_models.base.calibration import CalibrationSeries
+
+INDEX_GROUP: str = "data_index"
+PYRAMID_GROUP: str = "data_pyramid"
+PYRAMID_FACTORS: tuple[int, ...] = (10, 100, 1_000, 10_000, 100_000)
+PYRAMID_STATS: Mapping[str, Callable] = MappingProxyType(
+    {"min": np.min, "max": np.max, "mean": np.mean}
+)
+FINGERPRINT_PROBES: int = 8
+
+
+def iv_fingerprint(grp_data: h5py.Group, samples_n: int, chunk_samples_n: int) -> str:
+    """Checksum of a few chunks of voltage & current, spread evenly over the data.
+
+    Cheap (reads at most FINGERPRINT_PROBES chunks) but detects modifications of the
+    iv-data that leave size & timestamps untouched.
+
+    :param grp_data: data-group of the file
+    :param samples_n: samples to consider
+    :param chunk_samples_n: size of the probed chunks
+    :return: crc32 as hex-string
+    """
+    chunks_n = math.ceil(samples_n / chunk_samples_n)
+    crc = zlib.crc32(str(samples_n).encode())
+    if chunks_n < 1:
+        return f"{crc:08x}"
+    probes = np.unique(np.linspace(0, chunks_n - 1, FINGERPRINT_PROBES).round().astype(int))
+    for idx in probes.tolist():
+        start = idx * chunk_samples_n
+        end = min(start + chunk_samples_n, samples_n)
+        for name in ["voltage", "current"]:
+            crc = zlib.crc32(np.ascontiguousarray(grp_data[name][start:end]).tobytes(), crc)
+    return f"{crc:08x}"
+
+
+class DataIndex:
+    """Statistics for every chunk of the iv-data (time, voltage, current).
+
+    The chunk-statistics are the raw moments that can be merged without error:
+    sample-count, first & last timestamp, min, max, sum and the sum of squared
+    deviations from the chunk-mean (M2, numerically stable variant of the
+    sum of squares) for voltage & current and the sum of raw voltage * current.
+
+    Args:
+    ----
+        chunk_samples_n: samples per chunk, the last chunk may be partial
+        data: arrays for each field in FIELDS, empty index if omitted
+
+    """
+
+    FIELDS: Mapping[str, str] = MappingProxyType(
+        {
+            "samples_n": "u4",
+            "time_first": "u8",
+            "time_last": "u8",
+            "voltage_min": "u4",
+            "voltage_max": "u4",
+            "voltage_sum": "u8",
+            "voltage_m2": "f8",
+            "current_min": "u4",
+            "current_max": "u4",
+            "current_sum": "u8",
+            "current_m2": "f8",
+            "power_sum": "f8",
+        }
+    )
+
+    def __init__(
+        self, chunk_samples_n: int, data: Optional[Mapping[str, np.ndarray]] = None
+    ) -> None:
+        self.chunk_samples_n: int = chunk_samples_n
+        self.fingerprint: Optional[str] = None
+        # ⤷ of the iv-data when loaded from file, see iv_fingerprint()
+        if data is None:
+            data = {}
+        self.data: dict[str, np.ndarray] = {
+            key: np.asarray(data.get(key, []), dtype=dtype) for key, dtype in self.FIELDS.items()
+        }
+
+    @property
+    def samples_n(self) -> int:
+        return int(self.data["samples_n"].sum(dtype="u8"))
+
+    @property
+    def chunks_n(self) -> int:
+        return self.data["samples_n"].shape[0]
+
+    @classmethod
+    def from_iv(
+        cls,
+        time: np.ndarray,
+        voltage: np.ndarray,
+        current: np.ndarray,
+        chunk_samples_n: int,
+    ) -> DataIndex:
+        """Calculate the statistics for raw iv-data that starts at a chunk-boundary."""
+        samples_n = min(time.shape[0], voltage.shape[0], current.shape[0])
+        if samples_n < 1:
+            return cls(chunk_samples_n)
+        starts = np.arange(0, samples_n, chunk_samples_n)
+        counts = np.diff(np.append(starts, samples_n))
+        data: dict[str, np.ndarray] = {
+            "time_first": time[starts],
+            "time_last": time[starts + counts - 1],
+        }
+        for name, values in (("voltage", voltage[:samples_n]), ("current", current[:samples_n])):
+            data[f"{name}_min"] = np.minimum.reduceat(values, starts)
+            data[f"{name}_max"] = np.maximum.reduceat(values, starts)
+        sums = raw_iv_sums(
+            voltage[:samples_n],
+            current[:samples_n],
+            chunk_samples_n,
+            values_max=(int(data["voltage_max"].max()), int(data["current_max"].max())),
+        )
+        data.update(sums)
+        for name, values in (("voltage", voltage[:samples_n]), ("current", current[:samples_n])):
+            deviations = values - np.repeat(sums[f"{name}_sum"] / counts, counts)
+            data[f"{name}_m2"] = np.add.reduceat(deviations * deviations, starts)
+        return cls(chunk_samples_n, data)
+
+    @classmethod
+    def from_datasets(
+        cls,
+        ds_time: h5py.Dataset,
+        ds_voltage: h5py.Dataset,
+        ds_current: h5py.Dataset,
+        samples_n: int,
+        *,
+        chunk_samples_n: int,
+        block_samples_n: int,
+        start_n: int = 0,
+        verbose: bool = True,
+    ) -> DataIndex:
+        """Build the index by reading the whole iv-data once (block-wise).
+
+        :param samples_n: number of samples to include (end of range)
+        :param chunk_samples_n: samples per chunk
+        :param block_samples_n: samples per read, gets rounded down to full chunks
+        :param start_n: first sample to include, has to be at a chunk-boundary
+        :param verbose: show progress-bar for longer runs
+        """
+        if start_n % chunk_samples_n != 0:
+            raise ValueError("Start of index has to be at a chunk-boundary")
+        block_samples_n = max(block_samples_n // chunk_samples_n, 1) * chunk_samples_n
+        index = cls(chunk_samples_n)
+        iterations = math.ceil((samples_n - start_n) / block_samples_n)
+        for idx in trange(
+            start_n,
+            samples_n,
+            block_samples_n,
+            desc="index",
+            leave=False,
+            disable=(not verbose) or iterations < 8,
+        ):
+            idx_end = min(idx + block_samples_n, samples_n)
+            index.extend(
+                cls.from_iv(
+                    ds_time[idx:idx_end],
+                    ds_voltage[idx:idx_end],
+                    ds_current[idx:idx_end],
+                    chunk_samples_n,
+                )
+            )
+        return index
+
+    @classmethod
+    def from_file(
+        cls,
+        file_path: Path,
+        samples_n: int,
+        *,
+        chunk_samples_n: int,
+        block_samples_n: int,
+        jobs: int,
+    ) -> DataIndex:
+        """Build the index with several processes, each handling a chunk-aligned shard.
+
+        Every worker opens the file read-only itself. The chunk-statistics of the
+        shards simply get concatenated, so the result is identical to from_datasets().
+
+        :param file_path: hdf5-file with the iv-data in the data-group
+        :param samples_n: number of samples to include
+        :param chunk_samples_n: samples per chunk
+        :param block_samples_n: samples per read, also smallest shard
+        :param jobs: number of worker-processes
+        """
+        block_samples_n = max(block_samples_n // chunk_samples_n, 1) * chunk_samples_n
+        blocks_n = math.ceil(samples_n / block_samples_n)
+        # ⤷ some shards per worker to balance uneven decompression-effort
+        shard_samples_n = max(math.ceil(blocks_n / (4 * jobs)), 1) * block_samples_n
+        starts = range(0, samples_n, shard_samples_n)
+        index = cls(chunk_samples_n)
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            shards = executor.map(
+                index_shard,
+                [file_path] * len(starts),
+                starts,
+                [min(start + shard_samples_n, samples_n) for start in starts],
+                [chunk_samples_n] * len(starts),
+                [block_samples_n] * len(starts),
+            )
+            for shard in tqdm(
+                shards, desc="index", total=len(starts), leave=False, disable=len(starts) < 8
+            ):
+                index.extend(shard)
+        return index
+
+    @classmethod
+    def from_h5(cls, h5file: h5py.File) -> Optional[DataIndex]:
+        """Load index from file, returns None if it is missing or incomplete."""
+        if INDEX_GROUP not in h5file:
+            return None
+        group = h5file[INDEX_GROUP]
+        if "chunk_samples_n" not in group.attrs or any(key not in group for key in cls.FIELDS):
+            return None
+        index = cls(int(group.attrs["chunk_samples_n"]), {key: group[key][:] for key in cls.FIELDS})
+        fingerprint = group.attrs.get("fingerprint")
+        index.fingerprint = None if fingerprint is None else str(fingerprint)
+        return index
+
+    def to_h5(self, h5file: h5py.File) -> None:
+        """Store index in file, replaces an existing one."""
+        if INDEX_GROUP in h5file:
+            del h5file[INDEX_GROUP]
+        group = h5file.create_group(INDEX_GROUP)
+        group.attrs["chunk_samples_n"] = self.chunk_samples_n
+        group.attrs["description"] = "per-chunk statistics of raw iv-data in data-group"
+        self.fingerprint = iv_fingerprint(h5file["data"], self.samples_n, self.chunk_samples_n)
+        group.attrs["fingerprint"] = self.fingerprint
+        for key, values in self.data.items():
+            group.create_dataset(key, data=values)
+
+    def extend(self, other: DataIndex) -> None:
+        """Append the chunks of another index (that starts where this one ends)."""
+        if other.chunk_samples_n != self.chunk_samples_n:
+            raise ValueError("Chunk-sizes of indices differ")
+        for key in self.FIELDS:
+            self.data[key] = np.concatenate((self.data[key], other.data[key]))
+
+    def matches(
+        self,
+        ds_time: h5py.Dataset,
+        samples_n: int,
+        chunk_samples_n: int,
+        fingerprint: Optional[str] = None,
+    ) -> bool:
+        """Cheap plausibility check against the iv-data (size & first/last timestamp).
+
+        :param fingerprint: of the current iv-data (see iv_fingerprint()), if given
+            it has to equal the one stored with the index
+        """
+        if (self.chunk_samples_n != chunk_samples_n) or (self.samples_n != samples_n):
+            return False
+        if (fingerprint is not None) and (fingerprint != self.fingerprint):
+            return False
+        if samples_n < 1:
+            return True
+        return (self.data["time_first"][0] == ds_time[0]) and (
+            self.data["time_last"][-1] == ds_time[samples_n - 1]
+        )
+
+    def energy_chunks(self, cal: CalibrationSeries, sample_interval_s: float) -> np.ndarray:
+        """Energy [Ws] per chunk, derived from the raw sums (see power_from_sums())."""
+        return power_from_sums(self.data, cal) * sample_interval_s
+
+    def statistics(self, name: str, cal: CalibrationPair) -> dict[str, float]:
+        """Merge the chunk-statistics of voltage or current and convert them to SI.
+
+        :param name: voltage or current
+        :param cal: calibration for the dataset
+        :return: dict with entries for mean, min, max, std (empty if there is no data)
+        """
+        counts = self.data["samples_n"].astype("f8")
+        if counts.sum() < 1:
+            return {}
+        means = self.data[f"{name}_sum"] / np.maximum(counts, 1)
+        mean, std = merge_moments(counts, means, self.data[f"{name}_m2"])
+        extremes = (
+            cal.raw_to_si(float(self.data[f"{name}_min"].min())),
+            cal.raw_to_si(float(self.data[f"{name}_max"].max())),
+        )
+        return {
+            "mean": float(cal.raw_to_si(mean)),
+            "min": float(min(extremes)),
+            "max": float(max(extremes)),
+            "std": float(abs(cal.gain) * std),
+        }
+
+    def time_diffs(self) -> np.ndarray:
+        """Determine unique (raw) time-deltas between chunk-starts, signed to show jumps back."""
+        return np.unique(np.diff(self.data["time_first"].astype(np.int64)))
+
+
+def raw_iv_sums(
+    voltage: np.ndarray,
+    current: np.ndarray,
+    window_n: int,
+    *,
+    values_max: Optional[tuple[int, int]] = None,
+) -> dict[str, np.ndarray]:
+    """Exact sums of raw iv-data for windows of samples (the last one may be partial).
+
+    Everything stays in the integer domain: the products of voltage & current
+    are accumulated per window in uint64 (einsum, without temporary arrays).
+    If a window-sum could overflow (large raw values), the current gets split
+    into 16-bit halves that are accumulated separately.
+
+    :param voltage: raw unsigned values (other dtypes get summed in float64)
+    :param current: raw unsigned values (other dtypes get summed in float64)
+    :param window_n: samples per window
+    :param values_max: maximum of voltage & current, if already known
+    :return: dict with samples_n, voltage_sum, current_sum & power_sum (sum of v*i)
+             per window, power_sum is float64 (exact below 2^53)
+    """
+    samples_n = min(voltage.shape[0], current.shape[0])
+    voltage = voltage[:samples_n]
+    current = current[:samples_n]
+    starts = np.arange(0, samples_n, window_n)
+    counts = np.diff(np.append(starts, samples_n))
+    if samples_n < 1:
+        return {
+            "samples_n": counts,
+            "voltage_sum": np.zeros((0,), dtype="u8"),
+            "current_sum": np.zeros((0,), dtype="u8"),
+            "power_sum": np.zeros((0,), dtype="f8"),
+        }
+    if (voltage.dtype.kind != "u") or (current.dtype.kind != "u"):
+        # ⤷ foreign data (i.e. float or signed), not raw -> all sums in float
+        voltage = voltage.astype("f8")
+        current = current.astype("f8")
+        return {
+            "samples_n": counts,
+            "voltage_sum": np.add.reduceat(voltage, starts),
+            "current_sum": np.add.reduceat(current, starts),
+            "power_sum": np.add.reduceat(voltage * current, starts),
+        }
+    full_n = (samples_n // window_n) * window_n
+    if values_max is None:
+        values_max = (int(voltage.max(initial=0)), int(current.max(initial=0)))
+    if values_max[0] * values_max[1] * window_n < 2**64:
+        parts: list[tuple[np.ndarray, int]] = [(current, 1)]
+    elif values_max[0] * (2**16 - 1) * window_n < 2**64:
+        parts = [(np.bitwise_and(current, 2**16 - 1), 1), (np.right_shift(current, 16), 2**16)]
+    else:
+        msg = f"Window of {window_n} samples is too large for exact sums of raw products"
+        raise ValueError(msg)
+
+    def _window_sums(subscripts: str, *operands: np.ndarray) -> np.ndarray:
+        # ⤷ full windows as rows (reshape is a view), the partial window is appended
+        sums = np.einsum(
+            subscripts,
+            *[values[:full_n].reshape((-1, window_n)) for values in operands],
+            dtype="u8",
+            casting="unsafe",
+        )
+        if full_n < samples_n:
+            sum_last = np.einsum(
+                subscripts.replace("ij", "i").replace("->i", "->"),
+                *[values[full_n:] for values in operands],
+                dtype="u8",
+                casting="unsafe",
+            )
+            sums = np.append(sums, sum_last)
+        return sums
+
+    power_sum = np.zeros(starts.shape, dtype="f8")
+    for values, factor in parts:
+        power_sum += factor * _window_sums("ij,ij->i", voltage, values).astype("f8")
+    return {
+        "samples_n": counts,
+        "voltage_sum": _window_sums("ij->i", voltage),
+        "current_sum": _window_sums("ij->i", current),
+        "power_sum": power_sum,
+    }
+
+
+def power_from_sums(sums: Mapping[str, np.ndarray], cal: CalibrationSeries) -> np.ndarray:
+    """Sum of power [W] per window, derived from the raw sums (see raw_iv_sums()).
+
+    The calibration is affine, so the sum of the products can be expanded:
+    sum((gv*v + ov) * (gi*i + oi)) = gv*gi*sum(v*i) + gv*oi*sum(v) + ov*gi*sum(i) + n*ov*oi
+    """
+    cal_v = cal.voltage
+    cal_c = cal.current
+    return (
+        cal_v.gain * cal_c.gain * sums["power_sum"]
+        + cal_v.gain * cal_c.offset * sums["voltage_sum"]
+        + cal_v.offset * cal_c.gain * sums["current_sum"]
+        + cal_v.offset * cal_c.offset * sums["samples_n"]
+    )
+
+
+def index_shard(
+    file_path: Path,
+    start_n: int,
+    end_n: int,
+    chunk_samples_n: int,
+    block_samples_n: int,
+) -> DataIndex:
+    """Build the index for a range of the iv-data, worker of DataIndex.from_file()."""
+    with h5py.File(file_path, "r") as h5file:
+        return DataIndex.from_datasets(
+            time_dataset(h5file["data"]),
+            h5file["data"]["voltage"],
+            h5file["data"]["current"],
+            end_n,
+            chunk_samples_n=chunk_samples_n,
+            block_samples_n=block_samples_n,
+            start_n=start_n,
+            verbose=False,
+        )
+
+
+def merge_moments(counts: np.ndarray, means: np.ndarray, m2s: np.ndarray) -> tuple[float, float]:
+    """Combine mean & variance of several blocks (parallel variant of Welford, Chan et al.).
+
+    M2 = sum(M2_k) + sum(n_k * (mean_k - mean)²), with M2 being the sum of squared deviations
+
+    :param counts: samples per block
+    :param means: mean per block
+    :param m2s: sum of squared deviations from the block-mean per block
+    :return: mean and (population) standard deviation of all samples
+    """
+    samples_n = counts.sum()
+    mean = (counts * means).sum() / samples_n
+    m2 = m2s.sum() + (counts * (means - mean) ** 2).sum()
+    return float(mean), math.sqrt(max(m2, 0) / samples_n)
+
+
+class SignalStatistics(ShpModel):
+    """Statistics of a signal (in SI-units if si_converted)."""
+
+    mean: float
+    min: float
+    max: float
+    std: float
+    si_converted: bool = True
+
+
+class DataReport(ShpModel):
+    """Summary of the iv-data, see Reader.analyze()."""
+
+    samples_n: int
+    runtime_s: float
+    energy_Ws: float
+    voltage: Optional[SignalStatistics] = None
+    current: Optional[SignalStatistics] = None
+    time_diffs_s: list[float]
+
+
+def pyramid_levels_from_iv(
+    time: np.ndarray,
+    voltage: np.ndarray,
+    current: np.ndarray,
+    factors: Sequence[int],
+) -> dict[int, dict[str, np.ndarray]]:
+    """Decimate iv-data into buckets with min, max & mean for each factor.
+
+    The data has to start at a bucket-boundary of the largest factor,
+    incomplete buckets at the end get omitted. Coarser levels are derived
+    from the finer ones, so each factor has to be a multiple of the previous one.
+
+    :param time: raw timestamps, the first one of each bucket is kept
+    :param voltage: voltage in SI-units
+    :param current: current in SI-units
+    :param factors: samples per bucket for each level, ascending
+    :return: dict per factor with time, {voltage, current, power}_{min, max, mean}
+    """
+    samples_n = min(time.shape[0], voltage.shape[0], current.shape[0])
+    signals = {"voltage": voltage[:samples_n], "current": current[:samples_n]}
+    signals["power"] = signals["voltage"] * signals["current"]
+    levels: dict[int, dict[str, np.ndarray]] = {}
+    factor_prev = 1
+    level_prev: dict[str, np.ndarray] = {"time": time[:samples_n]}
+    for name, stat in product(signals, PYRAMID_STATS):
+        level_prev[f"{name}_{stat}"] = signals[name]
+    for factor in factors:
+        if (factor <= factor_prev) or (factor % factor_prev != 0):
+            raise ValueError("Factors have to be ascending multiples of each other")
+        step = factor // factor_prev
+        buckets_n = level_prev["time"].shape[0] // step
+        level: dict[str, np.ndarray] = {"time": level_prev["time"][: buckets_n * step : step]}
+        for name, (stat, reduce) in product(signals, PYRAMID_STATS.items()):
+            values = level_prev[f"{name}_{stat}"][: buckets_n * step]
+            level[f"{name}_{stat}"] = reduce(values.reshape(buckets_n, step), axis=1).astype("f4")
+        levels[factor] = level
+        level_prev = level
+        factor_prev = factor
+    return levels
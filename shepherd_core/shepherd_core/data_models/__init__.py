@@ -13,7 +13,9 @@ from .base.calibration import CalibrationCape
 from .base.calibration import CalibrationEmulator
 from .base.calibration import CalibrationHarvester
 from .base.calibration import CalibrationPair
+from .base.calibration import CalibrationPairCompiled
 from .base.calibration import CalibrationSeries
+from .base.calibration import CalibrationSeriesCompiled
 from .base.calibration import CapeData
 from .base.content import ContentModel
 from .base.shepherd import ShpModel
@@ -39,7 +41,9 @@ __all__ = [
     "CalibrationEmulator",
     "CalibrationHarvester",
     "CalibrationPair",
+    "CalibrationPairCompiled",
     "CalibrationSeries",
+    "CalibrationSeriesCompiled",
     "CapeData",
     "ContentModel",
     "EnergyDType",
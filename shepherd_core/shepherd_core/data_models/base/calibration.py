@@ -87,6 +87,74 @@ class CalibrationPair(ShpModel):
         gain_inv = fn(1.0, limited=False) - offset
         return cls(gain=1.0 / float(gain_inv), offset=-float(offset) / gain_inv, unit=unit)
 
+    def compile(self) -> "CalibrationPairCompiled":
+        """Derive the fast representation for hot loops (see CalibrationPairCompiled)."""
+        return CalibrationPairCompiled(self.gain, self.offset)
+
+
+class CalibrationPairCompiled:
+    """Plain representation of a CalibrationPair for hot loops.
+
+    The pydantic-model stays the serialization format, this one just holds
+    gain & offset as floats (no validation, no model-attribute access).
+    Results match CalibrationPair, but the scalar-methods skip type-checks and
+    the vectorized ones avoid temporary arrays and accept a buffer via out=.
+
+    Args:
+    ----
+        gain: raw-value * gain + offset = SI-value
+        offset: see above
+
+    """
+
+    __slots__ = ("gain", "offset")
+
+    def __init__(self, gain: float, offset: float = 0.0) -> None:
+        self.gain: float = float(gain)
+        self.offset: float = float(offset)
+
+    def raw_to_si_scalar(self, value_raw: float, *, allow_negative: bool = True) -> float:
+        value_si = value_raw * self.gain + self.offset
+        return value_si if allow_negative else max(value_si, 0.0)
+
+    def si_to_raw_scalar(self, value_si: float) -> int:
+        return round(max((value_si - self.offset) / self.gain, 0.0))
+
+    def raw_to_si_array(
+        self,
+        values_raw: np.ndarray,
+        *,
+        allow_negative: bool = True,
+        out: Optional[np.ndarray] = None,
+    ) -> NDArray[np.float64]:
+        """Convert raw values to SI, out can be a float-buffer (i.e. values_raw itself)."""
+        values_si = np.multiply(values_raw, self.gain, out=out, dtype=np.float64)
+        np.add(values_si, self.offset, out=values_si)
+        if not allow_negative:
+            np.maximum(values_si, 0.0, out=values_si)
+        return values_si
+
+    def si_to_raw_array(
+        self, values_si: np.ndarray, *, out: Optional[np.ndarray] = None
+    ) -> NDArray[np.float64]:
+        """Convert SI-values to (rounded) raw values, out can be values_si itself."""
+        values_raw = np.subtract(values_si, self.offset, out=out, dtype=np.float64)
+        np.divide(values_raw, self.gain, out=values_raw)
+        np.maximum(values_raw, 0.0, out=values_raw)
+        return np.around(values_raw, out=values_raw)
+
+    def raw_to_si(self, values_raw: Calc_t, *, allow_negative: bool = True) -> Calc_t:
+        """Convert raw values to SI, drop-in for CalibrationPair.raw_to_si()."""
+        if isinstance(values_raw, np.ndarray):
+            return self.raw_to_si_array(values_raw, allow_negative=allow_negative)
+        return float(self.raw_to_si_scalar(values_raw, allow_negative=allow_negative))
+
+    def si_to_raw(self, values_si: Calc_t) -> Calc_t:
+        """Convert SI-values to raw, drop-in for CalibrationPair.si_to_raw()."""
+        if isinstance(values_si, np.ndarray):
+            return self.si_to_raw_array(values_si)
+        return self.si_to_raw_scalar(values_si)
+
 
 cal_hrv_legacy = {  # legacy translator
     "dac_voltage_a": "dac_V_Sim",
@@ -285,3 +353,27 @@ class CalibrationSeries(ShpModel):
         if emu_port_a:
             return cls(voltage=cal.dac_V_A, current=cal.adc_C_A)
         return cls(voltage=cal.dac_V_B, current=cal.adc_C_B)
+
+    def compile(self) -> "CalibrationSeriesCompiled":
+        """Derive the fast representation for hot loops (see CalibrationPairCompiled)."""
+        return CalibrationSeriesCompiled(
+            voltage=self.voltage.compile(),
+            current=self.current.compile(),
+            time=self.time.compile(),
+        )
+
+
+class CalibrationSeriesCompiled:
+    """Compiled calibration-pairs of a CalibrationSeries."""
+
+    __slots__ = ("current", "time", "voltage")
+
+    def __init__(
+        self,
+        voltage: CalibrationPairCompiled,
+        current: CalibrationPairCompiled,
+        time: CalibrationPairCompiled,
+    ) -> None:
+        self.voltage: CalibrationPairCompiled = voltage
+        self.current: CalibrationPairCompiled = current
+        self.time: CalibrationPairCompiled = time
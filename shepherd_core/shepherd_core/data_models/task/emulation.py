@@ -36,13 +36,18 @@ class Compression(str, Enum):
 
     lzf = default = "lzf"  # not native hdf5
     gzip1 = gzip = 1  # higher compr & load
+    lzf_shuffle = "lzf_shuffle"  # byte-shuffle ahead improves ratio of u4/u8
+    gzip1_shuffle = "gzip1_shuffle"
+    zstd = "zstd"  # needs hdf5plugin to write & read
+    blosc2 = "blosc2"  # zstd with shuffle, needs hdf5plugin to write & read
     null = None
     # NOTE: lzf & external file-compression (xz or zstd) work better than gzip
     #       -> even with additional compression
 
 
-compressions_allowed: list = [None, "lzf", 1]
+compressions_allowed: list = [None, "lzf", 1, "lzf_shuffle", "gzip1_shuffle", "zstd", "blosc2"]
 c_translate = {"lzf": "lzf", "1": 1, "None": None, None: None}
+# ⤷ only for filters native to h5py, see writer.dataset_filters() for all
 
 
 class EmulationTask(ShpModel):
@@ -7,6 +7,9 @@ import errno
 import logging
 import math
 import os
+import queue
+import threading
+import time
 from datetime import datetime
 from itertools import product
 from pathlib import Path
@@ -19,6 +22,7 @@ from typing import Union
 
 import h5py
 import numpy as np
+import numpy.typing as npt
 import yaml
 from pydantic import validate_call
 from tqdm import trange
@@ -26,11 +30,24 @@ from typing_extensions import Self
 from typing_extensions import deprecated
 
 from .config import config
+from .data_index import INDEX_GROUP
+from .data_index import PYRAMID_GROUP
+from .data_index import DataIndex
+from .data_index import DataReport
+from .data_index import iv_fingerprint
+from .data_index import merge_moments
+from .data_index import power_from_sums
+from .data_index import raw_iv_sums
 from .data_models.base.calibration import CalibrationPair
+from .data_models.base.calibration import CalibrationPairCompiled
 from .data_models.base.calibration import CalibrationSeries
+from .data_models.base.calibration import CalibrationSeriesCompiled
 from .data_models.base.timezone import local_tz
 from .data_models.content.energy_environment import EnergyDType
 from .decoder_waveform import Uart
+from .time_segments import TIME_SEGMENTS
+from .time_segments import TimeSegments
+from .time_segments import time_dataset
 
 if TYPE_CHECKING:
     from collections.abc import Generator
@@ -38,6 +55,36 @@ if TYPE_CHECKING:
     from collections.abc import Sequence
     from types import TracebackType
 
+FILTERS_SUPPORTED: frozenset[int] = frozenset(
+    {h5py.h5z.FILTER_DEFLATE, h5py.h5z.FILTER_SHUFFLE, h5py.h5z.FILTER_LZF, 32015, 32026}
+)
+# ⤷ ids of HDF5-filters, 32015 & 32026 are zstd & blosc2 (via hdf5plugin)
+FILTERS_PLUGIN: frozenset[int] = frozenset({32015, 32026})
+
+
+def load_filter_plugins(h5file: h5py.File) -> None:
+    """Register the HDF5-plugins needed to decompress the iv-data (lazy import of hdf5plugin).
+
+    Without it, files with zstd or blosc2 open fine but fail on the first read.
+    """
+    if "data" not in h5file:
+        return
+    filter_ids = set()
+    for dset in h5file["data"].values():
+        if isinstance(dset, h5py.Dataset):
+            plist = dset.id.get_create_plist()
+            filter_ids |= {plist.get_filter(_i)[0] for _i in range(plist.get_nfilters())}
+    if filter_ids.isdisjoint(FILTERS_PLUGIN):
+        return
+    try:
+        import hdf5plugin  # noqa: F401, PLC0415
+    except ImportError as xpt:
+        msg = (
+            f"Compression of '{Path(h5file.filename).name}' needs hdf5plugin "
+            "(pip install shepherd-core[compression])"
+        )
+        raise ImportError(msg) from xpt
+
 
 class Reader:
     """Sequentially Reads shepherd-data from HDF5 file.
@@ -46,6 +93,8 @@ class Reader:
     ----
         file_path: Path of hdf5 file containing shepherd data with iv-samples, iv-curves or isc&voc
         verbose: more debug-info during usage, 'None' skips the setter
+        swmr: open a file that is still written in SWMR-mode (single writer, multiple
+              readers), see Writer.start_swmr(), refresh() & follow()
 
     """
 
@@ -68,6 +117,7 @@ class Reader:
         file_path: Path,
         *,
         verbose: bool = True,
+        swmr: bool = False,
     ) -> None:
         self.file_path: Path = file_path.resolve()
 
@@ -83,6 +133,8 @@ class Reader:
 
         self.max_elements: int = 40 * self.samplerate_sps
         # ⤷ per iteration (40s full res, < 200 MB RAM use)
+        self.jobs: int = 1
+        # ⤷ worker-processes for whole-file operations (i.e. rebuilding the index)
 
         # init stats
         self.runtime_s: float = 0
@@ -92,6 +144,7 @@ class Reader:
         self.data_rate: float = 0
 
         self.buffers_n: Annotated[int, deprecated("use .chunk_n instead")] = 0
+        self._index: Optional[DataIndex] = None
 
         # open file (if not already done by writer)
         self._reader_opened: bool = False
@@ -104,11 +157,15 @@ class Reader:
                 )
 
             try:
-                self.h5file = h5py.File(self.file_path, "r")  # = readonly
+                if swmr:
+                    self.h5file = h5py.File(self.file_path, "r", libver="latest", swmr=True)
+                else:
+                    self.h5file = h5py.File(self.file_path, "r")  # = readonly
                 self._reader_opened = True
             except OSError as _xcp:
                 msg = f"Unable to open HDF5-File '{self.file_path.name}'"
                 raise TypeError(msg) from _xcp
+            load_filter_plugins(self.h5file)
 
             if self.is_valid():
                 self._logger.debug("File is available now")
@@ -123,19 +180,26 @@ class Reader:
             msg = (f"Type of opened file is not h5py.File, for {self.file_path.name}",)
             raise TypeError(msg)
 
-        self.ds_time: h5py.Dataset = self.h5file["data"]["time"]
+        self.ds_time: Union[h5py.Dataset, TimeSegments] = time_dataset(self.h5file["data"])
         self.ds_voltage: h5py.Dataset = self.h5file["data"]["voltage"]
         self.ds_current: h5py.Dataset = self.h5file["data"]["current"]
 
         # retrieve cal-data
         if not hasattr(self, "_cal"):
             cal_dict = CalibrationSeries().model_dump()
+            datasets = {
+                "current": self.ds_current,
+                "voltage": self.ds_voltage,
+                "time": self.ds_time,
+            }
             for ds, param in product(["current", "voltage", "time"], ["gain", "offset"]):
                 try:
-                    cal_dict[ds][param] = self.h5file["data"][ds].attrs[param]
+                    cal_dict[ds][param] = datasets[ds].attrs[param]
                 except KeyError:  # noqa: PERF203
                     self._logger.debug("Cal-Param '%s' for dataset '%s' not found!", param, ds)
             self._cal = CalibrationSeries(**cal_dict)
+        self._cal_fast: CalibrationSeriesCompiled = self._cal.compile()
+        # ⤷ used for conversions, the model stays for export & serialization
 
         self._refresh_file_stats()
 
@@ -188,7 +252,7 @@ class Reader:
         # above's typecasting prevents overflow in u64-format
         if (self.samples_n > 0) and (duration_raw > 0):
             # this assumes iso-chronous sampling, TODO: not the best choice?
-            duration_s = self._cal.time.raw_to_si(duration_raw)
+            duration_s = self._cal_fast.time.raw_to_si(duration_raw)
             self.sample_interval_s = duration_s / self.samples_n
             self.sample_interval_ns = round(10**9 * self.sample_interval_s)
             self.samplerate_sps = max(round((self.samples_n - 1) / duration_s), 1)
@@ -200,6 +264,90 @@ class Reader:
             self.file_size = 0
         self.data_rate = self.file_size / self.runtime_s if self.runtime_s > 0 else 0
 
+    def refresh(self) -> int:
+        """Update the view on datasets that get appended by a writer (needs swmr=True).
+
+        :return: number of new samples
+        """
+        if not self.h5file.swmr_mode:
+            raise ValueError("Refreshing needs a file opened in SWMR-mode (Reader(swmr=True))")
+        for dataset in [self.ds_voltage, self.ds_current]:
+            dataset.refresh()
+        if isinstance(self.ds_time, TimeSegments):
+            self.ds_time.dataset.refresh()
+            self.ds_time = TimeSegments(self.ds_time.dataset)
+        else:
+            self.ds_time.refresh()
+        samples_old = self.samples_n
+        self._refresh_file_stats()
+        return self.samples_n - samples_old
+
+    def follow(
+        self,
+        start_n: int = 0,
+        *,
+        poll_interval_s: float = 0.1,
+        timeout_s: float = 10.0,
+        is_raw: bool = False,
+        omit_timestamps: bool = False,
+    ) -> Generator[tuple, None, None]:
+        """Read chunks of a file while it is still written (live-tail).
+
+        Polls for new data with refresh() and yields complete chunks as they arrive,
+        so the latency is bounded by the polling-interval and the flushes of the writer
+        (see Writer.start_swmr()). The per-chunk statistics get extended with the new
+        chunks when following from the start (or from the end of get_index()),
+        so energy(), analyze() & co stay up-to-date without reading the file again.
+
+        Args:
+        ----
+            :param start_n: (int) Index of first chunk to be read
+            :param poll_interval_s: (float) pause between checks for new data
+            :param timeout_s: (float) stop when no new data arrived for that long
+            :param is_raw: (bool) output original data, not transformed to SI-Units
+            :param omit_timestamps: (bool) skip converting timestamps
+        Yields: chunks as they arrive (tuple with time, voltage, current)
+
+        """
+        if not self.h5file.swmr_mode:
+            raise ValueError("Following a file needs SWMR-mode (Reader(swmr=True))")
+        chunk_n = self.CHUNK_SAMPLES_N
+        block_n = max(self.max_elements // chunk_n, 1) * chunk_n
+        # ⤷ bounds memory when catching up with a long recording
+        position = start_n * chunk_n
+        time_data = time.monotonic()
+        while True:
+            end = min((self.samples_n // chunk_n) * chunk_n, position + block_n)
+            if end <= position:
+                if time.monotonic() - time_data > timeout_s:
+                    return
+                time.sleep(poll_interval_s)
+                self.refresh()
+                continue
+            data = (
+                self.ds_time[position:end],
+                self.ds_voltage[position:end],
+                self.ds_current[position:end],
+            )
+            if (self._index is None) and (position == 0):
+                self._index = DataIndex(chunk_n)
+            if (self._index is not None) and (self._index.samples_n == position):
+                self._index.extend(DataIndex.from_iv(*data, chunk_n))
+            for idx in range(0, end - position, chunk_n):
+                time_nd, voltage, current = (values[idx : idx + chunk_n] for values in data)
+                if is_raw:
+                    yield time_nd if not omit_timestamps else None, voltage, current
+                else:
+                    yield (
+                        self._cal_fast.time.raw_to_si_array(time_nd)
+                        if not omit_timestamps
+                        else None,
+                        self._cal_fast.voltage.raw_to_si_array(voltage),
+                        self._cal_fast.current.raw_to_si_array(current),
+                    )
+            position = end
+            time_data = time.monotonic()
+
     def read(
         self,
         start_n: int = 0,
@@ -208,6 +356,8 @@ class Reader:
         *,
         is_raw: bool = False,
         omit_timestamps: bool = False,
+        prefetch: int = 0,
+        out: Optional[Sequence[Optional[np.ndarray]]] = None,
     ) -> Generator[tuple, None, None]:
         """Read the specified range of chunks from the hdf5 file.
 
@@ -220,6 +370,11 @@ class Reader:
             :param n_samples_per_chunk: (int) allows changing
             :param is_raw: (bool) output original data, not transformed to SI-Units
             :param omit_timestamps: (bool) optimize reading if timestamp is never used
+            :param prefetch: (int) number of chunks a background-thread reads & converts
+                             in advance, 0 (default) reads synchronously
+            :param out: (tuple) caller-owned buffers for time, voltage & current
+                        (see allocate_buffers()) that get filled & yielded for every chunk,
+                        avoids allocations. Their dtype decides the output (i.e. float32)
         Yields: chunks between start and end (tuple with time, voltage, current)
 
         """
@@ -231,6 +386,27 @@ class Reader:
         _raw = is_raw
         _wts = not omit_timestamps
 
+        if out is not None:
+            if prefetch > 0:
+                raise ValueError("Prefetching can't be combined with caller-owned buffers")
+            yield from self._read_direct(
+                range(start_n, end_n),
+                n_samples_per_chunk,
+                out,
+                is_raw=_raw,
+                omit_timestamps=omit_timestamps,
+            )
+            return
+        if prefetch > 0:
+            yield from self._read_prefetched(
+                range(start_n, end_n),
+                n_samples_per_chunk,
+                prefetch,
+                is_raw=_raw,
+                omit_timestamps=omit_timestamps,
+            )
+            return
+
         for i in range(start_n, end_n):
             idx_start = i * n_samples_per_chunk
             idx_end = idx_start + n_samples_per_chunk
@@ -242,11 +418,157 @@ class Reader:
                 )
             else:
                 yield (
-                    self._cal.time.raw_to_si(self.ds_time[idx_start:idx_end]) if _wts else None,
-                    self._cal.voltage.raw_to_si(self.ds_voltage[idx_start:idx_end]),
-                    self._cal.current.raw_to_si(self.ds_current[idx_start:idx_end]),
+                    self._cal_fast.time.raw_to_si_array(self.ds_time[idx_start:idx_end])
+                    if _wts
+                    else None,
+                    self._cal_fast.voltage.raw_to_si_array(self.ds_voltage[idx_start:idx_end]),
+                    self._cal_fast.current.raw_to_si_array(self.ds_current[idx_start:idx_end]),
                 )
 
+    def allocate_buffers(
+        self,
+        n_samples_per_chunk: Optional[int] = None,
+        dtype: npt.DTypeLike = np.float64,
+        *,
+        is_raw: bool = False,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Create a set of buffers that can be reused by read(out=...).
+
+        :param n_samples_per_chunk: size of buffers, defaults to CHUNK_SAMPLES_N
+        :param dtype: for voltage & current in SI-units, time always stays float64
+                      (float32 would only resolve about 2 minutes of a unix-timestamp)
+        :param is_raw: use the dtypes of the datasets (raw output)
+        :return: tuple with buffers for time, voltage, current
+        """
+        if n_samples_per_chunk is None:
+            n_samples_per_chunk = self.CHUNK_SAMPLES_N
+        if is_raw:
+            dtypes = (self.ds_time.dtype, self.ds_voltage.dtype, self.ds_current.dtype)
+        else:
+            dtypes = (np.float64, dtype, dtype)
+        return tuple(np.empty((n_samples_per_chunk,), dtype=_dt) for _dt in dtypes)
+
+    def _read_direct(
+        self,
+        chunk_range: range,
+        n_samples_per_chunk: int,
+        out: Sequence[Optional[np.ndarray]],
+        *,
+        is_raw: bool,
+        omit_timestamps: bool,
+    ) -> Generator[tuple, None, None]:
+        """Read chunks directly into caller-owned buffers and calibrate them in place.
+
+        Raw values land in reused scratch-buffers (type-conversion inside HDF5 is slow)
+        and get calibrated into the output with out=, so no allocations happen per chunk.
+        The same buffers get yielded every iteration, so copy what has to be kept.
+        """
+        buffers = list(out)
+        if omit_timestamps:
+            buffers[0] = None
+        for buffer in buffers:
+            if (buffer is not None) and (buffer.shape[0] < n_samples_per_chunk):
+                raise ValueError("Provided buffers are smaller than a chunk")
+            if (buffer is not None) and not is_raw and buffer.dtype.kind != "f":
+                raise ValueError("Provided buffers must be float to hold SI-values")
+        datasets = (self.ds_time, self.ds_voltage, self.ds_current)
+        cals = (self._cal_fast.time, self._cal_fast.voltage, self._cal_fast.current)
+        targets = [None if _b is None else _b[:n_samples_per_chunk] for _b in buffers]
+        scratches = [
+            _t if (is_raw or _t is None) else np.empty(_t.shape, dtype=_ds.dtype)
+            for _t, _ds in zip(targets, datasets)
+        ]
+        # ⤷ low-level read with reused dataspaces, Dataset.read_direct() spends
+        #   more time on building the selection than the fast-path of slicing
+        space_mem = h5py.h5s.create_simple((n_samples_per_chunk,))
+        spaces_file = [
+            None if isinstance(_ds, TimeSegments) else _ds.id.get_space() for _ds in datasets
+        ]
+        for chunk in chunk_range:
+            idx_start = chunk * n_samples_per_chunk
+            for ds, cal, target, scratch, space_file in zip(
+                datasets, cals, targets, scratches, spaces_file
+            ):
+                if target is None:
+                    continue
+                if space_file is None:
+                    scratch[:] = ds[idx_start : idx_start + n_samples_per_chunk]
+                else:
+                    space_file.select_hyperslab((idx_start,), (n_samples_per_chunk,))
+                    ds.id.read(space_mem, space_file, scratch)
+                if not is_raw:
+                    cal.raw_to_si_array(scratch, out=target)
+            yield tuple(buffers)
+
+    def _read_prefetched(
+        self,
+        chunk_range: range,
+        n_samples_per_chunk: int,
+        prefetch: int,
+        *,
+        is_raw: bool,
+        omit_timestamps: bool,
+    ) -> Generator[tuple, None, None]:
+        """Read chunks in a background-thread that stays up to 'prefetch' chunks ahead.
+
+        The thread reads blocks of 'prefetch' chunks directly into a preallocated buffer
+        and hands out (calibrated) copies, so consumers are free to keep the chunks.
+        Exceptions of the thread get re-raised in the consumer.
+        """
+        datasets = [self.ds_time, self.ds_voltage, self.ds_current]
+        cals = [self._cal_fast.time, self._cal_fast.voltage, self._cal_fast.current]
+        buffers: list[Optional[np.ndarray]] = [
+            np.empty((prefetch * n_samples_per_chunk,), dtype=ds.dtype) for ds in datasets
+        ]
+        if omit_timestamps:
+            buffers[0] = None
+        chunks: queue.Queue = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+
+        def _put(item: Any) -> bool:
+            while not stop.is_set():
+                with contextlib.suppress(queue.Full):
+                    chunks.put(item, timeout=0.1)
+                    return True
+            return False
+
+        def _convert(buffer: Optional[np.ndarray], cal: CalibrationPairCompiled, idx: int) -> Any:
+            if buffer is None:
+                return None
+            values = buffer[idx * n_samples_per_chunk : (idx + 1) * n_samples_per_chunk]
+            return values.copy() if is_raw else cal.raw_to_si_array(values)
+
+        def _produce() -> None:
+            try:
+                for block_start in chunk_range[::prefetch]:
+                    block_n = min(prefetch, chunk_range.stop - block_start)
+                    idx_start = block_start * n_samples_per_chunk
+                    idx_end = idx_start + block_n * n_samples_per_chunk
+                    for ds, buffer in zip(datasets, buffers):
+                        if buffer is not None:
+                            ds.read_direct(
+                                buffer, np.s_[idx_start:idx_end], np.s_[: idx_end - idx_start]
+                            )
+                    for idx in range(block_n):
+                        item = tuple(_convert(buf, cal, idx) for buf, cal in zip(buffers, cals))
+                        if not _put(item):
+                            return
+            except Exception as xcp:  # noqa: BLE001
+                _put(xcp)  # ⤷ forwarded to consumer
+                return
+            _put(None)
+
+        producer = threading.Thread(target=_produce, name="SHPCore.Reader.prefetch", daemon=True)
+        producer.start()
+        try:
+            while (item := chunks.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            producer.join()
+
     @deprecated("use .read() instead")
     def read_buffers(
         self,
@@ -268,7 +590,7 @@ class Reader:
     def get_time_start(self) -> Optional[datetime]:
         if self.samples_n < 1:
             return None
-        return datetime.fromtimestamp(self._cal.time.raw_to_si(self.ds_time[0]), tz=local_tz())
+        return datetime.fromtimestamp(self._cal_fast.time.raw_to_si(self.ds_time[0]), tz=local_tz())
 
     def get_calibration_data(self) -> CalibrationSeries:
         """Read calibration-data from hdf5 file.
@@ -377,16 +699,18 @@ class Reader:
                     self.file_path.name,
                 )
                 return False
+        grp_data = self.h5file["data"]
         for dset in ["time", "current", "voltage"]:
-            if dset not in self.h5file["data"]:
+            if dset not in grp_data and not (dset == "time" and TIME_SEGMENTS in grp_data):
                 self._logger.error(
                     "[FileValidation] dataset '%s' not found in '%s'",
                     dset,
                     self.file_path.name,
                 )
                 return False
+            attrs = time_dataset(grp_data).attrs if dset == "time" else grp_data[dset].attrs
             for attr in ["gain", "offset"]:
-                if attr not in self.h5file["data"][dset].attrs:
+                if attr not in attrs:
                     self._logger.error(
                         "[FileValidation] attribute '%s' not found in dataset '%s' in '%s'",
                         attr,
@@ -419,7 +743,7 @@ class Reader:
                 self.file_path.name,
             )
         # same length of datasets:
-        samples_n = self.h5file["data"]["time"].shape[0]
+        samples_n = time_dataset(grp_data).shape[0]
         for dset in ["voltage", "current"]:
             ds_size = self.h5file["data"][dset].shape[0]
             if ds_size != samples_n:
@@ -439,13 +763,15 @@ class Reader:
                 self.file_path.name,
             )
         # check compression
-        for dset in ["time", "current", "voltage"]:
+        for dset in [TIME_SEGMENTS if TIME_SEGMENTS in grp_data else "time", "current", "voltage"]:
             comp = self.h5file["data"][dset].compression
             opts = self.h5file["data"][dset].compression_opts
-            if comp not in {None, "gzip", "lzf"}:
+            plist = self.h5file["data"][dset].id.get_create_plist()
+            filter_ids = {plist.get_filter(_i)[0] for _i in range(plist.get_nfilters())}
+            if not filter_ids.issubset(FILTERS_SUPPORTED):
                 self._logger.warning(
                     "[FileValidation] unsupported compression found "
-                    "(%s != None, lzf, gzip) in '%s'",
+                    "(%s != None, lzf, gzip, shuffle, zstd, blosc2) in '%s'",
                     comp,
                     self.file_path.name,
                 )
@@ -485,29 +811,68 @@ class Reader:
     def energy(self) -> float:
         """Determine the recorded energy of the trace.
 
-        # multiprocessing: https://stackoverflow.com/a/71898911
-        # -> failed with multiprocessing.pool and pathos.multiprocessing.ProcessPool.
+        Served from the per-chunk statistics (see get_index()).
 
         :return: sampled energy in Ws (watt-seconds)
         """
-        iterations = math.ceil(self.samples_n / self.max_elements)
-        job_iter = trange(
-            0,
-            self.samples_n,
-            self.max_elements,
-            desc="energy",
-            leave=False,
-            disable=iterations < 8,
-        )
+        energy_ws = self.get_index().energy_chunks(self._cal, self.sample_interval_s)
+        return math.fsum(energy_ws.tolist())
+
+    def power_mean(self) -> float:
+        """Determine the mean power of the trace.
+
+        Served from the per-chunk statistics (see get_index()).
+
+        :return: mean power in W
+        """
+        index = self.get_index()
+        if index.samples_n < 1:
+            return 0.0
+        return math.fsum(power_from_sums(index.data, self._cal).tolist()) / index.samples_n
 
-        def _calc_energy(idx_start: int) -> float:
-            idx_stop = min(idx_start + self.max_elements, self.samples_n)
-            vol_v = self._cal.voltage.raw_to_si(self.ds_voltage[idx_start:idx_stop])
-            cur_a = self._cal.current.raw_to_si(self.ds_current[idx_start:idx_stop])
-            return (vol_v[:] * cur_a[:]).sum() * self.sample_interval_s
+    def power_windows(self, window_n: int) -> tuple[np.ndarray, np.ndarray]:
+        """Determine the mean power for consecutive windows of samples.
 
-        energy_ws = [_calc_energy(i) for i in job_iter]
-        return float(sum(energy_ws))
+        Windows that are a multiple of the chunk-size are served from the per-chunk
+        statistics, others get reduced from the raw data (exact integer sums,
+        see raw_iv_sums()) without converting the iv-data to float.
+
+        :param window_n: samples per window, the last window may be partial
+        :return: timestamps of window-starts [s] and mean power per window [W]
+        """
+        if window_n < 1:
+            raise ValueError("Windows need at least one sample")
+        if self.samples_n < 1:
+            return np.zeros((0,)), np.zeros((0,))
+        if window_n % self.CHUNK_SAMPLES_N == 0:
+            index = self.get_index()
+            sums = index.data
+            starts = np.arange(0, index.chunks_n, window_n // self.CHUNK_SAMPLES_N)
+        else:
+            block_n = max(self.max_elements // window_n, 1) * window_n
+            iterations = math.ceil(self.samples_n / block_n)
+            job_iter = trange(
+                0,
+                self.samples_n,
+                block_n,
+                desc="power-windows",
+                leave=False,
+                disable=iterations < 8,
+            )
+            blocks = [
+                raw_iv_sums(
+                    self.ds_voltage[idx : idx + block_n],
+                    self.ds_current[idx : idx + block_n],
+                    window_n,
+                )
+                for idx in job_iter
+            ]
+            sums = {key: np.concatenate([block[key] for block in blocks]) for key in blocks[0]}
+            sums["time_first"] = self.ds_time[0 : self.samples_n : window_n]
+            starts = np.arange(sums["samples_n"].shape[0])
+        power = np.add.reduceat(power_from_sums(sums, self._cal), starts)
+        counts = np.add.reduceat(sums["samples_n"].astype("f8"), starts)
+        return self._cal_fast.time.raw_to_si_array(sums["time_first"][starts]), power / counts
 
     def _dset_statistics(
         self, dset: h5py.Dataset, cal: Optional[CalibrationPair] = None
@@ -525,6 +890,11 @@ class Reader:
             else:
                 cal = CalibrationPair(gain=1)
                 si_converted = False
+        if dset.name in {"/data/voltage", "/data/current"} and dset.file == self.h5file:
+            stats = self.get_index().statistics(dset.name.split("/")[-1], cal)
+            if len(stats) < 1:
+                return {}
+            return {**stats, "si_converted": si_converted}
         iterations = math.ceil(dset.shape[0] / self.max_elements)
         job_iter = trange(
             0,
@@ -536,55 +906,58 @@ class Reader:
         )
 
         def _calc_statistics(data: np.ndarray) -> list:
-            return [np.mean(data), np.min(data), np.max(data), np.std(data)]
+            return [data.size, np.mean(data), np.min(data), np.max(data), np.var(data) * data.size]
 
+        cal_fast = cal.compile()
         stats_list = [
-            _calc_statistics(cal.raw_to_si(dset[i : i + self.max_elements])) for i in job_iter
+            _calc_statistics(cal_fast.raw_to_si_array(dset[i : i + self.max_elements]))
+            for i in job_iter
         ]
         if len(stats_list) < 1:
             return {}
         stats_nd = np.stack(stats_list)
+        # ndim-datasets with n>1 are evaluated as a whole (all columns together)
+        mean, std = merge_moments(stats_nd[:, 0], stats_nd[:, 1], stats_nd[:, 4])
         stats: dict[str, float] = {
-            # TODO: wrong calculation for ndim-datasets with n>1
-            "mean": float(stats_nd[:, 0].mean()),
-            "min": float(stats_nd[:, 1].min()),
-            "max": float(stats_nd[:, 2].max()),
-            "std": float(stats_nd[:, 3].mean()),  # TODO: sooo wrong :)
+            "mean": mean,
+            "min": float(stats_nd[:, 2].min()),
+            "max": float(stats_nd[:, 3].max()),
+            "std": std,
             "si_converted": si_converted,
         }
         return stats
 
+    def analyze(self) -> DataReport:
+        """Summarize the iv-data: energy, statistics of voltage & current and time-deltas.
+
+        Everything is derived from the per-chunk statistics (see get_index()),
+        so the iv-data is read at most once (if the index has to be rebuilt).
+
+        :return: report with all results
+        """
+        stats_v = self._dset_statistics(self.ds_voltage)
+        stats_c = self._dset_statistics(self.ds_current)
+        return DataReport(
+            samples_n=self.samples_n,
+            runtime_s=self.runtime_s,
+            energy_Ws=self.energy(),
+            voltage=stats_v or None,
+            current=stats_c or None,
+            time_diffs_s=self._data_timediffs(),
+        )
+
     def _data_timediffs(self) -> list[float]:
         """Calculate list of unique time-deltas [s] between chunks.
 
-        Optimized version that only looks at the start of each chunk.
+        Only looks at the start of each chunk (served from get_index()).
         Timestamps get converted to signed (it still fits > 100 years)
         to allow calculating negative diffs.
 
         :return: list of (unique) time-deltas between chunks [s]
         """
-        iterations = math.ceil(self.samples_n / self.max_elements)
-        job_iter = trange(
-            0,
-            self.samples_n,
-            self.max_elements,
-            desc="timediff",
-            leave=False,
-            disable=iterations < 8,
-        )
-
-        def calc_timediffs(idx_start: int) -> list:
-            ds_time = self.ds_time[
-                idx_start : (idx_start + self.max_elements) : self.CHUNK_SAMPLES_N
-            ].astype(np.int64)
-            diffs_np = np.unique(ds_time[1:] - ds_time[0:-1], return_counts=False)
-            return list(np.array(diffs_np))
-
-        diffs_ll = [calc_timediffs(i) for i in job_iter]
         diffs = {
-            round(self._cal.time.raw_to_si(j) / self.CHUNK_SAMPLES_N, 6)
-            for i in diffs_ll
-            for j in i
+            round(self._cal_fast.time.raw_to_si(j) / self.CHUNK_SAMPLES_N, 6)
+            for j in self.get_index().time_diffs().tolist()
         }
         return list(diffs)
 
@@ -610,8 +983,61 @@ class Reader:
         _lvl = self.h5file[group_name]["level"]
         if _lvl.shape[0] < 1:
             return 0
-        _items = [1 for _x in _lvl[:] if _x >= min_level]
-        return len(_items)
+        return int(np.count_nonzero(_lvl[:] >= min_level))
+
+    def get_index(self) -> DataIndex:
+        """Provide per-chunk statistics of the iv-data.
+
+        The index is stored by the Writer. If it is missing or does not match the data,
+        it gets rebuilt (in memory) by reading the whole file once.
+        With self.jobs > 1 the file gets split into shards that are processed in parallel.
+        """
+        if (self._index is not None) and (self._index.samples_n == self.samples_n):
+            return self._index
+        self._index = DataIndex.from_h5(self.h5file)
+        if (self._index is None) or not self._index.matches(
+            self.ds_time, self.samples_n, self.CHUNK_SAMPLES_N, self._iv_fingerprint()
+        ):
+            self._logger.debug("Data-index missing or outdated -> will rebuild it")
+            if (self.jobs > 1) and self._reader_opened:
+                # ⤷ workers open the file themselves -> not possible while writing
+                self._index = DataIndex.from_file(
+                    self.file_path,
+                    self.samples_n,
+                    chunk_samples_n=self.CHUNK_SAMPLES_N,
+                    block_samples_n=self.max_elements,
+                    jobs=self.jobs,
+                )
+                return self._index
+            self._index = DataIndex.from_datasets(
+                self.ds_time,
+                self.ds_voltage,
+                self.ds_current,
+                self.samples_n,
+                chunk_samples_n=self.CHUNK_SAMPLES_N,
+                block_samples_n=self.max_elements,
+            )
+        return self._index
+
+    def _iv_fingerprint(self) -> str:
+        """Checksum of sampled chunks of the iv-data, see iv_fingerprint()."""
+        return iv_fingerprint(self.h5file["data"], self.samples_n, self.CHUNK_SAMPLES_N)
+
+    def get_pyramid(self) -> dict[int, h5py.Group]:
+        """Provide the levels of the min/max/mean-pyramid, stored by Writer.build_pyramid().
+
+        :return: group per decimation-factor, empty if pyramid is missing or outdated
+        """
+        if PYRAMID_GROUP not in self.h5file:
+            return {}
+        grp_pyramid = self.h5file[PYRAMID_GROUP]
+        if grp_pyramid.attrs.get("samples_n") != self.samples_n:
+            self._logger.debug("Pyramid does not cover the data -> will be ignored")
+            return {}
+        if grp_pyramid.attrs.get("fingerprint") != self._iv_fingerprint():
+            self._logger.debug("Pyramid does not match the (modified) data -> will be ignored")
+            return {}
+        return {int(level.attrs["factor"]): level for level in grp_pyramid.values()}
 
     def get_metadata(
         self,
@@ -638,8 +1064,9 @@ class Reader:
                 "compression": str(node.compression),
                 "compression_opts": str(node.compression_opts),
             }
-            if node.name == "/data/time":
+            if node.name in {"/data/time", f"/data/{TIME_SEGMENTS}"}:
                 metadata["_dataset_info"]["time_diffs_s"] = self._data_timediffs()
+                # ⤷ statistics of the segment-table (start, interval, length) are meaningless
                 # TODO: already convert to str to calm the typechecker?
                 #  or construct a pydantic-class
             elif "int" in str(node.dtype):
@@ -666,6 +1093,8 @@ class Reader:
                     "valid": self.is_valid(),
                 }
             for item in node:
+                if node.name == "/" and item in {INDEX_GROUP, PYRAMID_GROUP}:
+                    continue  # internal helpers, derived from data-group
                 metadata[item] = self.get_metadata(node[item], minimal=minimal)
 
         return metadata
@@ -0,0 +1,146 @@
+"""Implicit timestamps for isochronous iv-data.
+
+Instead of one u8-timestamp per sample (40 % of raw file-size) only segments
+with (start_ns, interval_ns, length) get stored in '/data/time_segments'.
+Gaps or deviations from the sample-interval start a new segment,
+so no information is lost. Timestamps get synthesized on demand.
+"""
+
+from typing import Any
+from typing import Optional
+from typing import Union
+
+import h5py
+import numpy as np
+
+TIME_SEGMENTS: str = "time_segments"
+# ⤷ dataset-name in data-group, replaces 'time'
+
+
+class TimeSegments:
+    """Stand-in for the time-dataset that synthesizes timestamps from segments.
+
+    Provides the parts of h5py.Dataset that are used for reading
+    (shape, size, dtype, name, attrs, slicing & read_direct()), so Reader
+    and helpers can use it transparently. The Writer appends to it in memory
+    and stores the segments with flush().
+
+    Args:
+    ----
+        dataset: segments with one row of (start_ns, interval_ns, length) each
+
+    """
+
+    dtype: np.dtype = np.dtype("u8")
+
+    def __init__(self, dataset: h5py.Dataset) -> None:
+        self.dataset = dataset
+        self.name: str = dataset.name
+        self.attrs = dataset.attrs
+        self._segments: np.ndarray = dataset[:].astype(np.int64).reshape((-1, 3))
+        self._update_offsets()
+
+    def _update_offsets(self) -> None:
+        """Sample-index of each segment-start (with total size as last element)."""
+        self._offsets: np.ndarray = np.zeros((self._segments.shape[0] + 1,), dtype=np.int64)
+        np.cumsum(self._segments[:, 2], out=self._offsets[1:])
+
+    @property
+    def shape(self) -> tuple[int]:
+        return (int(self._offsets[-1]),)
+
+    @property
+    def size(self) -> int:
+        return self.shape[0]
+
+    @property
+    def segments_n(self) -> int:
+        return self._segments.shape[0]
+
+    @property
+    def interval_ns(self) -> Optional[int]:
+        """Interval of the last segment (exact, in contrast to estimating it from runtime)."""
+        return int(self._segments[-1, 1]) if self._segments.shape[0] > 0 else None
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, key: Any) -> Union[np.ndarray, np.uint64]:
+        """Synthesize timestamps for an index, slice or array of indices."""
+        size = self.shape[0]
+        if isinstance(key, slice):
+            positions = np.arange(*key.indices(size), dtype=np.int64)
+        elif isinstance(key, (int, np.integer)):
+            if not -size <= key < size:
+                msg = f"Index ({key}) out of range for time-segments (0-{size - 1})"
+                raise IndexError(msg)
+            return self._synthesize(np.array([key % size], dtype=np.int64))[0]
+        else:
+            positions = np.asarray(key, dtype=np.int64)
+            if np.any((positions < -size) | (positions >= size)):
+                raise IndexError("Index out of range for time-segments")
+            positions = positions % max(size, 1)
+        return self._synthesize(positions)
+
+    def _synthesize(self, positions: np.ndarray) -> np.ndarray:
+        segment = np.searchsorted(self._offsets, positions, side="right") - 1
+        start, interval, _ = self._segments[segment].T
+        return (start + interval * (positions - self._offsets[segment])).astype(self.dtype)
+
+    def read_direct(self, dest: np.ndarray, source_sel: Any = None, dest_sel: Any = None) -> None:
+        """Fill a buffer with timestamps, like h5py.Dataset.read_direct()."""
+        source_sel = np.s_[:] if source_sel is None else source_sel
+        dest_sel = np.s_[:] if dest_sel is None else dest_sel
+        dest[dest_sel] = self[source_sel]
+
+    def append(self, timestamps: np.ndarray, interval_ns: int) -> None:
+        """Add timestamps of new samples (kept in memory until flush()).
+
+        :param timestamps: raw timestamps in ns
+        :param interval_ns: expected interval, deviations start a new segment
+        """
+        if timestamps.shape[0] == 0:
+            return
+        timestamps = timestamps.astype(np.int64)
+        breaks = np.flatnonzero(np.diff(timestamps) != interval_ns) + 1
+        bounds = np.concatenate(([0], breaks, [timestamps.shape[0]]))
+        segments = np.column_stack(
+            (
+                timestamps[bounds[:-1]],
+                np.full((bounds.shape[0] - 1,), interval_ns, dtype=np.int64),
+                np.diff(bounds),
+            )
+        )
+        if self._segments.shape[0] > 0:
+            start, interval, length = self._segments[-1]
+            if interval == interval_ns and segments[0, 0] == start + interval * length:
+                # ⤷ continues the last segment
+                self._segments[-1, 2] += segments[0, 2]
+                segments = segments[1:]
+        self._segments = np.concatenate((self._segments, segments))
+        self._update_offsets()
+
+    def resize(self, shape: tuple[int]) -> None:
+        """Truncate the timestamps (only shrinking is possible) and store segments."""
+        size = shape[0]
+        if size > self.shape[0]:
+            raise ValueError("Time-segments can only be truncated")
+        segments_n = int(np.searchsorted(self._offsets, size, side="left"))
+        self._segments = self._segments[:segments_n].copy()
+        if segments_n > 0:
+            self._segments[-1, 2] = size - self._offsets[segments_n - 1]
+        self._update_offsets()
+        self.flush()
+
+    def flush(self) -> None:
+        """Store segments in file."""
+        self.dataset.resize(self._segments.shape)
+        if self._segments.shape[0] > 0:
+            self.dataset[:] = self._segments
+
+
+def time_dataset(group: h5py.Group) -> Union[h5py.Dataset, TimeSegments]:
+    """Timestamps of a data-group, either stored per sample or as segments."""
+    if TIME_SEGMENTS in group:
+        return TimeSegments(group[TIME_SEGMENTS])
+    return group["time"]
@@ -7,8 +7,12 @@ from .virtual_converter_model import PruCalibration
 from .virtual_converter_model import VirtualConverterModel
 from .virtual_harvester_model import VirtualHarvesterModel
 from .virtual_harvester_simulation import simulate_harvester
+from .virtual_source_internals import plot_internals
+from .virtual_source_internals import read_internals
 from .virtual_source_model import VirtualSourceModel
 from .virtual_source_simulation import simulate_source
+from .virtual_source_sweep import simulate_source_sweep
+from .virtual_source_sweep import sweep_variants
 
 __all__ = [
     "ConstantCurrentTarget",
@@ -18,6 +22,10 @@ __all__ = [
     "VirtualConverterModel",
     "VirtualHarvesterModel",
     "VirtualSourceModel",
+    "plot_internals",
+    "read_internals",
     "simulate_harvester",
     "simulate_source",
+    "simulate_source_sweep",
+    "sweep_variants",
 ]
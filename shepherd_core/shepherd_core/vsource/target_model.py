@@ -14,6 +14,8 @@ from abc import ABC
 from abc import abstractmethod
 from contextlib import suppress
 
+import numpy as np
+
 
 class TargetABC(ABC):
     """Abstract base class for all targets."""
@@ -22,6 +24,19 @@ class TargetABC(ABC):
     def step(self, voltage_uV: int, *, pwr_good: bool) -> float:
         """Calculate one time step and return drawn current in nA."""
 
+    def step_chunk(self, voltage_uV: np.ndarray, pwr_good: np.ndarray) -> np.ndarray:
+        """Calculate a chunk of time steps and return drawn current in nA per step.
+
+        Loops over step(), targets without internal states can vectorize it.
+        """
+        return np.array(
+            [
+                self.step(int(_v), pwr_good=_p)
+                for _v, _p in zip(voltage_uV.tolist(), pwr_good.tolist())
+            ],
+            dtype=np.float64,
+        )
+
 
 class ResistiveTarget(TargetABC):
     """Predictable target with linear behavior."""
@@ -37,6 +52,12 @@ class ResistiveTarget(TargetABC):
             return voltage_uV / self.R_kOhm  # = nA
         return 0
 
+    def step_chunk(self, voltage_uV: np.ndarray, pwr_good: np.ndarray) -> np.ndarray:
+        current_nA = voltage_uV / self.R_kOhm
+        if self.ctrl:
+            current_nA[~pwr_good] = 0
+        return current_nA
+
 
 class DiodeTarget(TargetABC):
     """Emulate a diode and current limiting resistor in series.
@@ -111,6 +132,9 @@ class ConstantCurrentTarget(TargetABC):
     def step(self, voltage_uV: int, *, pwr_good: bool) -> float:  # noqa: ARG002
         return self.I_active_nA if pwr_good else self.I_sleep_nA
 
+    def step_chunk(self, voltage_uV: np.ndarray, pwr_good: np.ndarray) -> np.ndarray:  # noqa: ARG002
+        return np.where(pwr_good, self.I_active_nA, self.I_sleep_nA)
+
 
 class ConstantPowerTarget(TargetABC):
     """Recreate MCU with integrated regulator, i.e. nRF52."""
@@ -124,6 +148,11 @@ class ConstantPowerTarget(TargetABC):
     def step(self, voltage_uV: int, *, pwr_good: bool) -> float:
         return (self.P_active_fW if pwr_good else self.P_sleep_fW) / voltage_uV  # = nA
 
+    def step_chunk(self, voltage_uV: np.ndarray, pwr_good: np.ndarray) -> np.ndarray:
+        if not np.all(voltage_uV):
+            return super().step_chunk(voltage_uV, pwr_good)  # ⤷ raises like step()
+        return np.where(pwr_good, self.P_active_fW, self.P_sleep_fW) / voltage_uV
+
 
 # exemplary instantiations
 
@@ -34,10 +34,13 @@ class PruCalibration:
 
     def __init__(self, cal_emu: Optional[CalibrationEmulator] = None) -> None:
         self.cal = cal_emu if cal_emu else CalibrationEmulator()
+        # called per sample -> plain floats instead of pydantic-models
+        self._adc_C_A = self.cal.adc_C_A.compile()
+        self._dac_V_A = self.cal.dac_V_A.compile()
 
     def conv_adc_raw_to_nA(self, current_raw: int) -> float:
-        I_nA = self.cal.adc_C_A.raw_to_si(current_raw) * (10**9)
-        if self.cal.adc_C_A.offset < 0:
+        I_nA = self._adc_C_A.raw_to_si_scalar(current_raw) * (10**9)
+        if self._adc_C_A.offset < 0:
             if I_nA > self.negative_residue_nA:
                 I_nA -= self.negative_residue_nA
                 self.negative_residue_nA = 0
@@ -53,7 +56,7 @@ class PruCalibration:
         raise RuntimeError(msg)
 
     def conv_uV_to_dac_raw(self, voltage_uV: float) -> int:
-        dac_raw = self.cal.dac_V_A.si_to_raw(float(voltage_uV) / (10**6))
+        dac_raw = self._dac_V_A.si_to_raw_scalar(float(voltage_uV) / (10**6))
         return min(dac_raw, (2**16) - 1)
 
 
@@ -18,21 +18,36 @@ from shepherd_core.data_models.content.virtual_harvester import HarvesterPRUConf
 from shepherd_core.data_models.content.virtual_harvester import VirtualHarvesterConfig
 from shepherd_core.reader import Reader
 from shepherd_core.writer import Writer
+from shepherd_core.writer_queued import QueuedWriter
 
 from .virtual_harvester_model import VirtualHarvesterModel
 
 
 def simulate_harvester(
-    config: VirtualHarvesterConfig, path_input: Path, path_output: Optional[Path] = None
+    config: VirtualHarvesterConfig,
+    path_input: Path,
+    path_output: Optional[Path] = None,
+    *,
+    engine: str = "python",
 ) -> float:
     """Simulate behavior of virtual harvester algorithms.
 
     Fn return the harvested energy.
+    Engine "jit" runs a compiled kernel of the model (needs numba).
     """
+    if engine == "jit":
+        try:
+            from .virtual_source_jit import harvest_chunk  # noqa: PLC0415
+        except ImportError as xpt:
+            msg = "Engine 'jit' needs numba (pip install shepherd-core[jit])"
+            raise ImportError(msg) from xpt
+    elif engine != "python":
+        msg = f"Engine '{engine}' is unknown, choose 'python' or 'jit'"
+        raise ValueError(msg)
     stack = ExitStack()
     file_inp = Reader(path_input, verbose=False)
     stack.enter_context(file_inp)
-    cal_inp = file_inp.get_calibration_data()
+    cal_inp = file_inp.get_calibration_data().compile()
 
     if path_output:
         cal_hrv = CalibrationHarvester()
@@ -40,8 +55,10 @@ def simulate_harvester(
             path_output, cal_data=cal_hrv, mode="harvester", verbose=False, force_overwrite=True
         )
         stack.enter_context(file_out)
-        cal_out = file_out.get_calibration_data()
+        cal_out = file_out.get_calibration_data().compile()
         file_out.store_hostname("hrv_sim_" + config.name)
+        queue_out = stack.enter_context(QueuedWriter(file_out))
+        # ⤷ writing (compression & disk-io) happens in parallel to the simulation
 
     hrv_pru = HarvesterPRUConfig.from_vhrv(
         config,
@@ -56,18 +73,26 @@ def simulate_harvester(
     for _t, v_inp, i_inp in tqdm(
         file_inp.read(is_raw=True), total=file_inp.chunks_n, desc="Chunk", leave=False
     ):
-        v_uV = cal_inp.voltage.raw_to_si(v_inp) * 1e6
-        i_nA = cal_inp.current.raw_to_si(i_inp) * 1e9
-        length = min(v_uV.size, i_nA.size)
-        for _n in range(length):
-            v_uV[_n], i_nA[_n] = hrv.ivcurve_sample(
-                _voltage_uV=int(v_uV[_n]), _current_nA=int(i_nA[_n])
-            )
+        v_uV = cal_inp.voltage.raw_to_si_array(v_inp)
+        v_uV *= 1e6
+        i_nA = cal_inp.current.raw_to_si_array(i_inp)
+        i_nA *= 1e9
+        if engine == "jit":
+            v_uV, i_nA = harvest_chunk(hrv, hrv_pru, v_uV, i_nA)
+        else:
+            length = min(v_uV.size, i_nA.size)
+            for _n in range(length):
+                v_uV[_n], i_nA[_n] = hrv.ivcurve_sample(
+                    _voltage_uV=int(v_uV[_n]), _current_nA=int(i_nA[_n])
+                )
         e_out_Ws += (v_uV * i_nA).sum() * 1e-15 * file_inp.sample_interval_s
         if path_output:
-            v_out = cal_out.voltage.si_to_raw(v_uV / 1e6)
-            i_out = cal_out.current.si_to_raw(i_nA / 1e9)
-            file_out.append_iv_data_raw(_t, v_out, i_out)
+            # chunk is not needed anymore -> convert in place
+            v_uV /= 1e6
+            i_nA /= 1e9
+            v_out = cal_out.voltage.si_to_raw_array(v_uV, out=v_uV)
+            i_out = cal_out.current.si_to_raw_array(i_nA, out=i_nA)
+            queue_out.put(_t, v_out, i_out, is_raw=True)
 
     stack.close()
     return e_out_Ws
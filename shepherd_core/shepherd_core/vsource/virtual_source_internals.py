@@ -0,0 +1,201 @@
+"""Stream internal signals of the virtual source into the output file.
+
+Internals (see VirtualSourceModel.INTERNALS) get reduced to min & max per bucket
+while simulating, chunk by chunk, so memory stays constant regardless of the
+input length. The buckets are stored next to the iv-data and can be plotted later.
+"""
+
+import math
+from pathlib import Path
+from typing import Optional
+
+import h5py
+import numpy as np
+
+from .virtual_source_model import VirtualSourceModel
+
+INTERNALS_GROUP: str = "vsource_internals"
+INTERNALS_UNITS: dict[str, tuple[str, float]] = {
+    "uV": ("V", 1e-6),
+    "nA": ("mA", 1e-6),
+    "fW": ("mW", 1e-12),
+}
+# ⤷ suffix of internals -> unit & scale in the file (like the former plot)
+
+
+def internals_signals() -> list[tuple[str, str, float]]:
+    """Name, unit & scale of every internal signal in the file."""
+    signals = []
+    for name in VirtualSourceModel.INTERNALS:
+        base, _, suffix = name.rpartition("_")
+        if suffix in INTERNALS_UNITS:
+            signals.append((base, *INTERNALS_UNITS[suffix]))
+        else:
+            signals.append((name, "n", 1.0))
+    return signals
+
+
+class InternalsDecimator:
+    """Reduce the internals of process_chunk() to min & max per bucket of samples.
+
+    Chunks don't have to align with buckets, the remainder is carried over to the
+    next chunk and flush() returns the last (partial) bucket. Completed buckets are
+    held back until batch_n are available (fewer but larger appends to the file).
+
+    :param bucket_n: samples per bucket, 1 keeps full resolution (min == max)
+    :param batch_n: buckets to collect before push() returns them
+    """
+
+    def __init__(self, bucket_n: int = 100, batch_n: int = 1) -> None:
+        if bucket_n < 1:
+            msg = f"Bucket-size must be positive (got {bucket_n})"
+            raise ValueError(msg)
+        self.bucket_n: int = bucket_n
+        self.batch_n: int = batch_n
+        self.signals = internals_signals()
+        self._scale = np.array([_s[2] for _s in self.signals])
+        self._rest_time = np.empty((0,))
+        self._rest = np.empty((0, len(self.signals)))
+        self._pending: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._pending_n: int = 0
+
+    @property
+    def attrs(self) -> dict:
+        """Self-description for the group in the file."""
+        return {
+            "bucket_n": self.bucket_n,
+            "signals": [_s[0] for _s in self.signals],
+            "units": [_s[1] for _s in self.signals],
+            "description": "internals of the virtual source with min & max per bucket",
+        }
+
+    def push(self, time_s: np.ndarray, internals: np.ndarray) -> dict[str, np.ndarray]:
+        """Add a chunk and return completed buckets once a batch is full (may be empty).
+
+        :param time_s: timestamp of each sample
+        :param internals: array with a column per VirtualSourceModel.INTERNALS
+        :return: time [s] of bucket-start and {signal}_min / {signal}_max
+        """
+        length = min(time_s.size, internals.shape[0])
+        if self._rest_time.size > 0:
+            time_s = np.concatenate((self._rest_time, time_s[:length]))
+            internals = np.concatenate((self._rest, internals[:length]))
+            length = time_s.size
+        full_n = length - length % self.bucket_n
+        self._rest_time = time_s[full_n:length].copy()
+        self._rest = internals[full_n:length].copy()
+        self._reduce(time_s[:full_n], internals[:full_n], self.bucket_n)
+        return self._take(all_pending=self._pending_n >= self.batch_n)
+
+    def flush(self) -> dict[str, np.ndarray]:
+        """Return the pending buckets and remaining samples as a last (partial) bucket."""
+        self._reduce(self._rest_time, self._rest, max(self._rest_time.size, 1))
+        self._rest_time = self._rest_time[:0]
+        self._rest = self._rest[:0]
+        return self._take(all_pending=True)
+
+    def _reduce(self, time_s: np.ndarray, internals: np.ndarray, bucket_n: int) -> None:
+        buckets_n = time_s.size // bucket_n
+        if buckets_n < 1:
+            return
+        values = internals.reshape(buckets_n, bucket_n, len(self.signals))
+        v_min = values.min(axis=1) * self._scale
+        v_max = values.max(axis=1) * self._scale
+        # ⤷ scales are positive -> order is kept
+        self._pending.append((time_s[::bucket_n], v_min, v_max))
+        self._pending_n += buckets_n
+
+    def _take(self, *, all_pending: bool) -> dict[str, np.ndarray]:
+        pending = self._pending if all_pending else []
+        if all_pending:
+            self._pending, self._pending_n = [], 0
+        time_s = np.concatenate([np.empty((0,))] + [_p[0] for _p in pending])
+        v_min = np.concatenate([np.empty((0, len(self.signals)))] + [_p[1] for _p in pending])
+        v_max = np.concatenate([np.empty((0, len(self.signals)))] + [_p[2] for _p in pending])
+        data = {"time": time_s.astype(np.float64)}
+        for idx, (name, _, _) in enumerate(self.signals):
+            data[f"{name}_min"] = v_min[:, idx].astype(np.float32)
+            data[f"{name}_max"] = v_max[:, idx].astype(np.float32)
+        return data
+
+
+def read_internals(
+    path: Path, points_max: int = 100_000, block_n: int = 1_000_000
+) -> dict[str, np.ndarray]:
+    """Read the stored internals, buckets are merged to get at most points_max.
+
+    Reading happens in blocks, so memory stays bounded for long recordings.
+
+    :param path: hdf5-file written by simulate_source(monitor_internals=True)
+    :param points_max: limit of buckets to return, i.e. for plotting
+    :param block_n: buckets to read at once
+    :return: time [s] of bucket-start and {signal}_min / {signal}_max
+    """
+    with h5py.File(path, "r") as h5file:
+        if INTERNALS_GROUP not in h5file:
+            msg = f"File has no internals of a virtual source ({path.name})"
+            raise ValueError(msg)
+        grp = h5file[INTERNALS_GROUP]
+        size = grp["time"].shape[0]
+        factor = max(math.ceil(size / points_max), 1)
+        block_n = max(block_n // factor, 1) * factor
+        blocks: dict[str, list] = {key: [] for key in grp}
+        for idx in range(0, size, block_n):
+            for key, values in blocks.items():
+                block = grp[key][idx : idx + block_n]
+                if key == "time":
+                    values.append(block[::factor])
+                    continue
+                pad = -block.size % factor
+                fill = np.inf if key.endswith("_min") else -np.inf
+                block = np.pad(block, (0, pad), constant_values=fill).reshape(-1, factor)
+                values.append(block.min(axis=1) if key.endswith("_min") else block.max(axis=1))
+    return {key: np.concatenate(values) for key, values in blocks.items()}
+
+
+def plot_internals(
+    path: Path, path_plot: Optional[Path] = None, title: str = "", points_max: int = 10_000
+) -> Path:
+    """Plot the stored internals (min & max per bucket) to a png-file.
+
+    :param path: hdf5-file written by simulate_source(monitor_internals=True)
+    :param path_plot: optional, default is path with suffix .png
+    :param title: optional headline
+    :param points_max: limit of buckets per signal, see read_internals()
+    :return: path of the plot
+    """
+    # keep dependencies low
+    from matplotlib import pyplot as plt  # noqa: PLC0415
+
+    data = read_internals(path, points_max=points_max)
+    fig, axs = plt.subplots(4, 1, sharex="all", figsize=(20, 4 * 6), layout="tight")
+    fig.suptitle(title)
+    axs[0].set_ylabel("Voltages [V]")
+    axs[1].set_ylabel("Current [mA]")
+    axs[2].set_ylabel("Power [mW]")
+    axs[3].set_ylabel("PwrGood [n]")
+    axs[3].set_xlabel("Runtime [s]")
+    ax_of_unit = {"V": axs[0], "mA": axs[1], "mW": axs[2], "n": axs[3]}
+    for name, unit, _ in internals_signals():
+        ax = ax_of_unit[unit]
+        (line,) = ax.plot(data["time"], data[f"{name}_max"], label=name, drawstyle="steps-post")
+        ax.fill_between(
+            data["time"],
+            data[f"{name}_min"],
+            data[f"{name}_max"],
+            step="post",
+            color=line.get_color(),
+            alpha=0.4,
+        )
+    for ax in axs:
+        ax.legend(loc="upper right")
+        # deactivates offset-creation for ax-ticks
+        ax.get_yaxis().get_major_formatter().set_useOffset(False)
+        ax.get_xaxis().get_major_formatter().set_useOffset(False)
+
+    if path_plot is None:
+        path_plot = path.with_suffix(".png")
+    plt.savefig(path_plot)
+    plt.close(fig)
+    plt.clf()
+    return path_plot
@@ -0,0 +1,605 @@
+"""Optional JIT-compiled backend of the vsource-models (numba).
+
+The ported pru-models stay the reference and untouched. The kernels below
+mirror VirtualHarvesterModel, VirtualConverterModel, PruCalibration,
+VirtualSourceModel.iterate_sampling() and the targets line by line, but operate
+on flat vectors of float64 (exact for the integer-states of the models):
+
+- configs get generated from the fields of HarvesterPRUConfig & ConverterPRUConfig
+- states get copied from the attributes of the python-models before a chunk and
+  written back afterwards, so both engines can be mixed and cross-checked
+
+Needs the optional package numba (pip install shepherd-core[jit]).
+Kernels are compiled on first use (not cached, indices are generated at runtime),
+helpers get inlined into the two public kernels.
+"""
+
+import math
+from collections.abc import Iterable
+from enum import IntEnum
+from typing import Any
+
+import numpy as np
+from numba import njit
+
+from shepherd_core.data_models.content.virtual_harvester import HarvesterPRUConfig
+from shepherd_core.data_models.content.virtual_source import LUT_SIZE
+from shepherd_core.data_models.content.virtual_source import ConverterPRUConfig
+
+from .target_model import ConstantCurrentTarget
+from .target_model import ConstantPowerTarget
+from .target_model import DiodeTarget
+from .target_model import ResistiveTarget
+from .target_model import TargetABC
+from .virtual_converter_model import PruCalibration
+from .virtual_harvester_model import VirtualHarvesterModel
+
+HRV_STATES: tuple[str, ...] = (
+    "voltage_set_uV",
+    "is_emu",
+    "interval_step",
+    "is_rising",
+    "volt_step_uV",
+    "voltage_hold",
+    "current_hold",
+    "voltage_step_x4_uV",
+    "age_max",
+    "voltage_last",
+    "current_last",
+    "compare_last",
+    "lin_extrapolation",
+    "current_delta",
+    "voltage_delta",
+    "age_now",
+    "voc_now",
+    "age_nxt",
+    "voc_nxt",
+    "voc_min",
+    "power_last",
+    "power_now",
+    "voltage_now",
+    "current_now",
+    "power_nxt",
+    "voltage_nxt",
+    "current_nxt",
+)
+CNV_STATES: tuple[str, ...] = (
+    "R_input_kOhm",
+    "Constant_us_per_nF",
+    "V_input_uV",
+    "P_inp_fW",
+    "P_out_fW",
+    "interval_startup_disabled_drain_n",
+    "V_mid_uV",
+    "enable_storage",
+    "enable_boost",
+    "enable_buck",
+    "enable_log_mid",
+    "feedback_to_hrv",
+    "V_input_request_uV",
+    "V_out_dac_uV",
+    "V_out_dac_raw",
+    "power_good",
+    "dV_enable_output_uV",
+    "V_enable_output_threshold_uV",
+    "V_disable_output_threshold_uV",
+    "sample_count",
+    "is_outputting",
+    "vsource_skip_gpio_logging",
+)
+SRC_STATES: tuple[str, ...] = ("negative_residue_nA", "W_inp_fWs", "W_out_fWs", "I_out_nA")
+# ⤷ residue of PruCalibration & energy-counters of VirtualSourceModel
+
+LUT_FIELDS: tuple[str, ...] = ("LUT_inp_efficiency_n8", "LUT_out_inv_efficiency_n4")
+
+# indices into the vectors, resolved at compile-time
+HC = IntEnum("HC", [(_n, _i) for _i, _n in enumerate(HarvesterPRUConfig.model_fields)])
+CC = IntEnum(
+    "CC",
+    [
+        (_n, _i)
+        for _i, _n in enumerate(
+            _f for _f in ConverterPRUConfig.model_fields if _f not in LUT_FIELDS
+        )
+    ],
+)
+HS = IntEnum("HS", [(_n, _i) for _i, _n in enumerate(HRV_STATES)])
+CS = IntEnum("CS", [(_n, _i) for _i, _n in enumerate(CNV_STATES + SRC_STATES)])
+
+HRV_CV = VirtualHarvesterModel.HRV_CV
+HRV_MPPT_VOC = VirtualHarvesterModel.HRV_MPPT_VOC
+HRV_MPPT_PO = VirtualHarvesterModel.HRV_MPPT_PO
+HRV_MPPT_OPT = VirtualHarvesterModel.HRV_MPPT_OPT
+RESIDUE_MAX_nA = float(PruCalibration.RESIDUE_MAX_nA)
+
+TARGET_RESISTIVE = 0
+TARGET_CURRENT = 1
+TARGET_POWER = 2
+TARGET_DIODE = 3
+
+
+def config_vector(cfg: Any, fields: Iterable[str]) -> np.ndarray:
+    """Flatten the (integer) fields of a PRU-config."""
+    return np.array([getattr(cfg, _f) for _f in fields], dtype=np.float64)
+
+
+def states_to_vector(models: Iterable[tuple[Any, Iterable[str]]]) -> np.ndarray:
+    """Gather the attributes of models into one vector."""
+    return np.array([getattr(_m, _n) for _m, names in models for _n in names], dtype=np.float64)
+
+
+def vector_to_states(models: Iterable[tuple[Any, Iterable[str]]], vector: np.ndarray) -> None:
+    """Write the vector back to the attributes, keeps bool & int types of the models."""
+    values = iter(vector.tolist())
+    for model, names in models:
+        for name in names:
+            value = next(values)
+            current = getattr(model, name)
+            if isinstance(current, bool):
+                value = bool(value)
+            elif isinstance(current, int) and value.is_integer():
+                value = int(value)
+            setattr(model, name, value)
+
+
+def target_params(target: TargetABC) -> tuple[int, np.ndarray]:
+    """Translate the known targets to a kernel-selector & parameters."""
+    if type(target) is ResistiveTarget:
+        return TARGET_RESISTIVE, np.array([target.R_kOhm, target.ctrl], dtype=np.float64)
+    if type(target) is ConstantCurrentTarget:
+        return TARGET_CURRENT, np.array([target.I_active_nA, target.I_sleep_nA])
+    if type(target) is ConstantPowerTarget:
+        return TARGET_POWER, np.array([target.P_active_fW, target.P_sleep_fW])
+    if type(target) is DiodeTarget:
+        return TARGET_DIODE, np.array(
+            [target.c1, target.I_S, target.R_Ohm, target.ctrl], dtype=np.float64
+        )
+    msg = f"Target {type(target).__name__} has no jit-kernel, use engine='python'"
+    raise ValueError(msg)
+
+
+# ################################################################
+# harvester, see VirtualHarvesterModel
+
+
+@njit(inline="always")
+def _ivcurve_2_cv(hs: np.ndarray, V_uV: float, I_nA: float) -> tuple:
+    compare_now = V_uV < hs[HS.voltage_set_uV]
+    step_size_now = abs(V_uV - hs[HS.voltage_last])
+    distance_now = abs(V_uV - hs[HS.voltage_set_uV])
+    distance_last = abs(hs[HS.voltage_last] - hs[HS.voltage_set_uV])
+
+    if (compare_now != (hs[HS.compare_last] != 0)) and (step_size_now < hs[HS.voltage_step_x4_uV]):
+        if distance_now < distance_last and distance_now < hs[HS.voltage_step_x4_uV]:
+            hs[HS.voltage_hold] = V_uV
+            hs[HS.current_hold] = I_nA
+            hs[HS.current_delta] = I_nA - hs[HS.current_last]
+            hs[HS.voltage_delta] = V_uV - hs[HS.voltage_last]
+        elif distance_last < distance_now and distance_last < hs[HS.voltage_step_x4_uV]:
+            hs[HS.voltage_hold] = hs[HS.voltage_last]
+            hs[HS.current_hold] = hs[HS.current_last]
+            hs[HS.current_delta] = I_nA - hs[HS.current_last]
+            hs[HS.voltage_delta] = V_uV - hs[HS.voltage_last]
+    elif hs[HS.lin_extrapolation]:
+        if (hs[HS.voltage_hold] < hs[HS.voltage_set_uV]) == (hs[HS.voltage_delta] > 0):
+            hs[HS.voltage_hold] += hs[HS.voltage_delta]
+            hs[HS.current_hold] += hs[HS.current_delta]
+        else:
+            if hs[HS.voltage_hold] > hs[HS.voltage_delta]:
+                hs[HS.voltage_hold] -= hs[HS.voltage_delta]
+            else:
+                hs[HS.voltage_hold] = 0
+            if hs[HS.current_hold] > hs[HS.current_delta]:
+                hs[HS.current_hold] -= hs[HS.current_delta]
+            else:
+                hs[HS.current_hold] = 0
+
+    hs[HS.voltage_last] = V_uV
+    hs[HS.current_last] = I_nA
+    hs[HS.compare_last] = compare_now
+    return hs[HS.voltage_hold], hs[HS.current_hold]
+
+
+@njit(inline="always")
+def _ivcurve_2_mppt_voc(hc: np.ndarray, hs: np.ndarray, V_uV: float, I_nA: float) -> tuple:
+    hs[HS.interval_step] = hs[HS.interval_step] + 1
+    if hs[HS.interval_step] >= hc[HC.interval_n]:
+        hs[HS.interval_step] = 0
+    hs[HS.age_nxt] += 1
+    hs[HS.age_now] += 1
+
+    if (
+        (I_nA < hc[HC.current_limit_nA])
+        and (V_uV < hs[HS.voc_nxt])
+        and (V_uV >= hs[HS.voc_min])
+        and (V_uV <= hc[HC.voltage_max_uV])
+    ):
+        hs[HS.voc_nxt] = V_uV
+        hs[HS.age_nxt] = 0
+
+    if (hs[HS.age_now] > hs[HS.age_max]) or (hs[HS.voc_nxt] <= hs[HS.voc_now]):
+        hs[HS.age_now] = hs[HS.age_nxt]
+        hs[HS.voc_now] = hs[HS.voc_nxt]
+        hs[HS.age_nxt] = 0
+        hs[HS.voc_nxt] = hc[HC.voltage_max_uV]
+
+    V_uV, I_nA = _ivcurve_2_cv(hs, V_uV, I_nA)
+    if hs[HS.interval_step] < hc[HC.duration_n]:
+        hs[HS.voltage_set_uV] = hs[HS.voc_now]
+    elif hs[HS.interval_step] == hc[HC.duration_n]:
+        hs[HS.voltage_set_uV] = int(hs[HS.voc_now] * hc[HC.setpoint_n8] / 256)
+    return V_uV, I_nA
+
+
+@njit(inline="always")
+def _ivcurve_2_mppt_po(hc: np.ndarray, hs: np.ndarray, V_uV: float, I_nA: float) -> tuple:
+    hs[HS.interval_step] = hs[HS.interval_step] + 1
+    if hs[HS.interval_step] >= hc[HC.interval_n]:
+        hs[HS.interval_step] = 0
+
+    V_uV, I_nA = _ivcurve_2_cv(hs, V_uV, I_nA)
+
+    if hs[HS.interval_step] == 0:
+        power_now = V_uV * I_nA
+        if power_now > hs[HS.power_last]:
+            if hs[HS.is_rising]:
+                hs[HS.voltage_set_uV] += hs[HS.volt_step_uV]
+            else:
+                hs[HS.voltage_set_uV] -= hs[HS.volt_step_uV]
+            hs[HS.volt_step_uV] *= 2
+        elif (power_now <= 0) and (hs[HS.voltage_set_uV] > 0):
+            hs[HS.is_rising] = True
+            hs[HS.volt_step_uV] = hc[HC.voltage_step_uV]
+            hs[HS.voltage_set_uV] -= hs[HS.voltage_step_x4_uV]
+        else:
+            hs[HS.is_rising] = not hs[HS.is_rising]
+            hs[HS.volt_step_uV] = hc[HC.voltage_step_uV]
+            if hs[HS.is_rising]:
+                hs[HS.voltage_set_uV] += hs[HS.volt_step_uV]
+            else:
+                hs[HS.voltage_set_uV] -= hs[HS.volt_step_uV]
+
+        hs[HS.power_last] = power_now
+
+        if hs[HS.voltage_set_uV] >= hc[HC.voltage_max_uV]:
+            hs[HS.voltage_set_uV] = hc[HC.voltage_max_uV]
+            hs[HS.is_rising] = False
+            hs[HS.volt_step_uV] = hc[HC.voltage_step_uV]
+        if hs[HS.voltage_set_uV] <= hc[HC.voltage_min_uV]:
+            hs[HS.voltage_set_uV] = hc[HC.voltage_min_uV]
+            hs[HS.is_rising] = True
+            hs[HS.volt_step_uV] = hc[HC.voltage_step_uV]
+        if hs[HS.voltage_set_uV] <= hc[HC.voltage_step_uV]:
+            hs[HS.voltage_set_uV] = hc[HC.voltage_step_uV]
+            hs[HS.is_rising] = True
+            hs[HS.volt_step_uV] = hc[HC.voltage_step_uV]
+
+    return V_uV, I_nA
+
+
+@njit(inline="always")
+def _ivcurve_2_mppt_opt(hc: np.ndarray, hs: np.ndarray, V_uV: float, I_nA: float) -> tuple:
+    hs[HS.age_now] += 1
+    hs[HS.age_nxt] += 1
+
+    power_fW = V_uV * I_nA
+    if (
+        (power_fW >= hs[HS.power_nxt])
+        and (V_uV >= hc[HC.voltage_min_uV])
+        and (V_uV <= hc[HC.voltage_max_uV])
+    ):
+        hs[HS.age_nxt] = 0
+        hs[HS.power_nxt] = power_fW
+        hs[HS.voltage_nxt] = V_uV
+        hs[HS.current_nxt] = I_nA
+
+    if (hs[HS.age_now] > hs[HS.age_max]) or (hs[HS.power_nxt] >= hs[HS.power_now]):
+        hs[HS.age_now] = hs[HS.age_nxt]
+        hs[HS.power_now] = hs[HS.power_nxt]
+        hs[HS.voltage_now] = hs[HS.voltage_nxt]
+        hs[HS.current_now] = hs[HS.current_nxt]
+        hs[HS.age_nxt] = 0
+        hs[HS.power_nxt] = 0
+        hs[HS.voltage_nxt] = 0
+        hs[HS.current_nxt] = 0
+
+    return hs[HS.voltage_now], hs[HS.current_now]
+
+
+@njit(inline="always")
+def _ivcurve_sample(hc: np.ndarray, hs: np.ndarray, V_uV: float, I_nA: float) -> tuple:
+    if hc[HC.window_size] <= 1:
+        return V_uV, I_nA
+    if hc[HC.algorithm] >= HRV_MPPT_OPT:
+        return _ivcurve_2_mppt_opt(hc, hs, V_uV, I_nA)
+    if hc[HC.algorithm] >= HRV_MPPT_PO:
+        return _ivcurve_2_mppt_po(hc, hs, V_uV, I_nA)
+    if hc[HC.algorithm] >= HRV_MPPT_VOC:
+        return _ivcurve_2_mppt_voc(hc, hs, V_uV, I_nA)
+    if hc[HC.algorithm] >= HRV_CV:
+        return _ivcurve_2_cv(hs, V_uV, I_nA)
+    return V_uV, I_nA
+
+
+@njit
+def harvest_kernel(
+    V_uV: np.ndarray, I_nA: np.ndarray, hc: np.ndarray, hs: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Run the harvester for each sample, see VirtualHarvesterModel.ivcurve_sample()."""
+    V_out_uV = np.empty(V_uV.shape)
+    I_out_nA = np.empty(V_uV.shape)
+    for _n in range(V_uV.size):
+        V_out_uV[_n], I_out_nA[_n] = _ivcurve_sample(hc, hs, float(V_uV[_n]), float(I_nA[_n]))
+    return V_out_uV, I_out_nA
+
+
+def harvest_chunk(
+    hrv: VirtualHarvesterModel, cfg: HarvesterPRUConfig, V_uV: np.ndarray, I_nA: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Run harvest_kernel() with the states of hrv, inputs get truncated to integers."""
+    length = min(V_uV.size, I_nA.size)
+    hrv_states = states_to_vector([(hrv, HRV_STATES)])
+    results = harvest_kernel(
+        V_uV[:length].astype(np.int64),
+        I_nA[:length].astype(np.int64),
+        config_vector(cfg, HC.__members__),
+        hrv_states,
+    )
+    vector_to_states([(hrv, HRV_STATES)], hrv_states)
+    return results
+
+
+# ################################################################
+# converter, see VirtualConverterModel & PruCalibration
+
+
+@njit(inline="always")
+def _conv_adc_raw_to_nA(cs: np.ndarray, cal: np.ndarray, current_raw: float) -> float:
+    I_nA = (current_raw * cal[0] + cal[1]) * (10**9)
+    if cal[1] < 0:
+        if I_nA > cs[CS.negative_residue_nA]:
+            I_nA -= cs[CS.negative_residue_nA]
+            cs[CS.negative_residue_nA] = 0
+        else:
+            cs[CS.negative_residue_nA] = cs[CS.negative_residue_nA] - I_nA
+            cs[CS.negative_residue_nA] = min(cs[CS.negative_residue_nA], RESIDUE_MAX_nA)
+            I_nA = 0
+    return I_nA
+
+
+@njit(inline="always")
+def _conv_uV_to_dac_raw(cal: np.ndarray, voltage_uV: float) -> float:
+    dac_raw = round(max((voltage_uV / (10**6) - cal[3]) / cal[2], 0.0))
+    return min(dac_raw, (2**16) - 1)
+
+
+@njit(inline="always")
+def _get_input_efficiency(cc: np.ndarray, lut_inp: np.ndarray, V_uV: float, I_nA: float) -> float:
+    voltage_n = int(V_uV / (2 ** cc[CC.LUT_input_V_min_log2_uV]))
+    current_n = int(I_nA / (2 ** cc[CC.LUT_input_I_min_log2_nA]))
+    pos_v = int(voltage_n) if (voltage_n > 0) else 0
+    pos_c = int(math.log2(current_n)) if (current_n > 0) else 0
+    pos_v = min(pos_v, LUT_SIZE - 1)
+    pos_c = min(pos_c, LUT_SIZE - 1)
+    return lut_inp[pos_v, pos_c] / (2**8)
+
+
+@njit(inline="always")
+def _get_output_inv_efficiency(cc: np.ndarray, lut_out: np.ndarray, I_nA: float) -> float:
+    current_n = int(I_nA / (2 ** cc[CC.LUT_output_I_min_log2_nA]))
+    pos_c = int(math.log2(current_n)) if (current_n > 0) else 0
+    pos_c = min(pos_c, LUT_SIZE - 1)
+    return lut_out[pos_c] / (2**4)
+
+
+@njit(inline="always")
+def _calc_inp_power(
+    cc: np.ndarray, cs: np.ndarray, lut_inp: np.ndarray, V_uV: float, I_nA: float
+) -> float:
+    V_uV = max(0.0, V_uV)
+    I_nA = max(0.0, I_nA)
+
+    if V_uV > cc[CC.V_input_drop_uV]:
+        V_uV -= cc[CC.V_input_drop_uV]
+    else:
+        V_uV = 0.0
+    V_uV = min(V_uV, cc[CC.V_input_max_uV])
+    I_nA = min(I_nA, cc[CC.I_input_max_nA])
+    cs[CS.V_input_uV] = V_uV
+
+    if cs[CS.enable_boost]:
+        if V_uV < cc[CC.V_input_boost_threshold_uV]:
+            V_uV = 0.0
+    elif cs[CS.enable_storage]:
+        V_diff_uV = (V_uV - cs[CS.V_mid_uV]) if (V_uV >= cs[CS.V_mid_uV]) else 0
+        V_res_drop_uV = I_nA * cs[CS.R_input_kOhm]
+        if V_res_drop_uV > V_diff_uV:
+            V_uV = cs[CS.V_mid_uV]
+        else:
+            V_uV -= V_res_drop_uV
+        if cs[CS.feedback_to_hrv]:
+            cs[CS.V_input_request_uV] = cs[CS.V_mid_uV] + V_res_drop_uV + cc[CC.V_input_drop_uV]
+        elif V_uV < cs[CS.V_mid_uV]:
+            V_uV = 0
+    else:
+        cs[CS.V_mid_uV] = V_uV
+        V_uV = 0.0
+
+    eta_inp = _get_input_efficiency(cc, lut_inp, V_uV, I_nA) if cs[CS.enable_boost] else 1.0
+    cs[CS.P_inp_fW] = eta_inp * V_uV * I_nA
+    return round(cs[CS.P_inp_fW])
+
+
+@njit(inline="always")
+def _calc_out_power(
+    cc: np.ndarray, cs: np.ndarray, lut_out: np.ndarray, cal: np.ndarray, current_raw: float
+) -> float:
+    current_raw = max(0, current_raw)
+    current_raw = min((2**18) - 1, current_raw)
+
+    P_leak_fW = cs[CS.V_mid_uV] * cc[CC.I_intermediate_leak_nA]
+    I_out_nA = _conv_adc_raw_to_nA(cs, cal, current_raw)
+    eta_inv_out = _get_output_inv_efficiency(cc, lut_out, I_out_nA) if cs[CS.enable_buck] else 1.0
+    cs[CS.P_out_fW] = eta_inv_out * cs[CS.V_out_dac_uV] * I_out_nA + P_leak_fW
+
+    if cs[CS.interval_startup_disabled_drain_n] > 0:
+        cs[CS.interval_startup_disabled_drain_n] -= 1
+        cs[CS.P_out_fW] = 0.0
+    return round(cs[CS.P_out_fW])
+
+
+@njit(inline="always")
+def _update_cap_storage(cc: np.ndarray, cs: np.ndarray) -> float:
+    if cs[CS.enable_storage]:
+        V_mid_prot_uV = max(1.0, cs[CS.V_mid_uV])
+        P_sum_fW = cs[CS.P_inp_fW] - cs[CS.P_out_fW]
+        I_mid_nA = P_sum_fW / V_mid_prot_uV
+        dV_mid_uV = I_mid_nA * cs[CS.Constant_us_per_nF]
+        cs[CS.V_mid_uV] += dV_mid_uV
+
+    cs[CS.V_mid_uV] = min(cs[CS.V_mid_uV], cc[CC.V_intermediate_max_uV])
+    cs[CS.V_mid_uV] = max(cs[CS.V_mid_uV], 1)
+    return round(cs[CS.V_mid_uV])
+
+
+@njit(inline="always")
+def _update_states_and_output(cc: np.ndarray, cs: np.ndarray, cal: np.ndarray) -> float:
+    cs[CS.sample_count] += 1
+    check_thresholds = cs[CS.sample_count] >= cc[CC.interval_check_thresholds_n]
+    V_mid_uV_now = cs[CS.V_mid_uV]
+
+    if check_thresholds:
+        cs[CS.sample_count] = 0
+        if cs[CS.is_outputting]:
+            if V_mid_uV_now < cs[CS.V_disable_output_threshold_uV]:
+                cs[CS.is_outputting] = False
+        elif V_mid_uV_now >= cs[CS.V_enable_output_threshold_uV]:
+            cs[CS.is_outputting] = True
+            cs[CS.V_mid_uV] -= cs[CS.dV_enable_output_uV]
+
+    if check_thresholds or cc[CC.immediate_pwr_good_signal]:
+        if cs[CS.power_good]:
+            if V_mid_uV_now <= cc[CC.V_pwr_good_disable_threshold_uV]:
+                cs[CS.power_good] = False
+        elif V_mid_uV_now >= cc[CC.V_pwr_good_enable_threshold_uV]:
+            cs[CS.power_good] = cs[CS.is_outputting]
+
+    if cs[CS.is_outputting] or cs[CS.interval_startup_disabled_drain_n] > 0:
+        if (not cs[CS.enable_buck]) or (
+            cs[CS.V_mid_uV] <= cc[CC.V_output_uV] + cc[CC.V_buck_drop_uV]
+        ):
+            if cs[CS.V_mid_uV] > cc[CC.V_buck_drop_uV]:
+                cs[CS.V_out_dac_uV] = cs[CS.V_mid_uV] - cc[CC.V_buck_drop_uV]
+            else:
+                cs[CS.V_out_dac_uV] = 0.0
+        else:
+            cs[CS.V_out_dac_uV] = cc[CC.V_output_uV]
+        cs[CS.V_out_dac_raw] = _conv_uV_to_dac_raw(cal, cs[CS.V_out_dac_uV])
+    else:
+        cs[CS.V_out_dac_uV] = 0.0
+        cs[CS.V_out_dac_raw] = 0
+
+    cs[CS.vsource_skip_gpio_logging] = cs[CS.V_out_dac_uV] < cc[CC.V_output_log_gpio_threshold_uV]
+    return cs[CS.V_out_dac_raw]
+
+
+# ################################################################
+# source & targets, see VirtualSourceModel.iterate_sampling() & target_model
+
+
+@njit(inline="always")
+def _iterate_sampling(  # noqa: PLR0917
+    hc: np.ndarray,
+    hs: np.ndarray,
+    cc: np.ndarray,
+    cs: np.ndarray,
+    luts: tuple[np.ndarray, np.ndarray],
+    cal: np.ndarray,
+    V_inp_uV: float,
+    I_inp_nA: float,
+) -> float:
+    V_inp_uV, I_inp_nA = _ivcurve_sample(hc, hs, V_inp_uV, I_inp_nA)
+    P_inp_fW = _calc_inp_power(cc, cs, luts[0], V_inp_uV, I_inp_nA)
+    A_out_raw = round(max((cs[CS.I_out_nA] * 10**-9 - cal[1]) / cal[0], 0.0))
+    P_out_fW = _calc_out_power(cc, cs, luts[1], cal, A_out_raw)
+    V_mid_uV = _update_cap_storage(cc, cs)
+    V_out_raw = _update_states_and_output(cc, cs, cal)
+    V_out_uV = int((V_out_raw * cal[2] + cal[3]) * 10**6)
+
+    cs[CS.W_inp_fWs] += P_inp_fW
+    cs[CS.W_out_fWs] += P_out_fW
+
+    if cs[CS.feedback_to_hrv]:
+        hs[HS.voltage_set_uV] = cs[CS.V_input_request_uV]
+    return V_mid_uV if cs[CS.enable_log_mid] else V_out_uV
+
+
+@njit(inline="always")
+def _target_step(kind: int, params: np.ndarray, voltage_uV: float, pwr_good: float) -> float:
+    # ⤷ numba can't bind keyword-only arguments
+    if kind == TARGET_RESISTIVE:
+        if pwr_good or not params[1]:
+            return voltage_uV / params[0]
+        return 0.0
+    if kind == TARGET_CURRENT:
+        return params[0] if pwr_good else params[1]
+    if kind == TARGET_POWER:
+        return (params[0] if pwr_good else params[1]) / voltage_uV
+    # diode
+    c1, I_S, R_Ohm = params[0], params[1], params[2]
+    if pwr_good or not params[3]:
+        V_CC = voltage_uV * 1e-6
+        V_D = V_CC / 2
+        I_R = I_D = 0.0
+        for _ in range(10):
+            log_arg = 1 + (V_CC - V_D) / (R_Ohm * I_S)
+            if log_arg > 0:  # python raises ValueError otherwise
+                V_D = c1 * math.log(log_arg)
+            I_R = max(0.0, (V_CC - V_D) / R_Ohm)
+            I_D = max(0.0, I_S * math.expm1(V_D / c1))
+            if I_D != 0 and abs(I_R / I_D - 1) < 1e-6:
+                break
+            V_D = V_CC - R_Ohm * (I_R + I_D) / 2
+        return 1e9 * (I_R + I_D) / 2
+    return 0.0
+
+
+@njit
+def source_kernel(  # noqa: PLR0917
+    V_inp_uV: np.ndarray,
+    I_inp_nA: np.ndarray,
+    hc: np.ndarray,
+    hs: np.ndarray,
+    cc: np.ndarray,
+    cs: np.ndarray,
+    luts: tuple[np.ndarray, np.ndarray],
+    cal: np.ndarray,
+    target: tuple[int, np.ndarray],
+    stats: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Run source & target for each sample, see VirtualSourceModel.process_chunk().
+
+    Internals get written to stats, if it has a row per sample.
+    """
+    V_out_uV = np.empty(V_inp_uV.shape)
+    I_out_nA = np.empty(V_inp_uV.shape)
+    with_stats = stats.shape[0] >= V_inp_uV.size
+    for _n in range(V_inp_uV.size):
+        V_now_uV = _iterate_sampling(
+            hc, hs, cc, cs, luts, cal, float(V_inp_uV[_n]), float(I_inp_nA[_n])
+        )
+        cs[CS.I_out_nA] = _target_step(target[0], target[1], V_now_uV, cs[CS.power_good])
+        V_out_uV[_n] = V_now_uV
+        I_out_nA[_n] = cs[CS.I_out_nA]
+        if with_stats:
+            stats[_n, 0] = hs[HS.voltage_hold]
+            stats[_n, 1] = cs[CS.V_input_request_uV]
+            stats[_n, 2] = hs[HS.voltage_set_uV]
+            stats[_n, 3] = cs[CS.V_mid_uV]
+            stats[_n, 4] = hs[HS.current_hold]
+            stats[_n, 5] = hs[HS.current_delta]
+            stats[_n, 6] = cs[CS.I_out_nA]
+            stats[_n, 7] = cs[CS.P_inp_fW]
+            stats[_n, 8] = cs[CS.P_out_fW]
+            stats[_n, 9] = cs[CS.power_good]
+    return V_out_uV, I_out_nA
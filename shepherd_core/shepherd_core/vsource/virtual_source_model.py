@@ -7,17 +7,23 @@ Goals:
 - step 1 to a virtualization of emulation.
 
 NOTE: DO NOT OPTIMIZE -> stay close to original code-base
+      process_chunk() is a python-specific addition for simulations,
+      iterate_sampling() stays the reference
 
 """
 
 from typing import Optional
 
+import numpy as np
+
 from shepherd_core.data_models.base.calibration import CalibrationEmulator
+from shepherd_core.data_models.base.calibration import CalibrationPairCompiled
 from shepherd_core.data_models.content.energy_environment import EnergyDType
 from shepherd_core.data_models.content.virtual_harvester import HarvesterPRUConfig
 from shepherd_core.data_models.content.virtual_source import ConverterPRUConfig
 from shepherd_core.data_models.content.virtual_source import VirtualSourceConfig
 
+from .target_model import TargetABC
 from .virtual_converter_model import PruCalibration
 from .virtual_converter_model import VirtualConverterModel
 from .virtual_harvester_model import VirtualHarvesterModel
@@ -38,6 +44,8 @@ class VirtualSourceModel:
     ) -> None:
         self._cal_emu: CalibrationEmulator = cal_emu
         self._cal_pru: PruCalibration = PruCalibration(cal_emu)
+        self._adc_C_A: CalibrationPairCompiled = cal_emu.adc_C_A.compile()
+        self._dac_V_A: CalibrationPairCompiled = cal_emu.dac_V_A.compile()
 
         self.cfg_src = VirtualSourceConfig() if vsrc is None else vsrc
         cnv_config = ConverterPRUConfig.from_vsrc(
@@ -46,6 +54,7 @@ class VirtualSourceModel:
             log_intermediate_node=log_intermediate,
         )
         self.cnv: VirtualConverterModel = VirtualConverterModel(cnv_config, self._cal_pru)
+        self._cnv_cfg: ConverterPRUConfig = cnv_config
 
         hrv_config = HarvesterPRUConfig.from_vhrv(
             self.cfg_src.harvester,
@@ -56,9 +65,12 @@ class VirtualSourceModel:
         )
 
         self.hrv: VirtualHarvesterModel = VirtualHarvesterModel(hrv_config)
+        self._hrv_cfg: HarvesterPRUConfig = hrv_config
 
         self.W_inp_fWs: float = 0.0
         self.W_out_fWs: float = 0.0
+        # current drawn by the target in the last sample, see process_chunk()
+        self.I_out_nA: float = 0.0
 
     def iterate_sampling(self, V_inp_uV: int = 0, I_inp_nA: int = 0, I_out_nA: int = 0) -> int:
         """TEST-SIMPLIFICATION - code below is not part of pru-code.
@@ -75,12 +87,12 @@ class VirtualSourceModel:
         P_inp_fW = self.cnv.calc_inp_power(V_inp_uV, I_inp_nA)
 
         # fake ADC read
-        A_out_raw = self._cal_emu.adc_C_A.si_to_raw(I_out_nA * 10**-9)
+        A_out_raw = self._adc_C_A.si_to_raw_scalar(I_out_nA * 10**-9)
 
         P_out_fW = self.cnv.calc_out_power(A_out_raw)
         V_mid_uV = self.cnv.update_cap_storage()
         V_out_raw = self.cnv.update_states_and_output()
-        V_out_uV = int(self._cal_emu.dac_V_A.raw_to_si(V_out_raw) * 10**6)
+        V_out_uV = int(self._dac_V_A.raw_to_si_scalar(V_out_raw) * 10**6)
 
         self.W_inp_fWs += P_inp_fW
         self.W_out_fWs += P_out_fW
@@ -90,3 +102,268 @@ class VirtualSourceModel:
             self.hrv.voltage_set_uV = self.cnv.V_input_request_uV
 
         return V_mid_uV if self.cnv.get_state_log_intermediate() else V_out_uV
+
+    INTERNALS: tuple[str, ...] = (
+        "V_hold_uV",
+        "V_input_request_uV",
+        "V_set_uV",
+        "V_mid_uV",
+        "I_hold_nA",
+        "I_delta_nA",
+        "I_out_nA",
+        "P_inp_fW",
+        "P_out_fW",
+        "power_good",
+    )
+    # ⤷ columns of the internals returned by process_chunk()
+
+    def process_chunk(
+        self,
+        V_inp_uV: np.ndarray,
+        I_inp_nA: np.ndarray,
+        target: TargetABC,
+        *,
+        internals: bool = False,
+        engine: str = "python",
+    ) -> tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """Simulate a chunk of samples with a target attached - python-specific addition.
+
+        Equals calling iterate_sampling() & target.step() for every sample (bit-exact),
+        inputs get truncated to integers like int(). The current drawn by the target is
+        fed back with the next sample, also across chunks (I_out_nA).
+        Configurations without coupling between samples (passive harvester, no storage,
+        no boost or buck) get vectorized, others run in a loop around iterate_sampling().
+        Engine "jit" runs compiled kernels of the same models (needs numba),
+        see virtual_source_jit.
+
+        :param V_inp_uV: input voltage per sample
+        :param I_inp_nA: input current per sample
+        :param target: consumer of the output voltage
+        :param internals: additionally return internal states per sample, see INTERNALS
+        :param engine: "python" (reference) or "jit"
+        :return: output voltage [uV], current of target [nA] & optional internals
+        """
+        if engine not in {"python", "jit"}:
+            msg = f"Engine '{engine}' is unknown, choose 'python' or 'jit'"
+            raise ValueError(msg)
+        length = min(V_inp_uV.size, I_inp_nA.size)
+        V_inp_uV = V_inp_uV[:length].astype(np.int64)
+        I_inp_nA = I_inp_nA[:length].astype(np.int64)
+        if length < 1:
+            return np.zeros((0,)), np.zeros((0,)), np.zeros((0, len(self.INTERNALS)))
+        if engine == "jit":
+            return self._process_chunk_jit(V_inp_uV, I_inp_nA, target, internals=internals)
+        if self._is_vectorizable():
+            return self._process_chunk_vectorized(V_inp_uV, target, internals=internals)
+        return self._process_chunk_loop(V_inp_uV, I_inp_nA, target, internals=internals)
+
+    def _is_vectorizable(self) -> bool:
+        """Check that states only couple samples in ways that can be vectorized."""
+        cnv = self.cnv
+        return (
+            (
+                self._hrv_cfg.window_size <= 1
+                or self._hrv_cfg.algorithm < VirtualHarvesterModel.HRV_CV
+            )
+            and not (cnv.enable_storage or cnv.enable_boost or cnv.enable_buck)
+            and not cnv.feedback_to_hrv
+            and self._adc_C_A.offset >= 0  # no residue-compensation
+            # hysteresis is exclusive -> states follow the last event
+            and cnv.V_enable_output_threshold_uV >= cnv.V_disable_output_threshold_uV
+            and (
+                self._cnv_cfg.V_pwr_good_enable_threshold_uV
+                > self._cnv_cfg.V_pwr_good_disable_threshold_uV
+            )
+        )
+
+    def _process_chunk_loop(
+        self,
+        V_inp_uV: np.ndarray,
+        I_inp_nA: np.ndarray,
+        target: TargetABC,
+        *,
+        internals: bool,
+    ) -> tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        cnv = self.cnv
+        hrv = self.hrv
+        iterate_sampling = self.iterate_sampling
+        step = target.step
+        V_out_uV = np.empty((V_inp_uV.size,))
+        I_out_nA = np.empty((V_inp_uV.size,))
+        stats = np.empty((V_inp_uV.size, len(self.INTERNALS))) if internals else None
+        I_now_nA = self.I_out_nA
+        for _n, (V_in_uV, I_in_nA) in enumerate(zip(V_inp_uV.tolist(), I_inp_nA.tolist())):
+            V_now_uV = iterate_sampling(V_inp_uV=V_in_uV, I_inp_nA=I_in_nA, I_out_nA=I_now_nA)
+            I_now_nA = step(V_now_uV, pwr_good=cnv.power_good)
+            V_out_uV[_n] = V_now_uV
+            I_out_nA[_n] = I_now_nA
+            if stats is not None:
+                stats[_n] = (
+                    hrv.voltage_hold,
+                    cnv.V_input_request_uV,
+                    hrv.voltage_set_uV,
+                    cnv.V_mid_uV,
+                    hrv.current_hold,
+                    hrv.current_delta,
+                    I_now_nA,
+                    cnv.P_inp_fW,
+                    cnv.P_out_fW,
+                    cnv.power_good,
+                )
+        self.I_out_nA = I_now_nA
+        return V_out_uV, I_out_nA, stats
+
+    def _process_chunk_jit(
+        self,
+        V_inp_uV: np.ndarray,
+        I_inp_nA: np.ndarray,
+        target: TargetABC,
+        *,
+        internals: bool,
+    ) -> tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """Run the compiled kernels, states get synced with the python-models per chunk."""
+        try:
+            from . import virtual_source_jit as jit  # noqa: PLC0415
+        except ImportError as xpt:
+            msg = "Engine 'jit' needs numba (pip install shepherd-core[jit])"
+            raise ImportError(msg) from xpt
+        target_kernel = jit.target_params(target)
+        models = [
+            (self.cnv, jit.CNV_STATES),
+            (self._cal_pru, jit.SRC_STATES[:1]),
+            (self, jit.SRC_STATES[1:]),
+        ]
+        hrv_states = jit.states_to_vector([(self.hrv, jit.HRV_STATES)])
+        cnv_states = jit.states_to_vector(models)
+        cal = np.array(
+            [self._adc_C_A.gain, self._adc_C_A.offset, self._dac_V_A.gain, self._dac_V_A.offset]
+        )
+        stats = np.empty((V_inp_uV.size if internals else 0, len(self.INTERNALS)))
+        V_out_uV, I_out_nA = jit.source_kernel(
+            V_inp_uV,
+            I_inp_nA,
+            jit.config_vector(self._hrv_cfg, jit.HC.__members__),
+            hrv_states,
+            jit.config_vector(self._cnv_cfg, jit.CC.__members__),
+            cnv_states,
+            (
+                np.array(self._cnv_cfg.LUT_inp_efficiency_n8, dtype=np.float64),
+                np.array(self._cnv_cfg.LUT_out_inv_efficiency_n4, dtype=np.float64),
+            ),
+            cal,
+            target_kernel,
+            stats,
+        )
+        jit.vector_to_states([(self.hrv, jit.HRV_STATES)], hrv_states)
+        jit.vector_to_states(models, cnv_states)
+        return V_out_uV, I_out_nA, stats if internals else None
+
+    def _process_chunk_vectorized(
+        self, V_inp_uV: np.ndarray, target: TargetABC, *, internals: bool
+    ) -> tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """Process all samples at once with the same steps as iterate_sampling().
+
+        Without storage the intermediate voltage follows the input, so the
+        output only depends on the thresholds (set/reset-latches) and the
+        target-current only couples into the output power.
+        """
+        cnv = self.cnv
+        cfg = self._cnv_cfg
+        length = V_inp_uV.size
+        samples = np.arange(length)
+
+        # calc_inp_power(): input diode & limit, direct connection to V_mid
+        V_input_uV = np.maximum(V_inp_uV.astype(np.float64), 0.0)
+        V_input_uV = np.where(
+            V_input_uV > cfg.V_input_drop_uV, V_input_uV - cfg.V_input_drop_uV, 0.0
+        )
+        np.minimum(V_input_uV, cfg.V_input_max_uV, out=V_input_uV)
+        # limits of update_cap_storage()
+        V_mid_uV = np.maximum(np.minimum(V_input_uV, cfg.V_intermediate_max_uV), 1)
+
+        # update_states_and_output(): thresholds get checked every interval
+        check_step_n = max(cfg.interval_check_thresholds_n, 1)
+        check_first_n = max(cfg.interval_check_thresholds_n - cnv.sample_count - 1, 0)
+        check = (samples >= check_first_n) & ((samples - check_first_n) % check_step_n == 0)
+        is_outputting = _latch(
+            check & (V_mid_uV >= cnv.V_enable_output_threshold_uV),
+            check & (V_mid_uV < cnv.V_disable_output_threshold_uV),
+            state=cnv.is_outputting,
+        )
+        enabled = is_outputting & ~np.append(cnv.is_outputting, is_outputting[:-1])
+        V_mid_out_uV = np.where(enabled, V_mid_uV - cnv.dV_enable_output_uV, V_mid_uV)
+        check_pg = check | bool(cfg.immediate_pwr_good_signal)
+        power_good = _latch(
+            check_pg & (V_mid_uV >= cfg.V_pwr_good_enable_threshold_uV) & is_outputting,
+            check_pg & (V_mid_uV <= cfg.V_pwr_good_disable_threshold_uV),
+            state=cnv.power_good,
+        )
+        drain_n = cnv.interval_startup_disabled_drain_n
+        active = is_outputting | (drain_n - samples - 1 > 0)
+        V_out_dac_uV = np.where(
+            active & (V_mid_out_uV > cfg.V_buck_drop_uV), V_mid_out_uV - cfg.V_buck_drop_uV, 0.0
+        )
+        V_out_dac_raw = self._dac_V_A.si_to_raw_array(V_out_dac_uV / (10**6))
+        np.minimum(V_out_dac_raw, (2**16) - 1, out=V_out_dac_raw)
+        V_out_dac_raw[~active] = 0
+        if cnv.enable_log_mid:
+            V_out_uV = np.around(V_mid_uV)
+        else:
+            V_out_uV = np.trunc(self._dac_V_A.raw_to_si_array(V_out_dac_raw) * 10**6)
+
+        I_out_nA = target.step_chunk(V_out_uV, power_good)
+
+        # calc_out_power() with current of the previous sample (fake ADC read)
+        A_out_raw = self._adc_C_A.si_to_raw_array(np.append(self.I_out_nA, I_out_nA[:-1]) * 10**-9)
+        np.clip(A_out_raw, 0, (2**18) - 1, out=A_out_raw)
+        I_adc_nA = self._adc_C_A.raw_to_si_array(A_out_raw) * (10**9)
+        P_out_fW = np.append(cnv.V_out_dac_uV, V_out_dac_uV[:-1]) * I_adc_nA
+        P_out_fW += V_input_uV * cfg.I_intermediate_leak_nA
+        P_out_fW[samples < drain_n] = 0.0
+
+        # energy accumulates the rounded power sample by sample (cumsum is sequential)
+        self.W_out_fWs = float(np.cumsum(np.append(self.W_out_fWs, np.around(P_out_fW)))[-1])
+        self.I_out_nA = float(I_out_nA[-1])
+        checks = np.flatnonzero(check)
+        cnv.sample_count = (
+            int(length - 1 - checks[-1]) if checks.size > 0 else cnv.sample_count + length
+        )
+        cnv.interval_startup_disabled_drain_n = max(drain_n - length, 0)
+        cnv.V_input_uV = float(V_input_uV[-1])
+        cnv.V_mid_uV = float(V_mid_out_uV[-1])
+        cnv.P_inp_fW = 0.0
+        cnv.P_out_fW = float(P_out_fW[-1])
+        cnv.is_outputting = bool(is_outputting[-1])
+        cnv.power_good = bool(power_good[-1])
+        cnv.V_out_dac_uV = float(V_out_dac_uV[-1])
+        cnv.V_out_dac_raw = int(V_out_dac_raw[-1])
+        cnv.vsource_skip_gpio_logging = cnv.V_out_dac_uV < cfg.V_output_log_gpio_threshold_uV
+
+        stats = None
+        if internals:
+            hrv = self.hrv
+            stats = np.empty((length, len(self.INTERNALS)))
+            stats[:] = (
+                hrv.voltage_hold,
+                cnv.V_input_request_uV,
+                hrv.voltage_set_uV,
+                0.0,
+                hrv.current_hold,
+                hrv.current_delta,
+                0.0,
+                0.0,
+                0.0,
+                0.0,
+            )
+            stats[:, 3] = V_mid_out_uV
+            stats[:, 6] = I_out_nA
+            stats[:, 8] = P_out_fW
+            stats[:, 9] = power_good
+        return V_out_uV, I_out_nA, stats
+
+
+def _latch(set_n: np.ndarray, reset_n: np.ndarray, *, state: bool) -> np.ndarray:
+    """States of a set/reset-latch (exclusive events), starting with 'state'."""
+    events = np.where(set_n | reset_n, np.arange(set_n.size), -1)
+    np.maximum.accumulate(events, out=events)
+    return np.where(events >= 0, set_n[events], state)
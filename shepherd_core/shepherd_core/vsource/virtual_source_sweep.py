@@ -0,0 +1,273 @@
+"""Simulate many variants of a virtual source with the same harvest-recording.
+
+The input is read, decompressed and calibrated only once. Blocks of samples
+get shared with a pool of worker-processes via shared memory, every worker
+simulates its subset of variants block by block (double-buffered, memory
+stays constant regardless of the input length).
+"""
+
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+from collections.abc import Mapping
+from collections.abc import Sequence
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from threading import BrokenBarrierError
+from typing import Any
+from typing import Optional
+
+import numpy as np
+from tqdm import tqdm
+
+from shepherd_core.data_models.base.calibration import CalibrationEmulator
+from shepherd_core.data_models.content.virtual_source import VirtualSourceConfig
+from shepherd_core.reader import Reader
+
+from .target_model import TargetABC
+from .virtual_source_model import VirtualSourceModel
+
+
+def sweep_variants(
+    config: VirtualSourceConfig, grid: Mapping[str, Sequence[Any]]
+) -> list[tuple[dict[str, Any], VirtualSourceConfig]]:
+    """Derive a config for each combination of parameters in the grid (cartesian product).
+
+    Keys are fields of VirtualSourceConfig, i.e. {"C_intermediate_uF": [10, 47, 100]}.
+    Variants get validated like a new config.
+    """
+    unknown = set(grid) - set(VirtualSourceConfig.model_fields)
+    if unknown:
+        msg = f"Parameters {sorted(unknown)} are no fields of VirtualSourceConfig"
+        raise ValueError(msg)
+    base = config.model_dump()
+    variants = []
+    for values in itertools.product(*grid.values()):
+        params = dict(zip(grid.keys(), values))
+        variants.append((params, VirtualSourceConfig(**{**base, **params})))
+    return variants
+
+
+def _sweep_worker(
+    *,
+    shm_name: str,
+    block_samples_n: int,
+    sync: Any,
+    lengths: Any,
+    results: Any,
+    variants: list[tuple[int, VirtualSourceConfig]],
+    target: TargetABC,
+    model_kwargs: dict[str, Any],
+    engine: str,
+) -> None:
+    """Simulate variants block by block, synced with the reader by a barrier."""
+    shm = SharedMemory(name=shm_name)
+    try:
+        buffers = np.ndarray((2, 2, block_samples_n), dtype=np.float64, buffer=shm.buf)
+        srcs = [
+            VirtualSourceModel(config, CalibrationEmulator(), **model_kwargs)
+            for _, config in variants
+        ]
+        stats = np.zeros((len(variants), 3))  # sum of power [fW], pwr-good-samples, brownouts
+        pg_last = [src.cnv.get_power_good() for src in srcs]
+        pg_column = VirtualSourceModel.INTERNALS.index("power_good")
+        block = 0
+        while True:
+            sync.wait()
+            length = lengths[block % 2]
+            if length < 1:
+                break
+            V_inp_uV, I_inp_nA = buffers[block % 2, :, :length]
+            for idx, src in enumerate(srcs):
+                V_out_uV, I_out_nA, internals = src.process_chunk(
+                    V_inp_uV, I_inp_nA, target, internals=True, engine=engine
+                )
+                power_good = internals[:, pg_column] > 0
+                stats[idx, 0] += (V_out_uV * I_out_nA).sum()
+                stats[idx, 1] += np.count_nonzero(power_good)
+                stats[idx, 2] += np.count_nonzero(
+                    np.append(pg_last[idx], power_good[:-1]) & ~power_good
+                )
+                pg_last[idx] = bool(power_good[-1])
+            block += 1
+        results.put(
+            [
+                (index, src.W_inp_fWs, *stat)
+                for (index, _), src, stat in zip(variants, srcs, stats.tolist())
+            ]
+        )
+    except BrokenBarrierError:
+        pass  # ⤷ aborted by the reader or another worker
+    except BaseException as xpt:
+        sync.abort()  # ⤷ releases reader & other workers
+        results.put(xpt)
+        raise
+    finally:
+        shm.close()
+
+
+def _watch_workers(workers: list, sync: Any, done: threading.Event) -> None:
+    """Abort the barrier when a worker dies without reporting (i.e. OOM-killer, segfault)."""
+    while not done.wait(0.2):
+        if any(worker.exitcode not in {None, 0} for worker in workers):
+            sync.abort()  # ⤷ releases the reader & other workers
+            return
+
+
+def _worker_failure(workers: list, results: Any) -> tuple[str, Optional[BaseException]]:
+    """Describe a failed sweep by the exit-codes and exception of the workers."""
+    try:
+        result = results.get(timeout=2)
+        # ⤷ a worker that failed regularly reports its exception
+    except queue.Empty:
+        result = None
+    codes = [worker.exitcode for worker in workers if worker.exitcode not in {None, 0}]
+    cause = result if isinstance(result, BaseException) else None
+    return f"Worker of sweep failed (exit-codes {codes})", cause
+
+
+def simulate_source_sweep(
+    config: VirtualSourceConfig,
+    grid: Mapping[str, Sequence[Any]],
+    target: TargetABC,
+    path_input: Path,
+    *,
+    processes: Optional[int] = None,
+    engine: str = "python",
+    block_samples_n: int = 2**20,
+) -> list[dict[str, Any]]:
+    """Simulate all variants of a virtual source (parameter-sweep) in parallel.
+
+    Equals calling simulate_source() for every variant of sweep_variants(), but the
+    input gets only decoded once. Variants are distributed over the processes.
+
+    Args:
+    ----
+        config: base config of the virtual source
+        grid: fields of the config with values to sweep, see sweep_variants()
+        target: consumer of the output voltage (gets copied to each process)
+        path_input: hdf5-file with a harvest-recording
+        processes: number of worker-processes, default: one per cpu-core
+        engine: "python" or "jit", see VirtualSourceModel.process_chunk()
+        block_samples_n: samples shared with the workers at once
+
+    Returns:
+    -------
+        table with a row per variant - swept parameters, energy harvested into the
+        converter (e_inp_Ws), consumed by the target (e_out_Ws), time with power-good
+        signal (uptime_s) and number of falling edges of power-good (brownouts_n)
+
+    """
+    variants = sweep_variants(config, grid)
+    processes = min(processes or os.cpu_count() or 1, len(variants))
+    ctx = multiprocessing.get_context()
+    sync = ctx.Barrier(processes + 1)
+    lengths = ctx.Array("q", 2, lock=False)
+    results = ctx.Queue()
+    shm = SharedMemory(create=True, size=2 * 2 * block_samples_n * 8)
+    workers: list = []
+    rows: dict[int, tuple] = {}
+    done = threading.Event()
+    watchdog = threading.Thread(
+        target=_watch_workers, args=(workers, sync, done), name="SHPCore.Sweep.watch", daemon=True
+    )
+    try:
+        buffers = np.ndarray((2, 2, block_samples_n), dtype=np.float64, buffer=shm.buf)
+        with Reader(path_input, verbose=False) as file_inp:
+            cal_inp = file_inp.get_calibration_data().compile()
+            sample_interval_s = file_inp.sample_interval_s
+            model_kwargs = {
+                "dtype_in": file_inp.get_datatype(),
+                "window_size": file_inp.get_window_samples(),
+                "voltage_step_V": file_inp.get_voltage_step(),
+                "log_intermediate": False,
+            }
+            indexed = list(enumerate(_config for _, _config in variants))
+            for idx in range(processes):
+                worker = ctx.Process(
+                    target=_sweep_worker,
+                    kwargs={
+                        "shm_name": shm.name,
+                        "block_samples_n": block_samples_n,
+                        "sync": sync,
+                        "lengths": lengths,
+                        "results": results,
+                        "variants": indexed[idx::processes],
+                        "target": target,
+                        "model_kwargs": model_kwargs,
+                        "engine": engine,
+                    },
+                    daemon=True,
+                )
+                worker.start()
+                workers.append(worker)
+            watchdog.start()
+
+            block = 0
+            fill = 0
+            for _, v_inp, i_inp in tqdm(
+                file_inp.read(is_raw=True), total=file_inp.chunks_n, desc="Sweep", leave=False
+            ):
+                length = min(v_inp.size, i_inp.size)
+                pos = 0
+                while pos < length:
+                    size = min(length - pos, block_samples_n - fill)
+                    v_uV, i_nA = buffers[block % 2, :, fill : fill + size]
+                    cal_inp.voltage.raw_to_si_array(v_inp[pos : pos + size], out=v_uV)
+                    v_uV *= 1e6
+                    cal_inp.current.raw_to_si_array(i_inp[pos : pos + size], out=i_nA)
+                    i_nA *= 1e9
+                    pos += size
+                    fill += size
+                    if fill == block_samples_n:
+                        lengths[block % 2] = fill
+                        sync.wait()  # ⤷ workers are done with the other buffer
+                        block, fill = block + 1, 0
+            if fill > 0:
+                lengths[block % 2] = fill
+                sync.wait()
+                block += 1
+            lengths[block % 2] = 0
+            sync.wait()
+
+        pending_n = processes
+        while pending_n > 0:
+            try:
+                result = results.get(timeout=0.2)
+            except queue.Empty:
+                if any(worker.exitcode not in {None, 0} for worker in workers):
+                    msg, cause = _worker_failure(workers, results)
+                    raise RuntimeError(msg) from cause
+                continue
+            if isinstance(result, BaseException):
+                raise RuntimeError("Worker of sweep failed") from result  # noqa: TRY004
+            rows.update({row[0]: row[1:] for row in result})
+            pending_n -= 1
+    except BrokenBarrierError as xpt:
+        msg, cause = _worker_failure(workers, results)
+        raise RuntimeError(msg) from (cause or xpt)
+    finally:
+        done.set()
+        sync.abort()
+        for worker in workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+        shm.close()
+        shm.unlink()
+
+    table = []
+    for idx, (params, _) in enumerate(variants):
+        W_inp_fWs, P_out_sum_fW, pg_samples_n, brownouts_n = rows[idx]
+        table.append(
+            {
+                **params,
+                "e_inp_Ws": W_inp_fWs * 1e-15 * sample_interval_s,
+                "e_out_Ws": P_out_sum_fW * 1e-15 * sample_interval_s,
+                "uptime_s": pg_samples_n * sample_interval_s,
+                "brownouts_n": int(brownouts_n),
+            }
+        )
+    return table
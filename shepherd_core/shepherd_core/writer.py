@@ -3,8 +3,15 @@
 import logging
 import math
 import pathlib
+import zlib
+from collections import deque
+from collections.abc import Callable
 from collections.abc import Mapping
+from collections.abc import Sequence
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from functools import partial
 from itertools import product
 from pathlib import Path
 from types import TracebackType
@@ -16,11 +23,18 @@ import h5py
 import numpy as np
 import yaml
 from pydantic import validate_call
+from tqdm import trange
 from typing_extensions import Self
 from yaml import Node
 from yaml import SafeDumper
 
 from .config import config
+from .data_index import INDEX_GROUP
+from .data_index import PYRAMID_FACTORS
+from .data_index import PYRAMID_GROUP
+from .data_index import DataIndex
+from .data_index import iv_fingerprint
+from .data_index import pyramid_levels_from_iv
 from .data_models.base.calibration import CalibrationEmulator as CalEmu
 from .data_models.base.calibration import CalibrationHarvester as CalHrv
 from .data_models.base.calibration import CalibrationSeries as CalSeries
@@ -28,6 +42,10 @@ from .data_models.content.energy_environment import EnergyDType
 from .data_models.task import Compression
 from .data_models.task.emulation import c_translate
 from .reader import Reader
+from .reader import load_filter_plugins
+from .time_segments import TIME_SEGMENTS
+from .time_segments import TimeSegments
+from .time_segments import time_dataset
 
 
 # copy of core/models/base/shepherd - needed also here
@@ -49,6 +67,66 @@ yaml.add_representer(pathlib.Path, path2str, SafeDumper)
 yaml.add_representer(timedelta, time2int, SafeDumper)
 
 
+def dataset_filters(compression: Optional[Compression]) -> dict[str, Any]:
+    """Translate the compression-option to arguments for h5py.create_dataset().
+
+    zstd & blosc2 are HDF5-plugins and need the optional package hdf5plugin,
+    files written with them also need it for reading.
+    """
+    value = compression.value if compression is not None else None
+    if value in c_translate:
+        return {"compression": c_translate[value]}
+    if value == Compression.lzf_shuffle.value:
+        return {"compression": "lzf", "shuffle": True}
+    if value == Compression.gzip1_shuffle.value:
+        return {"compression": 1, "shuffle": True}
+    try:
+        import hdf5plugin  # noqa: PLC0415
+    except ImportError as xpt:
+        msg = f"Compression '{value}' needs hdf5plugin (pip install shepherd-core[compression])"
+        raise ImportError(msg) from xpt
+    if value == Compression.zstd.value:
+        return dict(hdf5plugin.Zstd(clevel=1))
+    if value == Compression.blosc2.value:
+        return dict(hdf5plugin.Blosc2(cname="zstd", clevel=1, filters=hdf5plugin.Blosc2.SHUFFLE))
+    msg = f"Compression '{value}' is not supported"
+    raise ValueError(msg)
+
+
+def _shuffle(chunk: bytes, itemsize: int) -> bytes:
+    """Byte-shuffle like the HDF5-filter (all first bytes of elements, then second, ...)."""
+    return np.frombuffer(chunk, dtype="u1").reshape((-1, itemsize)).T.tobytes()
+
+
+def _pipeline(chunk: bytes, steps: tuple[Callable[[bytes], bytes], ...]) -> bytes:
+    for step in steps:
+        chunk = step(chunk)
+    return chunk
+
+
+def chunk_compressor(dataset: h5py.Dataset) -> Optional[Callable[[bytes], bytes]]:
+    """Reproduce the filter-pipeline of a dataset for writing pre-compressed chunks.
+
+    Only the pipelines without filter or with shuffle and / or deflate (gzip)
+    are supported, returns None for others (i.e. lzf has no python-binding here).
+    """
+    plist = dataset.id.get_create_plist()
+    steps: list[Callable[[bytes], bytes]] = []
+    for _i in range(plist.get_nfilters()):
+        filter_id, _, values, _ = plist.get_filter(_i)
+        if filter_id == h5py.h5z.FILTER_SHUFFLE:
+            steps.append(partial(_shuffle, itemsize=dataset.dtype.itemsize))
+        elif filter_id == h5py.h5z.FILTER_DEFLATE:
+            steps.append(partial(zlib.compress, level=values[0]))
+        else:
+            return None
+    if len(steps) == 0:
+        return bytes
+    if len(steps) == 1:
+        return steps[0]
+    return partial(_pipeline, steps=tuple(steps))
+
+
 def unique_path(base_path: Union[str, Path], suffix: str) -> Path:
     """Find an unused filename in case it already exists.
 
@@ -73,6 +151,11 @@ class Writer(Reader):
      - gzip: good compression, moderate speed, select level from 1-9, default is 4
              -> lower levels seem fine
              -> _algo=number instead of "gzip" is read as compression level for gzip
+             -> chunks can be compressed by a pool of threads (compression_threads)
+     - *_shuffle: byte-shuffle ahead of lzf / gzip1 groups similar bytes of the
+             samples (i.e. the constant upper bytes) -> better ratio at low cost
+     - zstd / blosc2: modern codecs via the optional package hdf5plugin
+             -> also needed for reading these files
      -> comparison / benchmarks https://www.h5py.org/lzf/
 
     Args:
@@ -86,7 +169,18 @@ class Writer(Reader):
             units later.
         modify_existing: (bool) explicitly enable modifying existing file
             otherwise a unique name will be found
-        compression: (str) use either None, lzf or "1" (gzips compression level)
+        compression: (Compression) None, lzf, "1" (gzips compression level),
+            lzf_shuffle, gzip1_shuffle, zstd or blosc2
+        expected_samples: (int) hint for the final size, capacity gets allocated
+            ahead (otherwise it doubles when needed) and is trimmed on exit
+        compression_threads: (int) compress complete chunks concurrently
+            with a pool of threads (only for gzip), 1 compresses inline
+        time_segments: (bool) store timestamps implicitly as segments with
+            (start, interval, length) instead of per sample, for isochronous data
+        swmr: (bool) create file in a format that allows live-reading
+            while writing, see start_swmr()
+        align: (bool) discard samples of an incomplete last chunk on exit,
+            disable to keep existing iv-data untouched (i.e. when only indexing)
         verbose: (bool) provides more debug-info
 
     """
@@ -108,13 +202,31 @@ class Writer(Reader):
         *,
         modify_existing: bool = False,
         force_overwrite: bool = False,
+        expected_samples: Optional[int] = None,
+        compression_threads: int = 1,
+        time_segments: bool = False,
+        swmr: bool = False,
+        align: bool = True,
         verbose: bool = True,
     ) -> None:
         self._modify = modify_existing
-        if compression is not None:
-            self._compression = c_translate[compression.value]
-        else:
-            self._compression = None
+        self._align_on_exit = align
+        self._libver: Optional[str] = "latest" if swmr else None
+        # ⤷ SWMR needs the newer file-format (readable with HDF5 >= 1.10)
+        self._time_segments = time_segments
+        self._expected_n: int = expected_samples or 0
+        self._capacity_n: Optional[int] = None
+        # ⤷ allocated size of datasets while appending, logical size is .samples_n
+        self._stage_tail: tuple[np.ndarray, ...] = ()
+        # ⤷ appended samples of an incomplete chunk, not yet written to file
+        self._compressors: Optional[list] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        if compression_threads > 1:
+            self._pool = ThreadPoolExecutor(compression_threads, "ShpWriterCompression")
+        self._pending: deque[tuple[h5py.Dataset, int, Future]] = deque()
+        self._pending_max: int = 12 * compression_threads
+        # ⤷ chunks in compression, get written in order
+        self._ds_filters: dict[str, Any] = dataset_filters(compression)
 
         if not hasattr(self, "_logger"):
             self._logger: logging.Logger = logging.getLogger("SHPCore.Writer")
@@ -138,14 +250,26 @@ class Writer(Reader):
 
         # open file
         if self._modify:
-            self.h5file = h5py.File(file_path, "r+")  # = rw
+            self.h5file = h5py.File(file_path, "r+", libver=self._libver)  # = rw
+            load_filter_plugins(self.h5file)
         else:
             if not file_path.parent.exists():
                 file_path.parent.mkdir(parents=True)
-            self.h5file = h5py.File(file_path, "w")
+            self.h5file = h5py.File(file_path, "w", libver=self._libver)
             # ⤷ write, truncate if exist
             self._create_skeleton()
 
+        # per-chunk statistics get tracked while appending to empty datasets
+        samples_n = self.h5file["data"]["voltage"].shape[0] if "data" in self.h5file else 0
+        self._index_live: Optional[DataIndex] = (
+            DataIndex(self.CHUNK_SAMPLES_N) if samples_n == 0 else None
+        )
+        self._index_tail: tuple[np.ndarray, ...] = ()
+        for group in [INDEX_GROUP, PYRAMID_GROUP]:
+            if (samples_n > 0) and (group in self.h5file):
+                # ⤷ existing data can be modified in place -> would be outdated
+                del self.h5file[group]
+
         # Handle Mode
         if isinstance(mode, str) and mode not in self.MODE_TO_DTYPE:
             msg = f"Can't handle mode '{mode}' (choose one of {self.MODE_TO_DTYPE})"
@@ -188,15 +312,18 @@ class Writer(Reader):
         if isinstance(cal_data, (CalEmu, CalHrv)):
             cal_data = CalSeries.from_cal(cal_data)
 
+        grp_data = self.h5file["data"]
+        attrs = {ds: grp_data[ds].attrs for ds in ["current", "voltage"]}
+        attrs["time"] = time_dataset(grp_data).attrs
         if isinstance(cal_data, CalSeries):
             for ds, param in product(["current", "voltage", "time"], ["gain", "offset"]):
-                self.h5file["data"][ds].attrs[param] = cal_data[ds][param]
+                attrs[ds][param] = cal_data[ds][param]
         else:
             # check if there are unset cal-values and set them to default
             cal_data = CalSeries()
             for ds, param in product(["current", "voltage", "time"], ["gain", "offset"]):
-                if param not in self.h5file["data"][ds].attrs:
-                    self.h5file["data"][ds].attrs[param] = cal_data[ds][param]
+                if param not in attrs[ds]:
+                    attrs[ds][param] = cal_data[ds][param]
 
         # show key parameters for h5-performance
         settings = list(self.h5file.id.get_access_plist().get_cache())
@@ -215,7 +342,15 @@ class Writer(Reader):
         tb: Optional[TracebackType] = None,
         extra_arg: int = 0,
     ) -> None:
-        self._align()
+        if self.h5file.swmr_mode:
+            self._stop_swmr()
+        if self._pool is not None:
+            self._pool.shutdown()
+        if not self.h5file:
+            return  # closed while leaving SWMR-mode
+        if self._align_on_exit:
+            self._align()
+        self._store_index()
         self._refresh_file_stats()
         self._logger.info(
             "closing hdf5 file, %.1f s iv-data, size = %.3f MiB, rate = %.0f KiB/s",
@@ -226,6 +361,54 @@ class Writer(Reader):
         self.is_valid()
         self.h5file.close()
 
+    def start_swmr(self) -> None:
+        """Switch to SWMR-mode (single writer, multiple readers) to allow live-reading.
+
+        Readers open the file with Reader(swmr=True) and receive new data with
+        refresh() or follow(). Complete chunks become visible after every append.
+        Needs Writer(swmr=True). Objects & attributes can't be created in this mode,
+        so store metadata (config, hostname, ...) before switching.
+        """
+        if self._libver is None:
+            raise ValueError("SWMR needs a file opened with Writer(swmr=True)")
+        if self.h5file.swmr_mode:
+            return
+        self._stage_flush()
+        self._trim()
+        self.h5file.swmr_mode = True
+        self._logger.debug("Switched to SWMR-mode, readers can follow '%s'", self.file_path.name)
+
+    def _swmr_flush(self) -> None:
+        """Make appended chunks visible to SWMR-readers."""
+        self._commit_chunks()
+        datasets = list(self._stored_datasets())
+        if isinstance(self.ds_time, TimeSegments):
+            self.ds_time.flush()
+            datasets.insert(0, self.ds_time.dataset)
+            # ⤷ timestamps first, readers take the minimum size of the datasets
+        for dataset in datasets:
+            dataset.flush()
+
+    def _stop_swmr(self) -> None:
+        """Reopen file without SWMR-mode, to be able to store the index.
+
+        Readers that are still attached lock the file, then it just gets closed
+        (the index is not stored, readers rebuild it when needed).
+        """
+        self._align()
+        self.h5file.close()
+        try:
+            self.h5file = h5py.File(self.file_path, "r+", libver=self._libver)
+        except OSError:
+            self._logger.warning(
+                "Readers are still attached -> closed '%s' without storing the index",
+                self.file_path.name,
+            )
+            return
+        self.ds_time = time_dataset(self.h5file["data"])
+        self.ds_voltage = self.h5file["data"]["voltage"]
+        self.ds_current = self.h5file["data"]["current"]
+
     def _create_skeleton(self) -> None:
         """Initialize the structure of the HDF5 file.
 
@@ -244,16 +427,32 @@ class Writer(Reader):
         # -> emulator uses virtual-harvester, field will be adjusted by .embed_config()
         grp_data.attrs["window_samples"] = 0
 
-        grp_data.create_dataset(
-            "time",
-            (0,),
-            dtype="u8",
-            maxshape=(None,),
-            chunks=self._CHUNK_SHAPE,
-            compression=self._compression,
-        )
-        grp_data["time"].attrs["unit"] = "s"
-        grp_data["time"].attrs["description"] = "system time [s] = value * gain + (offset)"
+        if self._time_segments:
+            # timestamps are implicit, see TimeSegments
+            grp_data.create_dataset(
+                TIME_SEGMENTS,
+                (0, 3),
+                dtype="u8",
+                maxshape=(None, 3),
+                chunks=(1024, 3),
+                **self._ds_filters,
+            )
+            grp_data[TIME_SEGMENTS].attrs["unit"] = "s"
+            grp_data[TIME_SEGMENTS].attrs["description"] = (
+                "system time [s] = value * gain + (offset) "
+                "(stored as isochronous segments with start, interval & length)"
+            )
+        else:
+            grp_data.create_dataset(
+                "time",
+                (0,),
+                dtype="u8",
+                maxshape=(None,),
+                chunks=self._CHUNK_SHAPE,
+                **self._ds_filters,
+            )
+            grp_data["time"].attrs["unit"] = "s"
+            grp_data["time"].attrs["description"] = "system time [s] = value * gain + (offset)"
 
         grp_data.create_dataset(
             "current",
@@ -261,7 +460,7 @@ class Writer(Reader):
             dtype="u4",
             maxshape=(None,),
             chunks=self._CHUNK_SHAPE,
-            compression=self._compression,
+            **self._ds_filters,
         )
         grp_data["current"].attrs["unit"] = "A"
         grp_data["current"].attrs["description"] = "current [A] = value * gain + offset"
@@ -272,7 +471,7 @@ class Writer(Reader):
             dtype="u4",
             maxshape=(None,),
             chunks=self._CHUNK_SHAPE,
-            compression=self._compression,
+            **self._ds_filters,
         )
         grp_data["voltage"].attrs["unit"] = "V"
         grp_data["voltage"].attrs["description"] = "voltage [V] = value * gain + offset"
@@ -293,28 +492,172 @@ class Writer(Reader):
 
         """
         len_new = min(voltage.size, current.size)
+        interval_ns = self.sample_interval_ns
+        if isinstance(self.ds_time, TimeSegments) and self.ds_time.interval_ns is not None:
+            interval_ns = self.ds_time.interval_ns
+            # ⤷ exact, sample_interval is estimated from runtime (off for data with gaps)
 
         if isinstance(timestamp, float):
             timestamp = int(timestamp)
         if isinstance(timestamp, int):
-            time_series_ns = self.sample_interval_ns * np.arange(len_new).astype("u8")
+            time_series_ns = interval_ns * np.arange(len_new).astype("u8")
             timestamp = timestamp + time_series_ns
         if isinstance(timestamp, np.ndarray):
             len_new = min(len_new, timestamp.size)
         else:
             raise TypeError("timestamp-data was not usable")
 
-        len_old = self.ds_voltage.shape[0]
+        if self._capacity_n is None or self.ds_voltage.shape[0] != self._capacity_n:
+            # ⤷ first append or datasets were resized from outside
+            self.samples_n = self._capacity_n = self.ds_voltage.shape[0]
+        len_old = self.samples_n
 
-        # resize dataset
-        self.ds_time.resize((len_old + len_new,))
-        self.ds_voltage.resize((len_old + len_new,))
-        self.ds_current.resize((len_old + len_new,))
+        data = (
+            np.asarray(timestamp[:len_new]).astype(self.ds_time.dtype),
+            np.asarray(voltage[:len_new]).astype(self.ds_voltage.dtype),
+            np.asarray(current[:len_new]).astype(self.ds_current.dtype),
+        )
+        if isinstance(self.ds_time, TimeSegments):
+            self.ds_time.append(data[0], interval_ns)
+            self._stage_append(len_old, *data[1:])
+        else:
+            self._stage_append(len_old, *data)
+        self.samples_n = len_old + len_new
+        self._index_append(len_old, *data)
+        if self.h5file.swmr_mode:
+            self._swmr_flush()
+
+    def _reserve(self, size_n: int) -> None:
+        """Grow the datasets to hold at least size_n samples.
+
+        Capacity grows geometrically, to avoid touching the metadata of the datasets
+        for every append. In SWMR-mode readers see the size of the datasets,
+        so it only grows to the samples that get written.
+        """
+        if size_n <= self._capacity_n:
+            return
+        if not self.h5file.swmr_mode:
+            size_n = max(size_n, 2 * self._capacity_n, self._expected_n)
+            size_n = math.ceil(size_n / self.CHUNK_SAMPLES_N) * self.CHUNK_SAMPLES_N
+        for dataset in self._stored_datasets():
+            dataset.resize((size_n,))
+        self._capacity_n = size_n
+
+    def _stored_datasets(self) -> tuple[h5py.Dataset, ...]:
+        """Datasets with a stored value per sample (implicit timestamps are not)."""
+        if isinstance(self.ds_time, TimeSegments):
+            return self.ds_voltage, self.ds_current
+        return self.ds_time, self.ds_voltage, self.ds_current
+
+    def _stage_append(self, position: int, *data: np.ndarray) -> None:
+        """Write appended raw data to file in complete chunks.
+
+        Samples of an incomplete chunk are kept in memory until the chunk is full,
+        so chunks never get decompressed & recompressed for partial updates.
+        Complete chunks are compressed here and written directly (bypassing
+        filter-pipeline and chunk-cache), if the pipeline is supported.
+        """
+        datasets = self._stored_datasets()
+        if self._stage_tail:
+            position -= self._stage_tail[0].shape[0]
+            data = tuple(np.concatenate((tail, new)) for tail, new in zip(self._stage_tail, data))
+        # head till next chunk-boundary (only after unaligned start)
+        head_n = min((-position) % self.CHUNK_SAMPLES_N, data[0].shape[0])
+        if head_n > 0:
+            self._reserve(position + head_n)
+            for dataset, values in zip(datasets, data):
+                dataset[position : position + head_n] = values[:head_n]
+            position += head_n
+            data = tuple(values[head_n:] for values in data)
+        full_n = (data[0].shape[0] // self.CHUNK_SAMPLES_N) * self.CHUNK_SAMPLES_N
+        self._stage_tail = tuple(values[full_n:] for values in data)
+        if full_n == 0:
+            return
+        self._reserve(position + full_n)
+        if self._compressors is None:
+            self._compressors = [
+                chunk_compressor(dataset) if dataset.chunks == self._CHUNK_SHAPE else None
+                for dataset in datasets
+            ]
+        for dataset, compressor, values in zip(datasets, self._compressors, data):
+            if compressor is None:
+                dataset[position : position + full_n] = values[:full_n]
+                continue
+            for idx in range(0, full_n, self.CHUNK_SAMPLES_N):
+                chunk = values[idx : idx + self.CHUNK_SAMPLES_N].tobytes()
+                if self._pool is None:
+                    dataset.id.write_direct_chunk((position + idx,), compressor(chunk))
+                else:
+                    future = self._pool.submit(compressor, chunk)
+                    self._pending.append((dataset, position + idx, future))
+        if self._pool is not None:
+            self._commit_chunks(limit=self._pending_max)
+
+    def _commit_chunks(self, limit: int = 0) -> None:
+        """Write compressed chunks of the pool in order.
+
+        Finished chunks are written, the oldest are waited for while more
+        than 'limit' are pending (bounds memory).
+        """
+        while self._pending and (len(self._pending) > limit or self._pending[0][2].done()):
+            dataset, position, future = self._pending.popleft()
+            dataset.id.write_direct_chunk((position,), future.result())
+
+    def _stage_flush(self) -> None:
+        """Write incomplete chunk that is kept in memory (and segments of timestamps)."""
+        self._commit_chunks()
+        if isinstance(self.ds_time, TimeSegments):
+            self.ds_time.flush()
+        if not self._stage_tail:
+            return
+        position = self.samples_n - self._stage_tail[0].shape[0]
+        self._reserve(self.samples_n)
+        for dataset, values in zip(self._stored_datasets(), self._stage_tail):
+            dataset[position : self.samples_n] = values
+        self._stage_tail = ()
+
+    def _index_append(
+        self, position: int, time: np.ndarray, voltage: np.ndarray, current: np.ndarray
+    ) -> None:
+        """Update the per-chunk statistics with freshly appended raw data.
+
+        Samples of an incomplete chunk are kept in memory until the chunk is full.
+        """
+        if self._index_live is None:
+            return
+        tail_n = self._index_tail[0].shape[0] if self._index_tail else 0
+        if position != self._index_live.samples_n + tail_n:
+            self._logger.debug("Data was written around the index -> index is disabled")
+            self._index_live = None
+            return
+        if self._index_tail:
+            time, voltage, current = (
+                np.concatenate((tail, new))
+                for tail, new in zip(self._index_tail, (time, voltage, current))
+            )
+        full_n = (time.shape[0] // self.CHUNK_SAMPLES_N) * self.CHUNK_SAMPLES_N
+        self._index_live.extend(
+            DataIndex.from_iv(
+                time[:full_n], voltage[:full_n], current[:full_n], self.CHUNK_SAMPLES_N
+            )
+        )
+        self._index_tail = (time[full_n:], voltage[full_n:], current[full_n:])
 
-        # append new data
-        self.ds_time[len_old : len_old + len_new] = timestamp[:len_new]
-        self.ds_voltage[len_old : len_old + len_new] = voltage[:len_new]
-        self.ds_current[len_old : len_old + len_new] = current[:len_new]
+    def _store_index(self) -> None:
+        """Write the per-chunk statistics to file (called on exit, after aligning).
+
+        An index that does not cover the data is not stored (the Reader can rebuild it).
+        """
+        if "data" not in self.h5file:
+            return
+        self._refresh_file_stats()  # ⤷ flush staged data, needed for fingerprint
+        samples_n = self.ds_time.shape[0]
+        index = self._index_live
+        if (index is not None) and self._index_tail and (samples_n > index.samples_n):
+            # alignment was skipped -> add partial chunk
+            index.extend(DataIndex.from_iv(*self._index_tail, self.CHUNK_SAMPLES_N))
+        if (index is not None) and (index.samples_n == samples_n) and (samples_n > 0):
+            index.to_h5(self.h5file)
 
     def append_iv_data_si(
         self,
@@ -337,11 +680,23 @@ class Writer(Reader):
 
         """
         # TODO: make timestamp optional to add it raw, OR unify append with granular raw-switch
-        timestamp = self._cal.time.si_to_raw(timestamp)
-        voltage = self._cal.voltage.si_to_raw(voltage)
-        current = self._cal.current.si_to_raw(current)
+        timestamp = self._cal_fast.time.si_to_raw(timestamp)
+        voltage = self._cal_fast.voltage.si_to_raw(voltage)
+        current = self._cal_fast.current.si_to_raw(current)
         self.append_iv_data_raw(timestamp, voltage, current)
 
+    def _trim(self) -> None:
+        """Shrink datasets from allocated capacity to the appended samples."""
+        if self._capacity_n is not None and self.ds_voltage.shape[0] == self._capacity_n:
+            for dataset in self._stored_datasets():
+                dataset.resize((self.samples_n,))
+        self._capacity_n = None
+
+    def _refresh_file_stats(self) -> None:
+        self._stage_flush()
+        self._trim()
+        super()._refresh_file_stats()
+
     def _align(self) -> None:
         """Align datasets with chunk-size of shepherd."""
         self._refresh_file_stats()
@@ -359,6 +714,98 @@ class Writer(Reader):
             self.ds_voltage.resize((size_new,))
             self.ds_current.resize((size_new,))
 
+    def build_index(self) -> None:
+        """(Re)build the per-chunk statistics from the stored iv-data.
+
+        Useful for files that were modified or written without the index.
+        The index gets stored on exit and stays up to date for further appends.
+        """
+        self._refresh_file_stats()
+        samples_n = self.ds_time.shape[0]
+        full_n = (samples_n // self.CHUNK_SAMPLES_N) * self.CHUNK_SAMPLES_N
+        self._index_live = DataIndex.from_datasets(
+            self.ds_time,
+            self.ds_voltage,
+            self.ds_current,
+            full_n,
+            chunk_samples_n=self.CHUNK_SAMPLES_N,
+            block_samples_n=self.max_elements,
+        )
+        self._index_tail = (
+            self.ds_time[full_n:samples_n],
+            self.ds_voltage[full_n:samples_n],
+            self.ds_current[full_n:samples_n],
+        )
+
+    def build_pyramid(self, factors: Sequence[int] = PYRAMID_FACTORS) -> None:
+        """Store decimated levels of the iv-data (min, max & mean per bucket) for plotting.
+
+        Call this after appending all data, the Reader ignores a pyramid that
+        does not cover the whole data. Values are stored in SI-units (float32),
+        except the raw timestamp of each bucket-start.
+
+        :param factors: samples per bucket for each level, ascending multiples of each other
+        """
+        self._refresh_file_stats()
+        if PYRAMID_GROUP in self.h5file:
+            del self.h5file[PYRAMID_GROUP]
+        grp_pyramid = self.h5file.create_group(PYRAMID_GROUP)
+        grp_pyramid.attrs["samples_n"] = self.samples_n
+        grp_pyramid.attrs["description"] = "decimated iv-data with min, max & mean per bucket"
+        grp_pyramid.attrs["fingerprint"] = iv_fingerprint(
+            self.h5file["data"], self.samples_n, self.CHUNK_SAMPLES_N
+        )
+        block_n = max(self.max_elements // factors[-1], 1) * factors[-1]
+        iterations = math.ceil(self.samples_n / block_n)
+        for idx in trange(
+            0,
+            self.samples_n,
+            block_n,
+            desc="pyramid",
+            leave=False,
+            disable=iterations < 8,
+        ):
+            idx_end = min(idx + block_n, self.samples_n)
+            levels = pyramid_levels_from_iv(
+                self.ds_time[idx:idx_end],
+                self._cal_fast.voltage.raw_to_si_array(self.ds_voltage[idx:idx_end]),
+                self._cal_fast.current.raw_to_si_array(self.ds_current[idx:idx_end]),
+                factors,
+            )
+            for factor, level in levels.items():
+                self.append_group(f"{PYRAMID_GROUP}/x{factor}", level, attrs={"factor": factor})
+
+    def append_group(
+        self,
+        name: str,
+        data: Mapping[str, np.ndarray],
+        attrs: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        """Append 1D-arrays to resizable datasets of a group, i.e. for derived signals.
+
+        Group & datasets get created on first use (with the filters of the data-group).
+
+        :param name: path of the group, i.e. "vsource_internals"
+        :param data: values per dataset-name, dtype is kept
+        :param attrs: optional attributes for the group
+        """
+        grp = self.h5file.require_group(name)
+        for key, value in (attrs or {}).items():
+            grp.attrs[key] = value
+        for key, values in data.items():
+            if key not in grp:
+                grp.create_dataset(
+                    key,
+                    (0,),
+                    dtype=values.dtype,
+                    maxshape=(None,),
+                    chunks=True,
+                    **self._ds_filters,
+                )
+            len_old = grp[key].shape[0]
+            grp[key].resize((len_old + values.shape[0],))
+            grp[key][len_old:] = values
+
     def __setitem__(self, key: str, item: Any) -> None:
         """Conveniently store relevant key-value data (attribute) in H5-structure."""
         self.h5file.attrs.__setitem__(key, item)
@@ -0,0 +1,161 @@
+"""Front-end of the Writer that decouples producers from the HDF5-work."""
+
+import asyncio
+import logging
+import queue
+import threading
+from collections.abc import Callable
+from collections.abc import Mapping
+from types import TracebackType
+from typing import Any
+from typing import Optional
+from typing import Union
+
+import numpy as np
+from typing_extensions import Self
+
+from .writer import Writer
+
+
+class QueuedWriter:
+    """Hand over iv-data to a dedicated I/O-thread that appends it to a Writer.
+
+    Derived signals can share the thread via put_group().
+
+    Producers (i.e. sampling, simulations or generators) only enqueue their chunks,
+    calibration, resizing, compression & disk-latency happen on the I/O-thread.
+    The queue is bounded, so producers get blocked when the disk can't keep up
+    (backpressure). Exceptions of the I/O-thread get re-raised in put() / append()
+    and latest on exit, which also waits until all chunks are written.
+
+    The arrays are not copied, so they must not be modified after handing them over.
+    The Writer should not be used directly while the queue is active.
+
+    Args:
+    ----
+        writer: (Writer) opened writer that receives the data
+        queue_size: (int) chunks that can be pending before producers get blocked
+
+    """
+
+    def __init__(self, writer: Writer, queue_size: int = 16) -> None:
+        self.writer: Writer = writer
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+        self._logger: logging.Logger = logging.getLogger("SHPCore.Writer.queue")
+
+    def __enter__(self) -> Self:
+        self._thread = threading.Thread(
+            target=self._consume, name="SHPCore.Writer.queue", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        typ: Optional[type[BaseException]] = None,
+        exc: Optional[BaseException] = None,
+        tb: Optional[TracebackType] = None,
+        extra_arg: int = 0,
+    ) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if (self._error is None) or (exc is self._error):
+            return
+        if exc is None:
+            raise self._error
+        self._logger.error("I/O-thread failed as well: %s", self._error)
+
+    def _consume(self) -> None:
+        """Append queued chunks until the end-marker arrives.
+
+        After an exception the remaining chunks are discarded,
+        so blocked producers get released.
+        """
+        while (item := self._queue.get()) is not None:
+            try:
+                if self._error is None:
+                    method, args = item
+                    method(*args)
+            except Exception as xcp:  # noqa: BLE001, PERF203
+                self._error = xcp  # ⤷ forwarded to producer
+            finally:
+                self._queue.task_done()
+        self._queue.task_done()
+
+    def _item_iv(
+        self,
+        timestamp: Union[np.ndarray, float, int],  # noqa: PYI041
+        voltage: np.ndarray,
+        current: np.ndarray,
+        *,
+        is_raw: bool,
+    ) -> tuple[Callable[..., None], tuple[Any, ...]]:
+        """Pair the chunk with the append-method of the writer."""
+        if is_raw:
+            return self.writer.append_iv_data_raw, (timestamp, voltage, current)
+        return self.writer.append_iv_data_si, (timestamp, voltage, current)
+
+    def _check(self) -> None:
+        if self._thread is None:
+            raise RuntimeError("QueuedWriter has to be entered first (with-statement)")
+        if self._error is not None:
+            raise self._error
+
+    def put(
+        self,
+        timestamp: Union[np.ndarray, float, int],  # noqa: PYI041
+        voltage: np.ndarray,
+        current: np.ndarray,
+        *,
+        is_raw: bool = False,
+    ) -> None:
+        """Enqueue a chunk (thread-safe), blocks while the queue is full.
+
+        :param timestamp: start of chunk (1 timestamp) or whole ndarray
+        :param voltage: ndarray in V (or raw unsigned integers)
+        :param current: ndarray in A (or raw unsigned integers)
+        :param is_raw: data is raw (see Writer.append_iv_data_raw()), otherwise SI-units
+        """
+        self._check()
+        self._queue.put(self._item_iv(timestamp, voltage, current, is_raw=is_raw))
+
+    def put_group(
+        self,
+        name: str,
+        data: Mapping[str, np.ndarray],
+        attrs: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        """Enqueue values for datasets of a group (thread-safe), see Writer.append_group().
+
+        :param name: path of the group in the file
+        :param data: 1D-arrays per dataset-name
+        :param attrs: optional attributes for the group
+        """
+        self._check()
+        self._queue.put((self.writer.append_group, (name, data, attrs)))
+
+    async def append(
+        self,
+        timestamp: Union[np.ndarray, float, int],  # noqa: PYI041
+        voltage: np.ndarray,
+        current: np.ndarray,
+        *,
+        is_raw: bool = False,
+    ) -> None:
+        """Enqueue a chunk like put(), but waits for space without blocking the event-loop."""
+        self._check()
+        item = self._item_iv(timestamp, voltage, current, is_raw=is_raw)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            await asyncio.to_thread(self._queue.put, item)
+
+    def flush(self) -> None:
+        """Block until all enqueued chunks are appended."""
+        self._check()
+        self._queue.join()
+        self._check()
@@ -41,6 +41,48 @@ def test_base_model_cal_pair_conv2() -> None:
     assert val_raw.size == val_rbw.size
 
 
+def test_base_model_cal_pair_compiled() -> None:
+    cal = CalibrationPair(gain=3e-9, offset=-2e-6)
+    cal_fast = cal.compile()
+    rng = np.random.default_rng(5)
+    val_raw = rng.integers(low=0, high=2**18, size=1000).astype("u4")
+    val_si = cal.raw_to_si(val_raw)
+    assert np.array_equal(cal_fast.raw_to_si_array(val_raw), val_si)
+    assert np.array_equal(cal_fast.raw_to_si(val_raw), val_si)
+    assert np.array_equal(
+        cal_fast.raw_to_si_array(val_raw, allow_negative=False),
+        cal.raw_to_si(val_raw, allow_negative=False),
+    )
+    assert np.array_equal(cal_fast.si_to_raw_array(val_si), cal.si_to_raw(val_si))
+    for value in [0, 1, 500, 2**18 - 1]:
+        assert cal_fast.raw_to_si_scalar(value) == cal.raw_to_si(value)
+        assert cal_fast.raw_to_si(value) == cal.raw_to_si(value)
+        assert cal_fast.raw_to_si_scalar(value, allow_negative=False) == cal.raw_to_si(
+            value, allow_negative=False
+        )
+        assert cal_fast.si_to_raw_scalar(cal.raw_to_si(value)) == value
+        assert cal_fast.si_to_raw(cal.raw_to_si(value)) == cal.si_to_raw(cal.raw_to_si(value))
+
+
+def test_base_model_cal_pair_compiled_out() -> None:
+    cal_fast = CalibrationPair(gain=44, offset=-10).compile()
+    buffer = np.arange(100, dtype="f8")
+    values_si = cal_fast.raw_to_si_array(buffer, out=buffer)
+    assert values_si is buffer
+    assert buffer[2] == 2 * 44 - 10
+    values_raw = cal_fast.si_to_raw_array(buffer, out=buffer)
+    assert values_raw is buffer
+    assert np.array_equal(buffer, np.arange(100))
+
+
+def test_base_model_cal_series_compiled() -> None:
+    cal = CalibrationSeries.from_cal(CalibrationEmulator())
+    cal_fast = cal.compile()
+    for name in ["voltage", "current", "time"]:
+        assert getattr(cal_fast, name).gain == cal[name].gain
+        assert getattr(cal_fast, name).offset == cal[name].offset
+
+
 def test_base_model_cal_series_min() -> None:
     CalibrationSeries()
 
@@ -0,0 +1,242 @@
+from pathlib import Path
+
+import h5py
+import numpy as np
+import pytest
+
+from shepherd_core import Reader
+from shepherd_core import Writer
+from shepherd_core.data_index import INDEX_GROUP
+from shepherd_core.data_index import PYRAMID_GROUP
+from shepherd_core.data_index import DataIndex
+from shepherd_core.data_index import iv_fingerprint
+from shepherd_core.data_index import pyramid_levels_from_iv
+from shepherd_core.data_index import power_from_sums
+from shepherd_core.data_index import raw_iv_sums
+from shepherd_core.data_models import CalibrationPair
+from shepherd_core.data_models import CalibrationSeries
+
+
+def generate_random_file(h5_path: Path, sizes: list[int], interval_factor: int = 1) -> Path:
+    rng = np.random.default_rng(3)
+    with Writer(h5_path) as sfw:
+        sfw.store_hostname("artificial")
+        interval_ns = interval_factor * sfw.sample_interval_ns
+        position = 0
+        for size in sizes:
+            time_nd = 10**18 + interval_ns * np.arange(position, position + size, dtype="u8")
+            voltage = rng.integers(0, 2**18, size)
+            current = rng.integers(0, 2**18, size)
+            sfw.append_iv_data_raw(time_nd, voltage, current)
+            position += size
+    return h5_path
+
+
+@pytest.fixture
+def random_h5(tmp_path: Path) -> Path:
+    return generate_random_file(tmp_path / "random.h5", [12_345, 3, 30_000, 21_000])
+
+
+def test_data_index_written_by_writer(random_h5: Path) -> None:
+    with Reader(random_h5) as sfr:
+        assert INDEX_GROUP in sfr.h5file
+        index = DataIndex.from_h5(sfr.h5file)
+        assert index is not None
+        assert index.chunks_n == sfr.chunks_n == 6
+        assert index.matches(sfr.ds_time, sfr.samples_n, sfr.CHUNK_SAMPLES_N)
+        rebuild = DataIndex.from_datasets(
+            sfr.ds_time,
+            sfr.ds_voltage,
+            sfr.ds_current,
+            sfr.samples_n,
+            chunk_samples_n=sfr.CHUNK_SAMPLES_N,
+            block_samples_n=25_000,
+        )
+        for key, values in index.data.items():
+            assert np.allclose(values, rebuild.data[key], rtol=1e-12), key
+
+
+def test_data_index_matches_brute_force(random_h5: Path) -> None:
+    with Reader(random_h5) as sfr:
+        cal = sfr.get_calibration_data()
+        voltage = cal.voltage.raw_to_si(sfr.ds_voltage[:])
+        current = cal.current.raw_to_si(sfr.ds_current[:])
+        energy = (voltage * current).sum() * sfr.sample_interval_s
+        assert sfr.energy() == pytest.approx(energy, rel=1e-9)
+        metadata = sfr.get_metadata()
+        assert INDEX_GROUP not in metadata
+        stats = metadata["data"]["voltage"]["_dataset_info"]["statistics"]
+        assert stats["mean"] == pytest.approx(voltage.mean(), rel=1e-9)
+        assert stats["std"] == pytest.approx(voltage.std(), rel=1e-9)
+        assert stats["min"] == pytest.approx(voltage.min())
+        assert stats["max"] == pytest.approx(voltage.max())
+        time_diffs = metadata["data"]["time"]["_dataset_info"]["time_diffs_s"]
+        assert time_diffs == [round(sfr.sample_interval_s, 6)]
+
+
+@pytest.mark.parametrize("bits", [18, 32])  # 32 bit needs split products
+def test_data_index_raw_sums_exact(bits: int) -> None:
+    rng = np.random.default_rng(8)
+    voltage = rng.integers(0, 2**bits, 25_000, dtype="u8").astype("u4")
+    current = rng.integers(0, 2**bits, 25_000, dtype="u8").astype("u4")
+    sums = raw_iv_sums(voltage, current, 10_000)
+    for idx, start in enumerate(range(0, 25_000, 10_000)):
+        v_int = [int(_v) for _v in voltage[start : start + 10_000]]
+        c_int = [int(_c) for _c in current[start : start + 10_000]]
+        assert sums["samples_n"][idx] == len(v_int)
+        assert int(sums["voltage_sum"][idx]) == sum(v_int)
+        assert int(sums["current_sum"][idx]) == sum(c_int)
+        power_sum = sum(_v * _c for _v, _c in zip(v_int, c_int))
+        assert sums["power_sum"][idx] == pytest.approx(power_sum, rel=2**-52)
+    floats = raw_iv_sums(voltage.astype("f8"), current.astype("f8"), 10_000)
+    assert np.allclose(floats["power_sum"], sums["power_sum"], rtol=1e-12)
+    with pytest.raises(ValueError):  # noqa: PT011
+        raw_iv_sums(voltage, current, 2**17, values_max=(2**32 - 1, 2**32 - 1))
+
+
+def test_data_index_raw_sums_foreign() -> None:
+    rng = np.random.default_rng(4)
+    voltage = rng.uniform(0, 3, 25_000)
+    current = rng.uniform(-2, 2, 25_000)  # ⤷ fractions & negative values
+    cal = CalibrationSeries(
+        voltage=CalibrationPair(gain=1e-3, offset=0.1),
+        current=CalibrationPair(gain=1e-6, offset=-2e-6),
+    )
+    power = power_from_sums(raw_iv_sums(voltage, current, 10_000), cal)
+    power_ref = [
+        np.sum((voltage[_s : _s + 10_000] * 1e-3 + 0.1) * (current[_s : _s + 10_000] * 1e-6 - 2e-6))
+        for _s in range(0, 25_000, 10_000)
+    ]
+    assert np.allclose(power, power_ref, rtol=1e-9)
+    sums = raw_iv_sums(voltage.astype("i8"), current.astype("i8"), 10_000)
+    assert sums["current_sum"].dtype == np.float64
+    assert abs(sums["current_sum"]).max() < 25_000
+
+
+def test_data_index_power_windows(random_h5: Path) -> None:
+    with Reader(random_h5) as sfr:
+        cal = sfr.get_calibration_data()
+        power = cal.voltage.raw_to_si(sfr.ds_voltage[:]) * cal.current.raw_to_si(sfr.ds_current[:])
+        time_s = cal.time.raw_to_si(sfr.ds_time[:])
+        assert sfr.power_mean() == pytest.approx(power.mean(), rel=1e-9)
+        sfr.max_elements = 17_000  # several blocks
+        for window_n in [20_000, 7_000, 1]:
+            # ⤷ served from index, from raw data, from raw data with tiny windows
+            times, means = sfr.power_windows(window_n)
+            starts = np.arange(0, power.shape[0], window_n)
+            assert np.array_equal(times, time_s[starts])
+            counts = np.diff(np.append(starts, power.shape[0]))
+            assert np.allclose(means, np.add.reduceat(power, starts) / counts, rtol=1e-9)
+
+
+def test_data_index_partial_chunk(tmp_path: Path) -> None:
+    # altered samplerate skips alignment -> last chunk is partial
+    h5_path = generate_random_file(tmp_path / "partial.h5", [25_000], interval_factor=10)
+    with Reader(h5_path) as sfr:
+        index = DataIndex.from_h5(sfr.h5file)
+        assert index is not None
+        assert index.samples_n == sfr.samples_n == 25_000
+        assert index.data["samples_n"].tolist() == [10_000, 10_000, 5_000]
+
+
+def test_data_index_rebuild_after_modification(random_h5: Path) -> None:
+    with Reader(random_h5) as sfr:
+        energy = sfr.energy()
+    with Writer(random_h5, modify_existing=True) as sfw:
+        sfw.store_hostname("modified")
+    with Reader(random_h5) as sfr:
+        assert INDEX_GROUP not in sfr.h5file
+        assert sfr.energy() == pytest.approx(energy, rel=1e-12)
+
+
+def test_data_index_rebuild_after_foreign_edit(random_h5: Path) -> None:
+    with Writer(random_h5, modify_existing=True) as sfw:
+        sfw.build_index()
+        sfw.build_pyramid(factors=(10, 100))
+    with Reader(random_h5) as sfr:
+        index = DataIndex.from_h5(sfr.h5file)
+        assert index is not None
+        assert index.matches(
+            sfr.ds_time,
+            sfr.samples_n,
+            sfr.CHUNK_SAMPLES_N,
+            iv_fingerprint(sfr.h5file["data"], sfr.samples_n, sfr.CHUNK_SAMPLES_N),
+        )
+        assert sorted(sfr.get_pyramid()) == [10, 100]
+        energy = sfr.energy()
+    with h5py.File(random_h5, "r+") as h5file:  # edit without the Writer
+        h5file["data"]["voltage"][:] = h5file["data"]["voltage"][:] // 2
+    with Reader(random_h5) as sfr:
+        index = DataIndex.from_h5(sfr.h5file)
+        assert index is not None
+        assert not index.matches(
+            sfr.ds_time,
+            sfr.samples_n,
+            sfr.CHUNK_SAMPLES_N,
+            iv_fingerprint(sfr.h5file["data"], sfr.samples_n, sfr.CHUNK_SAMPLES_N),
+        )
+        assert sfr.get_pyramid() == {}
+        assert sfr.energy() == pytest.approx(energy / 2, rel=1e-3)
+
+
+def test_data_index_pyramid(random_h5: Path) -> None:
+    with Writer(random_h5, modify_existing=True) as sfw:
+        sfw.build_index()
+        sfw.build_pyramid(factors=(10, 100, 1_000))
+    with Reader(random_h5) as sfr:
+        assert INDEX_GROUP in sfr.h5file
+        pyramid = sfr.get_pyramid()
+        assert sorted(pyramid) == [10, 100, 1_000]
+        cal = sfr.get_calibration_data()
+        voltage = cal.voltage.raw_to_si(sfr.ds_voltage[:])
+        current = cal.current.raw_to_si(sfr.ds_current[:])
+        power = (voltage * current)[: 60 * 1_000].reshape(-1, 1_000)
+        level = pyramid[1_000]
+        assert level["time"].shape[0] == 60
+        assert np.allclose(level["power_min"][:], power.min(axis=1), rtol=1e-6)
+        assert np.allclose(level["power_max"][:], power.max(axis=1), rtol=1e-6)
+        assert np.allclose(level["power_mean"][:], power.mean(axis=1), rtol=1e-5)
+        assert np.array_equal(level["time"][:], sfr.ds_time[::1_000])
+        assert PYRAMID_GROUP not in sfr.get_metadata()
+    with Writer(random_h5, modify_existing=True) as sfw:
+        assert PYRAMID_GROUP not in sfw.h5file  # outdated after modification
+
+
+def test_data_index_pyramid_factors() -> None:
+    data = np.arange(1_000)
+    with pytest.raises(ValueError):  # noqa: PT011
+        pyramid_levels_from_iv(data, data, data, (10, 15))
+
+
+def test_data_index_analyze(random_h5: Path) -> None:
+    with Reader(random_h5) as sfr:
+        report = sfr.analyze()
+        voltage = sfr.get_calibration_data().voltage.raw_to_si(sfr.ds_voltage[:])
+        assert report.samples_n == voltage.size
+        assert report.energy_Ws == sfr.energy()
+        assert report.voltage is not None
+        assert report.voltage.std == pytest.approx(voltage.std(), rel=1e-9)
+        assert report.time_diffs_s == [round(sfr.sample_interval_s, 6)]
+
+
+def test_data_index_parallel_rebuild(random_h5: Path) -> None:
+    with Reader(random_h5) as sfr:
+        index_ref = DataIndex.from_h5(sfr.h5file)
+        assert index_ref is not None
+        index = DataIndex.from_file(
+            random_h5,
+            sfr.samples_n,
+            chunk_samples_n=sfr.CHUNK_SAMPLES_N,
+            block_samples_n=sfr.CHUNK_SAMPLES_N,
+            jobs=2,
+        )
+        assert index.chunks_n == index_ref.chunks_n
+        for key, values in index.data.items():
+            assert np.allclose(values, index_ref.data[key], rtol=1e-12), key
+        energy = sfr.energy()
+    with Writer(random_h5, modify_existing=True) as sfw:
+        sfw.store_hostname("modified")  # removes index
+    with Reader(random_h5) as sfr:
+        assert INDEX_GROUP not in sfr.h5file
+        sfr.jobs = 2
+        assert sfr.energy() == pytest.approx(energy, rel=1e-12)
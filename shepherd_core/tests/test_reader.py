@@ -1,7 +1,10 @@
+import multiprocessing
 import sys
+import time
 from pathlib import Path
 
 import h5py
+import numpy as np
 import pytest
 import yaml
 from pydantic import ValidationError
@@ -268,3 +271,102 @@ def test_reader_save_meta_fail(data_h5: Path) -> None:
     with Reader(data_h5, verbose=True) as sfr:
         sfr.file_path = None
         assert sfr.save_metadata() == {}
+
+
+def test_reader_statistics_of_unaligned_blocks(data_h5: Path) -> None:
+    values = np.concatenate((np.zeros(1_000), 1_000 + np.arange(234))).astype("u4")
+    with Writer(data_h5, modify_existing=True) as sfw:
+        sfw.h5file.create_group("extra").create_dataset("values", data=values)
+    with Reader(data_h5, verbose=True) as sfr:
+        sfr.max_elements = 1_000  # 2 blocks of different size and distribution
+        stats = sfr.get_metadata(sfr["extra"])["values"]["_dataset_info"]["statistics"]
+        assert stats["mean"] == pytest.approx(values.mean())
+        assert stats["std"] == pytest.approx(values.std())
+        assert stats["max"] == values.max()
+
+
+@pytest.mark.parametrize("prefetch", [1, 3, 7])
+def test_reader_read_prefetch(data_h5: Path, prefetch: int) -> None:
+    with Reader(data_h5, verbose=True) as sfr:
+        for is_raw in [True, False]:
+            chunks_ref = list(sfr.read(start_n=2, end_n=40, is_raw=is_raw))
+            chunks_pre = list(sfr.read(start_n=2, end_n=40, is_raw=is_raw, prefetch=prefetch))
+            assert len(chunks_pre) == len(chunks_ref) == 38
+            for chunk_ref, chunk_pre in zip(chunks_ref, chunks_pre):
+                for values_ref, values_pre in zip(chunk_ref, chunk_pre):
+                    assert np.array_equal(values_ref, values_pre)
+        chunk = next(sfr.read(omit_timestamps=True, prefetch=4))
+        assert chunk[0] is None
+        # consumer stops early -> background-thread has to quit
+        for _ in sfr.read(prefetch=2):
+            break
+
+
+def test_reader_read_direct(data_h5: Path) -> None:
+    with Reader(data_h5, verbose=True) as sfr:
+        for is_raw in [True, False]:
+            chunks_ref = list(sfr.read(start_n=2, end_n=10, is_raw=is_raw))
+            buffers = sfr.allocate_buffers(is_raw=is_raw)
+            for chunk_ref, chunk in zip(
+                chunks_ref, sfr.read(start_n=2, end_n=10, is_raw=is_raw, out=buffers)
+            ):
+                for values_ref, values in zip(chunk_ref, chunk):
+                    assert np.array_equal(values_ref, values)
+        buffers = sfr.allocate_buffers(dtype=np.float32)
+        for chunk_ref, chunk in zip(sfr.read(end_n=5), sfr.read(end_n=5, out=buffers)):
+            assert chunk[1].dtype == np.float32
+            assert np.allclose(chunk_ref[1], chunk[1], rtol=1e-6)
+        chunk = next(sfr.read(omit_timestamps=True, out=buffers))
+        assert chunk[0] is None
+        with pytest.raises(ValueError):  # noqa: PT011
+            next(sfr.read(out=sfr.allocate_buffers(n_samples_per_chunk=10)))
+        with pytest.raises(ValueError):  # noqa: PT011
+            next(sfr.read(out=buffers, prefetch=2))
+
+
+def _write_live(
+    path: Path, started: "multiprocessing.synchronize.Event", *, segments: bool
+) -> None:
+    with Writer(path, time_segments=segments, swmr=True) as sfw:
+        sfw.store_hostname("live")
+        sfw.start_swmr()
+        started.set()
+        for idx in range(8):
+            sfw.append_iv_data_raw(
+                10**18 + idx * 25_000 * sfw.sample_interval_ns,
+                np.full(25_000, 1_000 + idx),
+                np.full(25_000, 2_000),
+            )
+            time.sleep(0.05)
+
+
+@pytest.mark.parametrize("segments", [False, True])
+def test_reader_swmr_follow(tmp_path: Path, *, segments: bool) -> None:
+    path = tmp_path / "live.h5"
+    ctx = multiprocessing.get_context("spawn")
+    started = ctx.Event()
+    writer = ctx.Process(target=_write_live, args=(path, started), kwargs={"segments": segments})
+    writer.start()
+    assert started.wait(timeout=60)
+    voltages = []
+    with Reader(path, verbose=True, swmr=True) as sfr:
+        for _, voltage, _ in sfr.follow(poll_interval_s=0.01, timeout_s=2, is_raw=True):
+            voltages.append(voltage)
+            assert sfr.get_index().samples_n == sfr.samples_n  # extended, not rebuilt
+        energy = sfr.energy()
+    writer.join(timeout=60)
+    assert writer.exitcode == 0
+    voltage = np.concatenate(voltages)
+    assert voltage.shape[0] == 200_000
+    assert np.array_equal(voltage, np.repeat(1_000 + np.arange(8), 25_000))
+    with Reader(path, verbose=True) as sfr:
+        assert sfr.is_valid()
+        assert sfr.energy() == pytest.approx(energy, rel=1e-12)
+
+
+def test_reader_swmr_needed(data_h5: Path) -> None:
+    with Reader(data_h5, verbose=True) as sfr:
+        with pytest.raises(ValueError):  # noqa: PT011
+            sfr.refresh()
+        with pytest.raises(ValueError):  # noqa: PT011
+            next(sfr.follow())
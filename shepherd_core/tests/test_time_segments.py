@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from shepherd_core import Reader
+from shepherd_core import Writer
+from shepherd_core.data_index import INDEX_GROUP
+from shepherd_core.time_segments import TIME_SEGMENTS
+from shepherd_core.time_segments import TimeSegments
+
+
+def generate_file(h5_path: Path, *, time_segments: bool) -> Path:
+    rng = np.random.default_rng(11)
+    with Writer(h5_path, time_segments=time_segments) as sfw:
+        sfw.store_hostname("artificial")
+        interval = sfw.sample_interval_ns
+        time_start = 1_700_000_000 * 10**9
+        for size, time_offset in [(12_345, 0), (20_000, 0), (7_655, 10**9), (30_000, 0)]:
+            # ⤷ last one continues after a gap of 1 s
+            voltage = rng.integers(0, 2**18, size)
+            current = rng.integers(0, 2**18, size)
+            time_start += time_offset
+            sfw.append_iv_data_raw(time_start, voltage, current)
+            time_start += size * interval
+        time_nd = time_start + interval * np.arange(15_000, dtype="u8")
+        time_nd[5_000:] += 3  # jitter
+        sfw.append_iv_data_raw(time_nd, np.ones(15_000), np.ones(15_000))
+    return h5_path
+
+
+@pytest.fixture
+def explicit_h5(tmp_path: Path) -> Path:
+    return generate_file(tmp_path / "explicit.h5", time_segments=False)
+
+
+@pytest.fixture
+def implicit_h5(tmp_path: Path) -> Path:
+    return generate_file(tmp_path / "implicit.h5", time_segments=True)
+
+
+def test_time_segments_match_explicit(explicit_h5: Path, implicit_h5: Path) -> None:
+    with Reader(explicit_h5) as sfe, Reader(implicit_h5) as sfi:
+        assert sfi.is_valid()
+        assert isinstance(sfi.ds_time, TimeSegments)
+        assert "time" not in sfi.h5file["data"]
+        assert sfi.ds_time.segments_n == 3
+        assert sfi.samples_n == sfe.samples_n == 85_000
+        assert np.array_equal(sfi.ds_time[:], sfe.ds_time[:])
+        assert sfi.samplerate_sps == sfe.samplerate_sps
+        assert sfi.energy() == sfe.energy()
+        assert sfi.file_size < 0.8 * sfe.file_size
+        assert INDEX_GROUP in sfi.h5file
+        assert sfi.get_index().matches(sfi.ds_time, sfi.samples_n, sfi.CHUNK_SAMPLES_N)
+        for kwargs in [{}, {"prefetch": 2}, {"out": sfi.allocate_buffers(is_raw=True)}]:
+            for chunk_e, chunk_i in zip(
+                sfe.read(is_raw=True), sfi.read(is_raw=True, **kwargs), strict=True
+            ):
+                assert np.array_equal(chunk_e[0], chunk_i[0])
+                assert np.array_equal(chunk_e[1], chunk_i[1])
+
+
+def test_time_segments_metadata(explicit_h5: Path, implicit_h5: Path) -> None:
+    with Reader(explicit_h5) as sfe, Reader(implicit_h5) as sfi:
+        meta_e = sfe.get_metadata()["data"]["time"]
+        meta_i = sfi.get_metadata()["data"][TIME_SEGMENTS]
+        assert meta_i["_dataset_info"]["time_diffs_s"] == meta_e["_dataset_info"]["time_diffs_s"]
+        assert "statistics" not in meta_i["_dataset_info"]
+        assert isinstance(meta_i["description"], str)
+
+
+def test_time_segments_indexing(explicit_h5: Path, implicit_h5: Path) -> None:
+    with Reader(explicit_h5) as sfe, Reader(implicit_h5) as sfi:
+        time_ref = sfe.ds_time[:]
+        for key in [np.s_[::7], np.s_[-100:], np.s_[32_340:32_350], 0, -1, [3, 32_345, -2]]:
+            assert np.array_equal(sfi.ds_time[key], time_ref[key])
+        with pytest.raises(IndexError):
+            _ = sfi.ds_time[85_000]
+        buffer = np.zeros((100,), dtype="u8")
+        sfi.ds_time.read_direct(buffer, np.s_[32_300:32_400])
+        assert np.array_equal(buffer, time_ref[32_300:32_400])
+
+
+def test_time_segments_modify(implicit_h5: Path) -> None:
+    with Reader(implicit_h5) as sfi:
+        time_last = int(sfi.ds_time[-1])
+        interval = sfi.ds_time.interval_ns
+    with Writer(implicit_h5, modify_existing=True) as sfw:
+        sfw.append_iv_data_raw(time_last + interval, np.ones(10_000), np.ones(10_000))
+    with Reader(implicit_h5) as sfi:
+        assert sfi.samples_n == 95_000
+        assert sfi.h5file["data"][TIME_SEGMENTS].shape == (3, 3)  # continued last segment
+        assert int(sfi.ds_time[-1]) == time_last + 10_000 * interval
+
+
+def test_time_segments_parallel_index(implicit_h5: Path) -> None:
+    with Writer(implicit_h5, modify_existing=True) as sfw:
+        sfw.store_hostname("changed")  # removes index
+    with Reader(implicit_h5) as sfi:
+        sfi.jobs = 2
+        sfi.max_elements = 20_000
+        assert sfi.get_index().matches(sfi.ds_time, sfi.samples_n, sfi.CHUNK_SAMPLES_N)
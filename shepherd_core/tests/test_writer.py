@@ -1,7 +1,10 @@
+import subprocess
+import sys
 from pathlib import Path
 from typing import Optional
 from typing import Union
 
+import h5py
 import numpy as np
 import pytest
 
@@ -72,6 +75,53 @@ def test_writer_compression_1(h5_path: Path) -> None:
     generate_shp_file(h5_path, compression=Compression.gzip1)
 
 
+@pytest.mark.parametrize("compression", [Compression.zstd, Compression.blosc2])
+def test_writer_compression_plugin(h5_path: Path, compression: Compression) -> None:
+    pytest.importorskip("hdf5plugin")
+    generate_shp_file(h5_path, compression=compression)
+    with Reader(h5_path, verbose=True) as sfr:
+        assert sfr.is_valid()
+
+
+@pytest.mark.parametrize("compression", [Compression.zstd, Compression.blosc2])
+def test_writer_compression_plugin_fresh_process(h5_path: Path, compression: Compression) -> None:
+    pytest.importorskip("hdf5plugin")
+    generate_shp_file(h5_path, compression=compression)
+    code = (
+        "import sys; from pathlib import Path; from shepherd_core import Reader\n"
+        "with Reader(Path(sys.argv[1]), verbose=False) as sfr:\n"
+        "    assert 'hdf5plugin' in sys.modules\n"
+        "    assert sfr.energy() > 0\n"
+    )
+    # ⤷ the writer already loaded the plugin in this process
+    subprocess.run([sys.executable, "-c", code, h5_path.as_posix()], check=True)
+
+
+def test_writer_compression_plugin_missing(h5_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    with h5py.File(h5_path, "w") as h5file:
+        grp = h5file.create_group("data")
+        for name in ["time", "voltage", "current"]:
+            grp.create_dataset(
+                name,
+                (0,),
+                dtype="u8",
+                maxshape=(None,),
+                compression=32015,
+                allow_unknown_filter=True,
+            )
+    monkeypatch.setitem(sys.modules, "hdf5plugin", None)  # ⤷ import fails
+    with pytest.raises(ImportError, match=r"shepherd-core\[compression\]"):
+        Reader(h5_path, verbose=False)
+
+
+def test_writer_compression_shuffle(h5_path: Path) -> None:
+    generate_shp_file(h5_path, compression=Compression.gzip1_shuffle)
+    with Reader(h5_path, verbose=True) as sfr:
+        assert sfr.ds_voltage.shuffle
+        assert sfr.ds_voltage.compression == "gzip"
+        assert sfr.is_valid()
+
+
 def test_writer_unique_path(h5_file: Path) -> None:
     with Writer(h5_file) as sfw:
         assert sfw.file_path != h5_path
@@ -148,6 +198,97 @@ def test_writer_append_raw(h5_path: Path) -> None:
             sfw.append_iv_data_raw(None, data_nd, data_nd)
 
 
+@pytest.mark.parametrize("expected_samples", [None, 95_000])
+def test_writer_append_capacity(h5_path: Path, expected_samples: Optional[int]) -> None:
+    rng = np.random.default_rng(3)
+    voltage = rng.integers(0, 2**20, 95_000).astype("u4")
+    with Writer(h5_path, expected_samples=expected_samples) as sfw:
+        time_start = 10**18
+        for idx in range(0, voltage.shape[0], 3_000):
+            sfw.append_iv_data_raw(
+                time_start + idx * sfw.sample_interval_ns,
+                voltage[idx : idx + 3_000],
+                voltage[idx : idx + 3_000],
+            )
+            assert sfw.samples_n == min(idx + 3_000, voltage.shape[0])
+            assert sfw.ds_voltage.shape[0] % sfw.CHUNK_SAMPLES_N == 0  # capacity
+        if expected_samples is not None:
+            assert sfw.ds_voltage.shape[0] == 100_000
+    with Reader(h5_path) as sfr:
+        assert sfr.ds_voltage.shape[0] == sfr.ds_time.shape[0] == 90_000  # aligned
+        assert np.array_equal(sfr.ds_current[:], voltage[:90_000])
+        assert int(sfr.ds_time[-1]) == time_start + 89_999 * sfr.sample_interval_ns
+        assert sfr.get_index().samples_n == 90_000
+
+
+def test_writer_append_unaligned(h5_path: Path) -> None:
+    with Writer(h5_path) as sfw:
+        sample_interval = 10 * sfw.sample_interval_ns
+        time_nd = np.arange(0, 12_345 * sample_interval, sample_interval).astype("u8")
+        data_nd = np.ones((12_345,))
+        sfw.append_iv_data_raw(time_nd, data_nd, data_nd)
+        sfw.append_iv_data_raw(time_nd + time_nd[-1] + sample_interval, data_nd, data_nd)
+    with Reader(h5_path) as sfr:
+        assert sfr.ds_voltage.shape[0] == 2 * 12_345  # trimmed to logical size
+        assert np.all(sfr.ds_voltage[:] == 1)
+
+
+@pytest.mark.parametrize(
+    "compression",
+    [
+        Compression.null,
+        Compression.lzf,
+        Compression.gzip1,
+        Compression.lzf_shuffle,
+        Compression.gzip1_shuffle,
+    ],
+)
+@pytest.mark.parametrize("threads", [1, 3])
+def test_writer_append_chunks(h5_path: Path, compression: Compression, threads: int) -> None:
+    rng = np.random.default_rng(5)
+    voltage = rng.integers(0, 2**18, 77_777).astype("u4")
+    current = rng.integers(0, 2**12, 77_777).astype("u4")
+    with Writer(h5_path, compression=compression, compression_threads=threads) as sfw:
+        sample_interval = 10 * sfw.sample_interval_ns  # avoids alignment
+        time_nd = (10**18 + sample_interval * np.arange(77_777)).astype("u8")
+        idx = 0
+        for size in [7_777, 23_456, 1, 30_000]:  # unaligned with chunks
+            sfw.append_iv_data_raw(
+                time_nd[idx : idx + size], voltage[idx : idx + size], current[idx : idx + size]
+            )
+            idx += size
+    with Writer(
+        h5_path, compression=compression, compression_threads=threads, modify_existing=True
+    ) as sfw:
+        assert sfw.samples_n == 61_234
+        sfw.append_iv_data_raw(time_nd[61_234:], voltage[61_234:], current[61_234:])
+    with Reader(h5_path) as sfr:
+        assert np.array_equal(sfr.ds_time[:], time_nd)
+        assert np.array_equal(sfr.ds_voltage[:], voltage)
+        assert np.array_equal(sfr.ds_current[:], current)
+
+
+def test_writer_swmr(h5_path: Path) -> None:
+    with Writer(h5_path, swmr=True) as sfw:
+        sfw.store_hostname("live")
+        time_nd = (10**18 + sfw.sample_interval_ns * np.arange(35_000)).astype("u8")
+        sfw.append_iv_data_raw(time_nd[:5_000], np.ones(5_000), np.ones(5_000))
+        sfw.start_swmr()
+        assert sfw.h5file.swmr_mode
+        sfw.append_iv_data_raw(time_nd[5_000:], np.ones(30_000), np.ones(30_000))
+        assert sfw.ds_voltage.shape[0] == 30_000  # only written chunks are visible
+    with Reader(h5_path, verbose=True) as sfr:
+        assert sfr.samples_n == 30_000  # aligned
+        assert np.array_equal(sfr.ds_time[:], time_nd[:30_000])
+        assert sfr.get_index().matches(sfr.ds_time, sfr.samples_n, sfr.CHUNK_SAMPLES_N)
+        assert sfr.get_hostname() == "live"
+
+
+def test_writer_swmr_needs_format(h5_path: Path) -> None:
+    with Writer(h5_path) as sfw, pytest.raises(ValueError):  # noqa: PT011
+        sfw.start_swmr()
+
+
 def test_writer_align(h5_path: Path) -> None:
     with Writer(h5_path) as sfw:
         length = int(5.5 * sfw.CHUNK_SAMPLES_N)
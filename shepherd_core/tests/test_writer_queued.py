@@ -0,0 +1,81 @@
+import asyncio
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from shepherd_core import QueuedWriter
+from shepherd_core import Reader
+from shepherd_core import Writer
+
+
+def generate_chunks(sample_interval_ns: int) -> list[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    rng = np.random.default_rng(3)
+    chunks = []
+    for idx in range(20):
+        time_nd = (10**18 + sample_interval_ns * np.arange(idx * 7_000, (idx + 1) * 7_000)).astype(
+            "u8"
+        )
+        chunks.append((time_nd, rng.integers(0, 2**18, 7_000), rng.integers(0, 2**18, 7_000)))
+    return chunks
+
+
+def test_writer_queued_put(tmp_path: Path) -> None:
+    with Writer(tmp_path / "direct.h5") as sfw:
+        chunks = generate_chunks(sfw.sample_interval_ns)
+        for chunk in chunks:
+            sfw.append_iv_data_raw(*chunk)
+    with Writer(tmp_path / "queued.h5") as sfw, QueuedWriter(sfw, queue_size=2) as sfq:
+        for chunk in chunks:
+            sfq.put(*chunk, is_raw=True)  # blocks when the I/O-thread lags behind
+        sfq.flush()
+        assert sfw.samples_n == 140_000
+    with Reader(tmp_path / "direct.h5") as sfd, Reader(tmp_path / "queued.h5") as sfr:
+        assert np.array_equal(sfd.ds_time[:], sfr.ds_time[:])
+        assert np.array_equal(sfd.ds_voltage[:], sfr.ds_voltage[:])
+        assert np.array_equal(sfd.ds_current[:], sfr.ds_current[:])
+
+
+def test_writer_queued_si(tmp_path: Path) -> None:
+    with Writer(tmp_path / "queued.h5") as sfw, QueuedWriter(sfw) as sfq:
+        timestamps = np.arange(0.0, 1.0, sfw.sample_interval_s)
+        sfq.put(timestamps, np.full(timestamps.shape, 2.0), np.full(timestamps.shape, 1e-3))
+    with Reader(tmp_path / "queued.h5") as sfr:
+        assert sfr.samples_n == 100_000
+        assert sfr.energy() == pytest.approx(2e-3, rel=1e-3)
+
+
+def test_writer_queued_group(tmp_path: Path) -> None:
+    with Writer(tmp_path / "queued.h5") as sfw, QueuedWriter(sfw) as sfq:
+        for chunk in generate_chunks(sfw.sample_interval_ns)[:3]:
+            sfq.put(*chunk, is_raw=True)
+            sfq.put_group("derived", {"mean": chunk[1][:10].astype("f4")}, attrs={"n": 10})
+    with Reader(tmp_path / "queued.h5") as sfr:
+        assert sfr.samples_n == 20_000  # ⤷ aligned with chunk-size
+        assert sfr.h5file["derived"]["mean"].shape == (30,)
+        assert sfr.h5file["derived"]["mean"].dtype == np.float32
+        assert sfr.h5file["derived"].attrs["n"] == 10
+
+
+def test_writer_queued_async(tmp_path: Path) -> None:
+    async def _produce(sfq: QueuedWriter, chunks: list) -> None:
+        for chunk in chunks:
+            await sfq.append(*chunk, is_raw=True)
+
+    with Writer(tmp_path / "queued.h5") as sfw, QueuedWriter(sfw, queue_size=1) as sfq:
+        chunks = generate_chunks(sfw.sample_interval_ns)
+        asyncio.run(_produce(sfq, chunks))
+    with Reader(tmp_path / "queued.h5") as sfr:
+        assert np.array_equal(sfr.ds_voltage[:], np.concatenate([chunk[1] for chunk in chunks]))
+
+
+def test_writer_queued_exception(tmp_path: Path) -> None:
+    with Writer(tmp_path / "queued.h5") as sfw:
+        with pytest.raises(TypeError), QueuedWriter(sfw) as sfq:
+            sfq.put("faulty", np.ones(10), np.ones(10), is_raw=True)
+            # ⤷ raised on exit (at latest)
+        with pytest.raises(TypeError), QueuedWriter(sfw) as sfq:  # noqa: PT012
+            sfq.put("faulty", np.ones(10), np.ones(10), is_raw=True)
+            sfq.flush()
+        with pytest.raises(RuntimeError):
+            QueuedWriter(sfw).put(0, np.ones(10), np.ones(10))
@@ -1,13 +1,18 @@
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import pytest
 
 from shepherd_core import CalibrationEmulator
 from shepherd_core import Reader
 from shepherd_core.data_models import EnergyDType
 from shepherd_core.data_models import VirtualSourceConfig
+from shepherd_core.vsource import ConstantCurrentTarget
+from shepherd_core.vsource import ResistiveTarget
 from shepherd_core.vsource import VirtualSourceModel
+from shepherd_core.vsource.target_model import DiodeTarget
+from shepherd_core.vsource.target_model import TargetABC
 
 # virtual_converter_model gets tested below with vsrc_model
 
@@ -172,3 +177,86 @@ def test_vsource_vsrc_sim_sample(src_name: str, file_ivsample: Path) -> None:
             length = max(_v.size, _i.size)
             for _n in range(length):
                 src.iterate_sampling(V_inp_uV=_v[_n] * 10**6, I_inp_nA=_i[_n] * 10**9)
+
+
+def process_reference(
+    src: VirtualSourceModel, V_inp_uV: np.ndarray, I_inp_nA: np.ndarray, target: TargetABC
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-sample oracle, like the former loop of simulate_source()."""
+    V_out_uV = np.empty(V_inp_uV.shape)
+    I_out_nA = np.empty(V_inp_uV.shape)
+    stats = np.empty((V_inp_uV.size, len(src.INTERNALS)))
+    for _n in range(V_inp_uV.size):
+        V_out_uV[_n] = src.iterate_sampling(
+            V_inp_uV=int(V_inp_uV[_n]), I_inp_nA=int(I_inp_nA[_n]), I_out_nA=src.I_out_nA
+        )
+        src.I_out_nA = target.step(int(V_out_uV[_n]), pwr_good=src.cnv.get_power_good())
+        I_out_nA[_n] = src.I_out_nA
+        stats[_n] = [
+            src.hrv.voltage_hold,
+            src.cnv.V_input_request_uV,
+            src.hrv.voltage_set_uV,
+            src.cnv.V_mid_uV,
+            src.hrv.current_hold,
+            src.hrv.current_delta,
+            src.I_out_nA,
+            src.cnv.P_inp_fW,
+            src.cnv.P_out_fW,
+            src.cnv.get_power_good(),
+        ]
+    return V_out_uV, I_out_nA, stats
+
+
+src_chunk_list = [
+    *[{"name": _name} for _name in src_list],
+    {"name": "direct", "interval_check_thresholds_ms": 0.37, "V_buck_drop_mV": 300},
+    {"name": "direct", "interval_startup_delay_drain_ms": 0.5, "I_intermediate_leak_nA": 80},
+]
+
+
+@pytest.mark.parametrize("src_cfg", src_chunk_list)
+@pytest.mark.parametrize(
+    "target",
+    [
+        ResistiveTarget(R_Ohm=1_000, controlled=True),
+        ConstantCurrentTarget(I_active_A=1e-3, I_sleep_A=1e-6),
+        DiodeTarget(V_forward_V=2.0, I_forward_A=20e-3, R_Ohm=100),
+    ],
+)
+@pytest.mark.parametrize("log_intermediate", [False, True])
+def test_vsource_process_chunk_parity(
+    src_cfg: dict, target: TargetABC, *, log_intermediate: bool
+) -> None:
+    rng = np.random.default_rng(9)
+    V_inp_uV = 2.5e6 + 2.5e6 * np.sin(np.arange(3_000) / 150) + rng.normal(0, 1e4, 3_000)
+    I_inp_nA = rng.uniform(0, 2e6, 3_000)
+    models = [
+        VirtualSourceModel(
+            VirtualSourceConfig(**src_cfg), CalibrationEmulator(), log_intermediate=log_intermediate
+        )
+        for _ in range(2)
+    ]
+    for start, end in [(0, 1), (1, 1_000), (1_000, 1_001), (1_001, 3_000)]:
+        results = models[0].process_chunk(
+            V_inp_uV[start:end], I_inp_nA[start:end], target, internals=True
+        )
+        references = process_reference(models[1], V_inp_uV[start:end], I_inp_nA[start:end], target)
+        for result, reference in zip(results, references):
+            assert np.array_equal(result, reference)
+    assert models[0].W_out_fWs == models[1].W_out_fWs
+    assert models[0].W_inp_fWs == models[1].W_inp_fWs
+    states = [{k: v for k, v in vars(_m.cnv).items() if k != "_cal"} for _m in models]
+    assert states[0] == states[1]
+    assert vars(models[0].hrv) == vars(models[1].hrv)
+
+
+def test_vsource_process_chunk_vectorized() -> None:
+    assert src_model("direct")._is_vectorizable()  # noqa: SLF001
+    assert not src_model("BQ25504")._is_vectorizable()  # noqa: SLF001
+    V_out_uV, I_out_nA, internals = src_model("direct").process_chunk(
+        np.full(100, 3e6), np.full(100, 1e6), ResistiveTarget(R_Ohm=1_000)
+    )
+    assert V_out_uV.shape == I_out_nA.shape == (100,)
+    assert internals is None
+    assert V_out_uV[-1] == pytest.approx(3e6, rel=1e-3)
+    assert I_out_nA[-1] == pytest.approx(3e6, rel=1e-3)
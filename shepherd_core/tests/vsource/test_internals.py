@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from shepherd_core import CalibrationEmulator
+from shepherd_core.data_models import VirtualSourceConfig
+from shepherd_core.vsource import ResistiveTarget
+from shepherd_core.vsource import VirtualSourceModel
+from shepherd_core.vsource import read_internals
+from shepherd_core.vsource import simulate_source
+from shepherd_core.vsource.virtual_source_internals import InternalsDecimator
+
+
+def simulate_internals(samples_n: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(7)
+    V_inp_uV = 2.5e6 + 2.5e6 * np.sin(np.arange(samples_n) / 150) + rng.normal(0, 1e4, samples_n)
+    I_inp_nA = rng.uniform(0, 2e6, samples_n)
+    src = VirtualSourceModel(VirtualSourceConfig(name="BQ25504"), CalibrationEmulator())
+    _, _, internals = src.process_chunk(
+        V_inp_uV, I_inp_nA, ResistiveTarget(R_Ohm=1_000), internals=True
+    )
+    return np.arange(samples_n) * 1e-5, internals
+
+
+@pytest.mark.parametrize("bucket_n", [1, 7, 100])
+@pytest.mark.parametrize("batch_n", [1, 50])
+def test_vsource_internals_decimator(bucket_n: int, batch_n: int) -> None:
+    time_s, internals = simulate_internals(2_345)
+    decimator = InternalsDecimator(bucket_n, batch_n=batch_n)
+    parts = [
+        decimator.push(time_s[start:end], internals[start:end])
+        for start, end in [(0, 5), (5, 1_000), (1_000, 1_003), (1_003, 2_345)]
+    ]
+    assert all(_p["time"].size == 0 or _p["time"].size >= batch_n for _p in parts)
+    parts.append(decimator.flush())
+    data = {key: np.concatenate([_p[key] for _p in parts]) for key in parts[0]}
+    buckets_n = -(-time_s.size // bucket_n)
+    assert data["time"].shape == (buckets_n,)
+    assert np.array_equal(data["time"], time_s[::bucket_n])
+    for idx, (name, _, scale) in enumerate(decimator.signals):
+        for bucket in [0, buckets_n - 1]:
+            values = internals[bucket * bucket_n : (bucket + 1) * bucket_n, idx] * scale
+            assert data[f"{name}_min"][bucket] == np.float32(values.min())
+            assert data[f"{name}_max"][bucket] == np.float32(values.max())
+    assert decimator.flush()["time"].size == 0
+
+
+def test_vsource_internals_decimator_invalid() -> None:
+    with pytest.raises(ValueError):  # noqa: PT011
+        InternalsDecimator(0)
+
+
+def test_vsource_internals_simulation(file_ivsample: Path, tmp_path: Path) -> None:
+    path_output = tmp_path / "internals.h5"
+    simulate_source(
+        VirtualSourceConfig(name="BQ25504"),
+        ResistiveTarget(R_Ohm=1_000, controlled=True),
+        file_ivsample,
+        path_output,
+        monitor_internals=True,
+        internals_bucket_n=1_000,
+    )
+    assert path_output.with_suffix(".png").exists()
+    data = read_internals(path_output)
+    assert data["time"].size == 100  # ⤷ 1 s @ 100 kSPS
+    assert np.all(data["V_mid_min"] <= data["V_mid_max"])
+    assert set(np.unique(data["power_good_max"])) <= {0, 1}
+
+    coarse = read_internals(path_output, points_max=30, block_n=7)
+    assert coarse["time"].size == 25  # ⤷ merges 4 buckets
+    assert np.array_equal(coarse["time"], data["time"][::4])
+    assert np.array_equal(coarse["V_mid_min"], data["V_mid_min"].reshape(-1, 4).min(axis=1))
+    assert np.array_equal(coarse["V_mid_max"], data["V_mid_max"].reshape(-1, 4).max(axis=1))
+
+
+def test_vsource_internals_missing(file_ivsample: Path) -> None:
+    with pytest.raises(ValueError):  # noqa: PT011
+        read_internals(file_ivsample)
@@ -0,0 +1,167 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from shepherd_core import CalibrationEmulator
+from shepherd_core.data_models import EnergyDType
+from shepherd_core.data_models import VirtualHarvesterConfig
+from shepherd_core.data_models import VirtualSourceConfig
+from shepherd_core.data_models.content.virtual_harvester import HarvesterPRUConfig
+from shepherd_core.vsource import ConstantCurrentTarget
+from shepherd_core.vsource import ConstantPowerTarget
+from shepherd_core.vsource import ResistiveTarget
+from shepherd_core.vsource import VirtualHarvesterModel
+from shepherd_core.vsource import VirtualSourceModel
+from shepherd_core.vsource import simulate_harvester
+from shepherd_core.vsource import simulate_source
+from shepherd_core.vsource.target_model import DiodeTarget
+from shepherd_core.vsource.target_model import TargetABC
+
+from .test_converter import process_reference
+from .test_converter import src_chunk_list
+from .test_harvester import hrv_list
+
+jit = pytest.importorskip("shepherd_core.vsource.virtual_source_jit")
+# ⤷ skips without numba
+
+window_n = 100
+voltage_step_V = 0.05
+
+
+def ivcurve_input(windows_n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Synthetic ivcurves (voltage-sweeps) of a solar cell with changing illumination."""
+    rng = np.random.default_rng(5)
+    V_uV = np.tile(np.arange(window_n) * voltage_step_V * 1e6, windows_n)
+    I_sc_nA = np.repeat(rng.uniform(0, 5e6, windows_n), window_n)
+    I_nA = np.maximum(I_sc_nA * (1 - np.exp((V_uV - 3.5e6) / 0.3e6)), 0)
+    return V_uV + rng.normal(0, 1e3, V_uV.size), I_nA
+
+
+def assert_parity(
+    models: list[VirtualSourceModel], target: TargetABC, V_uV: np.ndarray, I_nA: np.ndarray
+) -> None:
+    for start, end in [(0, 1), (1, 2_000), (2_000, 2_001), (2_001, V_uV.size)]:
+        results = models[0].process_chunk(
+            V_uV[start:end], I_nA[start:end], target, internals=True, engine="jit"
+        )
+        references = process_reference(models[1], V_uV[start:end], I_nA[start:end], target)
+        for result, reference in zip(results, references):
+            assert np.array_equal(result, reference)
+    assert models[0].W_out_fWs == models[1].W_out_fWs
+    assert models[0].W_inp_fWs == models[1].W_inp_fWs
+    assert models[0].I_out_nA == models[1].I_out_nA
+    states = [{k: v for k, v in vars(_m.cnv).items() if k != "_cal"} for _m in models]
+    assert states[0] == states[1]
+    assert vars(models[0].hrv) == vars(models[1].hrv)
+    residues = [_m.cnv._cal.negative_residue_nA for _m in models]  # noqa: SLF001
+    assert residues[0] == residues[1]
+
+
+@pytest.mark.parametrize("src_cfg", src_chunk_list)
+@pytest.mark.parametrize(
+    "target",
+    [
+        ResistiveTarget(R_Ohm=1_000, controlled=True),
+        ConstantCurrentTarget(I_active_A=1e-3, I_sleep_A=1e-6),
+        DiodeTarget(V_forward_V=2.0, I_forward_A=20e-3, R_Ohm=100),
+    ],
+)
+@pytest.mark.parametrize("log_intermediate", [False, True])
+def test_vsource_jit_parity(src_cfg: dict, target: TargetABC, *, log_intermediate: bool) -> None:
+    rng = np.random.default_rng(9)
+    V_inp_uV = 2.5e6 + 2.5e6 * np.sin(np.arange(5_000) / 150) + rng.normal(0, 1e4, 5_000)
+    I_inp_nA = rng.uniform(0, 2e6, 5_000)
+    models = [
+        VirtualSourceModel(
+            VirtualSourceConfig(**src_cfg), CalibrationEmulator(), log_intermediate=log_intermediate
+        )
+        for _ in range(2)
+    ]
+    assert_parity(models, target, V_inp_uV, I_inp_nA)
+
+
+@pytest.mark.parametrize("hrv_name", hrv_list[3:])
+@pytest.mark.parametrize("src_name", ["direct", "diode+resistor+capacitor", "BQ25570"])
+def test_vsource_jit_parity_ivcurve(hrv_name: str, src_name: str) -> None:
+    V_inp_uV, I_inp_nA = ivcurve_input(60)
+    src_config = VirtualSourceConfig(name=src_name, harvester=VirtualHarvesterConfig(name=hrv_name))
+    models = [
+        VirtualSourceModel(
+            src_config,
+            CalibrationEmulator(),
+            dtype_in=EnergyDType.ivcurve,
+            window_size=window_n,
+            voltage_step_V=voltage_step_V,
+        )
+        for _ in range(2)
+    ]
+    assert_parity(models, ResistiveTarget(R_Ohm=2_000), V_inp_uV, I_inp_nA)
+
+
+@pytest.mark.parametrize("hrv_name", hrv_list[3:])
+def test_vsource_jit_harvester(hrv_name: str) -> None:
+    V_inp_uV, I_inp_nA = ivcurve_input(60)
+    hrv_pru = HarvesterPRUConfig.from_vhrv(
+        VirtualHarvesterConfig(name=hrv_name),
+        for_emu=True,
+        dtype_in=EnergyDType.ivcurve,
+        window_size=window_n,
+        voltage_step_V=voltage_step_V,
+    )
+    hrvs = [VirtualHarvesterModel(hrv_pru) for _ in range(2)]
+    V_uV, I_nA = jit.harvest_chunk(hrvs[0], hrv_pru, V_inp_uV, I_inp_nA)
+    for _n in range(V_inp_uV.size):
+        V_ref_uV, I_ref_nA = hrvs[1].ivcurve_sample(int(V_inp_uV[_n]), int(I_inp_nA[_n]))
+        assert V_uV[_n] == V_ref_uV
+        assert I_nA[_n] == I_ref_nA
+    assert vars(hrvs[0]) == vars(hrvs[1])
+
+
+def test_vsource_jit_states_complete() -> None:
+    src = VirtualSourceModel(VirtualSourceConfig(name="BQ25504"), CalibrationEmulator())
+    assert set(jit.HRV_STATES) == set(vars(src.hrv)) - {"_cfg"}
+    assert set(jit.CNV_STATES) == set(vars(src.cnv)) - {"_cal", "_cfg"}
+
+
+def test_vsource_jit_mixed_engines() -> None:
+    V_inp_uV, I_inp_nA = ivcurve_input(30)
+    models = [VirtualSourceModel(VirtualSourceConfig(name="BQ25504"), CalibrationEmulator())]
+    models.append(VirtualSourceModel(VirtualSourceConfig(name="BQ25504"), CalibrationEmulator()))
+    target = ConstantPowerTarget(P_active_W=1e-3, P_sleep_W=1e-6)
+    results = [[], []]
+    for idx, engine in enumerate(["jit", "python", "jit"]):
+        chunk = slice(idx * 1_000, (idx + 1) * 1_000)
+        results[0].append(
+            models[0].process_chunk(V_inp_uV[chunk], I_inp_nA[chunk], target, engine=engine)[0]
+        )
+        results[1].append(models[1].process_chunk(V_inp_uV[chunk], I_inp_nA[chunk], target)[0])
+    assert np.array_equal(np.concatenate(results[0]), np.concatenate(results[1]))
+    assert models[0].W_out_fWs == models[1].W_out_fWs
+
+
+def test_vsource_jit_unsupported() -> None:
+    class CustomTarget(ResistiveTarget):
+        pass
+
+    src = VirtualSourceModel(VirtualSourceConfig(name="BQ25504"), CalibrationEmulator())
+    with pytest.raises(ValueError):  # noqa: PT011
+        src.process_chunk(np.ones(10), np.ones(10), CustomTarget(R_Ohm=100), engine="jit")
+    with pytest.raises(ValueError):  # noqa: PT011
+        src.process_chunk(np.ones(10), np.ones(10), CustomTarget(R_Ohm=100), engine="gpu")
+
+
+def test_vsource_jit_simulations(file_ivcurve: Path) -> None:
+    hrv_config = VirtualHarvesterConfig(name="mppt_po")
+    e_hrv_Ws = [
+        simulate_harvester(hrv_config, file_ivcurve, engine=_engine)
+        for _engine in ["python", "jit"]
+    ]
+    assert e_hrv_Ws[0] == e_hrv_Ws[1]
+    src_config = VirtualSourceConfig(name="BQ25504", harvester=hrv_config)
+    target = ResistiveTarget(R_Ohm=1_000)
+    e_src_Ws = [
+        simulate_source(src_config, target, file_ivcurve, engine=_engine)
+        for _engine in ["python", "jit"]
+    ]
+    assert e_src_Ws[0] == e_src_Ws[1]
@@ -0,0 +1,84 @@
+import os
+import signal
+import sys
+from pathlib import Path
+
+import pytest
+
+from shepherd_core.data_models import VirtualHarvesterConfig
+from shepherd_core.data_models import VirtualSourceConfig
+from shepherd_core.vsource import ResistiveTarget
+from shepherd_core.vsource import simulate_source
+from shepherd_core.vsource import simulate_source_sweep
+from shepherd_core.vsource import sweep_variants
+
+
+def test_vsource_sweep_variants() -> None:
+    grid = {
+        "C_intermediate_uF": [10, 47, 100],
+        "harvester": [VirtualHarvesterConfig(name="mppt_po"), {"name": "mppt_opt"}],
+    }
+    variants = sweep_variants(VirtualSourceConfig(name="BQ25504"), grid)
+    assert len(variants) == 6
+    params, config = variants[-1]
+    assert params["C_intermediate_uF"] == 100
+    assert config.C_intermediate_uF == 100
+    assert config.harvester.name == "mppt_opt"
+    assert config.enable_boost  # ⤷ rest is inherited from base
+
+
+def test_vsource_sweep_variants_unknown() -> None:
+    with pytest.raises(ValueError):  # noqa: PT011
+        sweep_variants(VirtualSourceConfig(name="BQ25504"), {"C_storage_uF": [10]})
+
+
+@pytest.mark.parametrize("block_samples_n", [2**20, 33_333])
+def test_vsource_sweep_equals_simulation(file_ivsample: Path, block_samples_n: int) -> None:
+    config = VirtualSourceConfig(name="BQ25504")
+    grid = {"C_intermediate_uF": [1, 10], "V_pwr_good_enable_threshold_mV": [2800, 3200]}
+    target = ResistiveTarget(R_Ohm=1_000, controlled=True)
+    table = simulate_source_sweep(
+        config, grid, target, file_ivsample, processes=3, block_samples_n=block_samples_n
+    )
+    assert len(table) == 4
+    for row, (params, variant) in zip(table, sweep_variants(config, grid)):
+        assert all(row[key] == value for key, value in params.items())
+        e_out_Ws = simulate_source(variant, target, file_ivsample)
+        assert row["e_out_Ws"] == pytest.approx(e_out_Ws, rel=1e-9)
+        assert row["e_inp_Ws"] > 0
+        assert row["uptime_s"] >= 0
+        assert row["brownouts_n"] >= 0
+    assert table[0]["brownouts_n"] > table[2]["brownouts_n"]  # ⤷ small capacitor
+
+
+class FailingTarget(ResistiveTarget):
+    def step_chunk(self, *_: object) -> None:
+        raise ZeroDivisionError
+
+
+def test_vsource_sweep_worker_fails(file_ivsample: Path) -> None:
+    with pytest.raises(RuntimeError):
+        simulate_source_sweep(
+            VirtualSourceConfig(name="direct"),
+            {"V_input_drop_mV": [0, 100]},
+            FailingTarget(R_Ohm=100),
+            file_ivsample,
+            processes=2,
+        )
+
+
+class KillingTarget(ResistiveTarget):
+    def step_chunk(self, *_: object) -> None:
+        os.kill(os.getpid(), signal.SIGKILL)  # ⤷ like the OOM-killer, no except-branch
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs SIGKILL")
+def test_vsource_sweep_worker_killed(file_ivsample: Path) -> None:
+    with pytest.raises(RuntimeError, match="-9"):
+        simulate_source_sweep(
+            VirtualSourceConfig(name="direct"),
+            {"V_input_drop_mV": [0, 100]},
+            KillingTarget(R_Ohm=100),
+            file_ivsample,
+            processes=2,
+        )
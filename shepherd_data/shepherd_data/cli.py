@@ -1,15 +1,21 @@
 """Command definitions for CLI."""
 
 import logging
+import logging.handlers
+import queue
 import sys
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import suppress
 from datetime import datetime
 from pathlib import Path
+from typing import Any
 from typing import Optional
 
 import click
 import pydantic
 
+from shepherd_core import Writer
 from shepherd_core import get_verbose_level
 from shepherd_core import local_tz
 from shepherd_core.logger import set_log_verbose_level
@@ -40,6 +46,110 @@ def path_to_flist(data_path: Path, *, recurse: bool = False) -> list[Path]:
     return h5files
 
 
+def _init_worker(level: int) -> None:
+    logger.setLevel(level)
+
+
+def _process_file(
+    fn: Callable[..., Any],
+    file: Path,
+    errors: tuple[type[Exception], ...],
+    kwargs: dict[str, Any],
+) -> tuple[bool, Any]:
+    try:
+        return True, fn(file, **kwargs)
+    except errors:
+        logger.exception("ERROR: Will skip file. It caused an exception.")
+        return False, None
+
+
+def _process_file_buffered(
+    fn: Callable[..., Any],
+    file: Path,
+    errors: tuple[type[Exception], ...],
+    kwargs: dict[str, Any],
+) -> tuple[bool, Any, list[logging.LogRecord]]:
+    """Run in worker-process, log-records get collected instead of emitted."""
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    logger_root = logging.getLogger()
+    handlers = logger_root.handlers
+    logger_root.handlers = [logging.handlers.QueueHandler(records)]
+    # ⤷ QueueHandler already renders messages & exceptions, so records can be pickled
+    try:
+        success, result = _process_file(fn, file, errors, kwargs)
+    finally:
+        logger_root.handlers = handlers
+    records_list = []
+    while not records.empty():
+        records_list.append(records.get())
+    return success, result, records_list
+
+
+def process_files(
+    files: list[Path],
+    fn: Callable[..., Any],
+    *,
+    jobs: int = 1,
+    errors: tuple[type[Exception], ...] = (TypeError,),
+    **kwargs: Any,
+) -> dict[Path, Any]:
+    """Apply fn(file, **kwargs) to every file, optionally with a pool of worker-processes.
+
+    Logs of workers are buffered and replayed in the order of files.
+    Files raising one of the expected errors get skipped and summarized at the end.
+
+    :param files: list of files to process
+    :param fn: picklable function (module-level) that gets called for every file
+    :param jobs: number of worker-processes, 1 processes the files in this process
+    :param errors: exceptions that only cause the file to be skipped
+    :param kwargs: passed to fn
+    :return: results of fn for every file that was processed successfully
+    """
+    results: dict[Path, Any] = {}
+    failed: list[Path] = []
+    if jobs > 1 and len(files) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(files)),
+            initializer=_init_worker,
+            initargs=(logger.level,),
+        ) as executor:
+            futures = [
+                executor.submit(_process_file_buffered, fn, file, errors, kwargs) for file in files
+            ]
+            for file, future in zip(files, futures):
+                success, result, records = future.result()
+                for record in records:
+                    logging.getLogger(record.name).handle(record)
+                if success:
+                    results[file] = result
+                else:
+                    failed.append(file)
+    else:
+        for file in files:
+            success, result = _process_file(fn, file, errors, kwargs)
+            if success:
+                results[file] = result
+            else:
+                failed.append(file)
+    if len(failed) > 0:
+        logger.error(
+            "%d of %d files failed: %s",
+            len(failed),
+            len(files),
+            ", ".join(file.name for file in failed),
+        )
+    return results
+
+
+option_jobs = click.option(
+    "--jobs",
+    "-j",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of files to process in parallel (worker-processes)",
+)
+
+
 @click.group(context_settings={"help_option_names": ["-h", "--help"], "obj": {}})
 @click.option(
     "--verbose",
@@ -72,26 +182,56 @@ def version() -> None:
     is_flag=True,
     help="Also consider files in sub-folders",
 )
-def validate(in_data: Path, *, recurse: bool = False) -> None:
+@option_jobs
+def validate(in_data: Path, jobs: int, *, recurse: bool = False) -> None:
     """Validate a file or directory containing shepherd-recordings."""
     files = path_to_flist(in_data, recurse=recurse)
     verbose_level = get_verbose_level()  # TODO: should be stored and passed in ctx
-    valid_dir = True
-    for file in files:
-        logger.info("Validating '%s' ...", file.name)
-        valid_file = True
-        try:
-            with Reader(file, verbose=verbose_level > 2) as shpr:
-                valid_file &= shpr.is_valid()
-                valid_file &= shpr.check_timediffs()
-                valid_dir &= valid_file
-                if not valid_file:
-                    logger.error(" -> File '%s' was NOT valid", file.name)
-        except TypeError:
-            logger.exception("ERROR: Will skip file. It caused an exception.")
+    results = process_files(files, _validate_file, jobs=jobs, verbose_level=verbose_level)
+    valid_dir = all(results.values())
     sys.exit(int(not valid_dir))
 
 
+def _validate_file(file: Path, verbose_level: int) -> bool:
+    logger.info("Validating '%s' ...", file.name)
+    valid_file = True
+    with Reader(file, verbose=verbose_level > 2) as shpr:
+        valid_file &= shpr.is_valid()
+        valid_file &= shpr.check_timediffs()
+        if not valid_file:
+            logger.error(" -> File '%s' was NOT valid", file.name)
+    return valid_file
+
+
+@cli.command(short_help="Adds statistics-index & plot-pyramid to file or directory")
+@click.argument("in_data", type=click.Path(exists=True, resolve_path=True))
+@click.option(
+    "--recurse",
+    "-a",
+    is_flag=True,
+    help="Also consider files in sub-folders",
+)
+@option_jobs
+def index(in_data: Path, jobs: int, *, recurse: bool = False) -> None:
+    """Add per-chunk statistics & min/max/mean-pyramid to shepherd-recordings.
+
+    This speeds up metadata-extraction and plotting of long recordings.
+    Rerun it after modifying iv-data without the Writer (i.e. with h5py),
+    only a few sampled chunks are checked to detect outdated indices.
+    """
+    files = path_to_flist(in_data, recurse=recurse)
+    verbose_level = get_verbose_level()
+    process_files(files, _index_file, jobs=jobs, verbose_level=verbose_level)
+
+
+def _index_file(file: Path, verbose_level: int) -> None:
+    logger.info("Indexing '%s' ...", file.name)
+    with Writer(file, modify_existing=True, align=False, verbose=verbose_level > 2) as shpw:
+        # ⤷ indexing must not change the iv-data
+        shpw.build_index()
+        shpw.build_pyramid()
+
+
 @cli.command(short_help="Extracts recorded IVTrace and stores it to csv")
 @click.argument("in_data", type=click.Path(exists=True, resolve_path=True))
 @click.option(
@@ -133,6 +273,7 @@ def validate(in_data: Path, *, recurse: bool = False) -> None:
     is_flag=True,
     help="Also consider files in sub-folders",
 )
+@option_jobs
 def extract(
     in_data: Path,
     start: Optional[float],
@@ -140,6 +281,7 @@ def extract(
     ds_factor: float,
     separator: str,
     *,
+    jobs: int,
     raw: bool = False,
     recurse: bool = False,
 ) -> None:
@@ -149,15 +291,35 @@ def extract(
     if not isinstance(ds_factor, (float, int)) or ds_factor < 1:
         ds_factor = 1000
         logger.info("DS-Factor was invalid was reset to 1'000")
-    for file in files:
-        logger.info("Extracting IV-Samples from '%s' ...", file.name)
-        try:
-            with Reader(file, verbose=verbose_level > 2) as shpr:
-                out_file = shpr.cut_and_downsample_to_file(start, end, ds_factor=ds_factor)
-                with Reader(out_file, verbose=verbose_level > 2) as shpd:
-                    shpd.save_csv(shpd["data"], separator, raw=raw)
-        except (TypeError, ValueError):
-            logger.exception("ERROR: Will skip file. It caused an exception.")
+    process_files(
+        files,
+        _extract_file,
+        jobs=jobs,
+        errors=(TypeError, ValueError),
+        verbose_level=verbose_level,
+        start=start,
+        end=end,
+        ds_factor=ds_factor,
+        separator=separator,
+        raw=raw,
+    )
+
+
+def _extract_file(
+    file: Path,
+    verbose_level: int,
+    *,
+    start: Optional[float],
+    end: Optional[float],
+    ds_factor: float,
+    separator: str,
+    raw: bool,
+) -> None:
+    logger.info("Extracting IV-Samples from '%s' ...", file.name)
+    with Reader(file, verbose=verbose_level > 2) as shpr:
+        out_file = shpr.cut_and_downsample_to_file(start, end, ds_factor=ds_factor)
+        with Reader(out_file, verbose=verbose_level > 2) as shpd:
+            shpd.save_csv(shpd["data"], separator, raw=raw)
 
 
 @cli.command(
@@ -183,40 +345,48 @@ def extract(
     is_flag=True,
     help="Also extract system logs like kernel, ",
 )
+@option_jobs
 def extract_meta(
-    in_data: Path, separator: str, *, recurse: bool = False, debug: bool = False
+    in_data: Path, separator: str, jobs: int, *, recurse: bool = False, debug: bool = False
 ) -> None:
     """Extract metadata and logs from file or directory containing shepherd-recordings."""
     files = path_to_flist(in_data, recurse=recurse)
     verbose_level = get_verbose_level()
-    for file in files:
-        logger.info("Extracting metadata & logs from '%s' ...", file.name)
-        # TODO: add default exports (user-centric) and allow specifying --all or specific ones
-        # TODO: could also be combined with other extractors (just have one)
-        try:
-            with Reader(file, verbose=verbose_level > 2) as shpr:
-                shpr.save_metadata()
-                if "uart" in shpr.h5file:
-                    shpr.save_log(shpr["uart"])
-
-                logs_depr = ["shepherd-log", "dmesg", "exceptions"]
-                logs_meta = ["sheep", "kernel", "ntp"]
-                for element in logs_meta + logs_depr:
-                    if element in shpr.h5file:
-                        if debug:
-                            shpr.save_log(shpr[element])
-                        # TODO: allow omitting timestamp,
-                        #       also test if segmented uart is correctly written
-                        shpr.warn_logs(element, show=True)
-                if not debug:
-                    continue
-                csv_depr = ["sysutil", "timesync"]
-                csv_meta = ["ptp", "phc2sys", "sys_util", "pru_util"]
-                for element in csv_meta + csv_depr:
-                    if element in shpr.h5file:
-                        shpr.save_csv(shpr[element], separator)
-        except TypeError:
-            logger.exception("ERROR: Will skip file. It caused an exception.")
+    process_files(
+        files,
+        _extract_meta_file,
+        jobs=jobs,
+        verbose_level=verbose_level,
+        separator=separator,
+        debug=debug,
+    )
+
+
+def _extract_meta_file(file: Path, verbose_level: int, separator: str, *, debug: bool) -> None:
+    logger.info("Extracting metadata & logs from '%s' ...", file.name)
+    # TODO: add default exports (user-centric) and allow specifying --all or specific ones
+    # TODO: could also be combined with other extractors (just have one)
+    with Reader(file, verbose=verbose_level > 2) as shpr:
+        shpr.save_metadata()
+        if "uart" in shpr.h5file:
+            shpr.save_log(shpr["uart"])
+
+        logs_depr = ["shepherd-log", "dmesg", "exceptions"]
+        logs_meta = ["sheep", "kernel", "ntp"]
+        for element in logs_meta + logs_depr:
+            if element in shpr.h5file:
+                if debug:
+                    shpr.save_log(shpr[element])
+                # TODO: allow omitting timestamp,
+                #       also test if segmented uart is correctly written
+                shpr.warn_logs(element, show=True)
+        if not debug:
+            return
+        csv_depr = ["sysutil", "timesync"]
+        csv_meta = ["ptp", "phc2sys", "sys_util", "pru_util"]
+        for element in csv_meta + csv_depr:
+            if element in shpr.h5file:
+                shpr.save_csv(shpr[element], separator)
 
 
 @cli.command()
@@ -227,19 +397,20 @@ def extract_meta(
     is_flag=True,
     help="Also consider files in sub-folders",
 )
-def extract_uart(in_data: Path, *, recurse: bool = False) -> None:
+@option_jobs
+def extract_uart(in_data: Path, jobs: int, *, recurse: bool = False) -> None:
     """Log from file or directory containing shepherd-recordings."""
     files = path_to_flist(in_data, recurse=recurse)
     verbose_level = get_verbose_level()
-    for file in files:
-        logger.info("Extracting UART-log from '%s' ...", file.name)
-        try:
-            with Reader(file, verbose=verbose_level > 2) as shpr:
-                shpr.save_metadata()
-                if "uart" in shpr.h5file:
-                    shpr.save_log(shpr["uart"])
-        except TypeError:
-            logger.exception("ERROR: Will skip file. It caused an exception.")
+    process_files(files, _extract_uart_file, jobs=jobs, verbose_level=verbose_level)
+
+
+def _extract_uart_file(file: Path, verbose_level: int) -> None:
+    logger.info("Extracting UART-log from '%s' ...", file.name)
+    with Reader(file, verbose=verbose_level > 2) as shpr:
+        shpr.save_metadata()
+        if "uart" in shpr.h5file:
+            shpr.save_log(shpr["uart"])
 
 
 @cli.command(
@@ -252,35 +423,36 @@ def extract_uart(in_data: Path, *, recurse: bool = False) -> None:
     is_flag=True,
     help="Also consider files in sub-folders",
 )
-def decode_uart(in_data: Path, *, recurse: bool = False) -> None:
+@option_jobs
+def decode_uart(in_data: Path, jobs: int, *, recurse: bool = False) -> None:
     """Decode UART from GPIO-trace in file or directory containing shepherd-recordings."""
     files = path_to_flist(in_data, recurse=recurse)
     verbose_level = get_verbose_level()
-    for file in files:
-        logger.info("Extracting uart from gpio-trace from from '%s' ...", file.name)
-        try:
-            with Reader(file, verbose=verbose_level > 2) as shpr:
-                # TODO: move into separate fn OR add to h5-file and use .save_log(), ALSO TEST
-                lines = shpr.gpio_to_uart()
-                if lines is None:
-                    continue
-                # TODO: could also add parameter to get symbols instead of lines
-                log_path = Path(file).with_suffix(".uart_from_wf.log")
-                if log_path.exists():
-                    logger.info("File already exists, will skip '%s'", log_path.name)
-                    continue
-
-                with log_path.open("w") as log_file:
-                    for line in lines:
-                        with suppress(TypeError):
-                            timestamp = datetime.fromtimestamp(float(line[0]), tz=local_tz())
-                            log_file.write(timestamp.strftime("%Y-%m-%d %H:%M:%S.%f") + ":")
-                            # TODO: allow to skip Timestamp and export raw text
-                            log_file.write(f"\t{str.encode(line[1])}")
-                            # TODO: does this produce "\tb'abc'"?
-                            log_file.write("\n")
-        except TypeError:
-            logger.exception("ERROR: Will skip file. It caused an exception.")
+    process_files(files, _decode_uart_file, jobs=jobs, verbose_level=verbose_level)
+
+
+def _decode_uart_file(file: Path, verbose_level: int) -> None:
+    logger.info("Extracting uart from gpio-trace from from '%s' ...", file.name)
+    with Reader(file, verbose=verbose_level > 2) as shpr:
+        # TODO: move into separate fn OR add to h5-file and use .save_log(), ALSO TEST
+        lines = shpr.gpio_to_uart()
+        if lines is None:
+            return
+        # TODO: could also add parameter to get symbols instead of lines
+        log_path = Path(file).with_suffix(".uart_from_wf.log")
+        if log_path.exists():
+            logger.info("File already exists, will skip '%s'", log_path.name)
+            return
+
+        with log_path.open("w") as log_file:
+            for line in lines:
+                with suppress(TypeError):
+                    timestamp = datetime.fromtimestamp(float(line[0]), tz=local_tz())
+                    log_file.write(timestamp.strftime("%Y-%m-%d %H:%M:%S.%f") + ":")
+                    # TODO: allow to skip Timestamp and export raw text
+                    log_file.write(f"\t{str.encode(line[1])}")
+                    # TODO: does this produce "\tb'abc'"?
+                    log_file.write("\n")
 
 
 @cli.command(short_help="Extracts gpio-trace from file or directory containing shepherd-recordings")
@@ -298,19 +470,22 @@ def decode_uart(in_data: Path, *, recurse: bool = False) -> None:
     is_flag=True,
     help="Also consider files in sub-folders",
 )
-def extract_gpio(in_data: Path, separator: str, *, recurse: bool = False) -> None:
+@option_jobs
+def extract_gpio(in_data: Path, separator: str, jobs: int, *, recurse: bool = False) -> None:
     """Extract UART from gpio-trace in file or directory containing shepherd-recordings."""
     files = path_to_flist(in_data, recurse=recurse)
     verbose_level = get_verbose_level()
-    for file in files:
-        logger.info("Extracting gpio-trace from from '%s' ...", file.name)
-        try:
-            with Reader(file, verbose=verbose_level > 2) as shpr:
-                wfs = shpr.gpio_to_waveforms()
-                for name, wf in wfs.items():
-                    shpr.waveform_to_csv(name, wf, separator)
-        except TypeError:
-            logger.exception("ERROR: Will skip file. It caused an exception.")
+    process_files(
+        files, _extract_gpio_file, jobs=jobs, verbose_level=verbose_level, separator=separator
+    )
+
+
+def _extract_gpio_file(file: Path, verbose_level: int, separator: str) -> None:
+    logger.info("Extracting gpio-trace from from '%s' ...", file.name)
+    with Reader(file, verbose=verbose_level > 2) as shpr:
+        wfs = shpr.gpio_to_waveforms()
+        for name, wf in wfs.items():
+            shpr.waveform_to_csv(name, wf, separator)
 
 
 @cli.command(
@@ -351,6 +526,18 @@ def extract_gpio(in_data: Path, separator: str, *, recurse: bool = False) -> Non
     is_flag=True,
     help="Also consider files in sub-folders",
 )
+@click.option(
+    "--cascade",
+    "-c",
+    is_flag=True,
+    help="Create all files in one pass, each factor gets derived from the previous one",
+)
+@click.option(
+    "--resample",
+    is_flag=True,
+    help="Resample to exactly the given sample-rate (also allows upsampling)",
+)
+@option_jobs
 def downsample(
     in_data: Path,
     ds_factor: Optional[float],
@@ -358,27 +545,66 @@ def downsample(
     start: Optional[float],
     end: Optional[float],
     *,
+    jobs: int,
     recurse: bool = False,
+    cascade: bool = False,
+    resample: bool = False,
 ) -> None:
     """Create an array of down-sampled files from file or dir containing shepherd-recordings."""
+    if resample and sample_rate is None:
+        raise click.UsageError("--resample needs a --sample-rate")
     files = path_to_flist(in_data, recurse=recurse)
     verbose_level = get_verbose_level()
-    for file in files:
-        try:
-            with Reader(file, verbose=verbose_level > 2) as shpr:
-                if ds_factor is None and sample_rate is not None and sample_rate >= 1:
-                    ds_factor = shpr.samplerate_sps / sample_rate
-
-                if isinstance(ds_factor, (float, int)) and ds_factor >= 1:
-                    ds_list = [ds_factor]
-                else:
-                    ds_list = [5, 25, 100, 500, 2_500, 10_000, 50_000, 250_000, 1_000_000]
+    process_files(
+        files,
+        _downsample_file,
+        jobs=jobs,
+        errors=(TypeError, ValueError),
+        verbose_level=verbose_level,
+        ds_factor=ds_factor,
+        sample_rate=sample_rate,
+        start=start,
+        end=end,
+        cascade=cascade,
+        resample=resample,
+        shard_jobs=jobs if len(files) == 1 else 1,
+        # ⤷ a single file gets split into shards that are downsampled in parallel
+    )
+
+
+def _downsample_file(
+    file: Path,
+    verbose_level: int,
+    *,
+    ds_factor: Optional[float],
+    sample_rate: Optional[int],
+    start: Optional[float],
+    end: Optional[float],
+    cascade: bool,
+    resample: bool = False,
+    shard_jobs: int = 1,
+) -> None:
+    with Reader(file, verbose=verbose_level > 2) as shpr:
+        shpr.jobs = shard_jobs
+        if resample and sample_rate is not None:
+            path_file = shpr.cut_and_resample_to_file(start, end, sample_rate)
+            logger.info("Created %s", path_file.name)
+            return
+        if ds_factor is None and sample_rate is not None and sample_rate >= 1:
+            ds_factor = shpr.samplerate_sps / sample_rate
+
+        if isinstance(ds_factor, (float, int)) and ds_factor >= 1:
+            ds_list = [ds_factor]
+        else:
+            ds_list = [5, 25, 100, 500, 2_500, 10_000, 50_000, 250_000, 1_000_000]
 
-                for _factor in ds_list:
-                    path_file = shpr.cut_and_downsample_to_file(start, end, _factor)
-                    logger.info("Created %s", path_file.name)
-        except (TypeError, ValueError):  # noqa: PERF203
-            logger.exception("ERROR: Will skip file. It caused an exception.")
+        if cascade:
+            for path_file in shpr.cut_and_downsample_to_files(start, end, ds_list):
+                logger.info("Created %s", path_file.name)
+            return
+        for _factor in ds_list:
+            path_file = shpr.cut_and_downsample_to_file(start, end, _factor)
+            logger.info("Created %s", path_file.name)
 
 
 @cli.command(short_help="Plots IV-trace from file or directory containing shepherd-recordings")
@@ -429,6 +655,7 @@ def downsample(
     is_flag=True,
     help="Also consider files in sub-folders",
 )
+@option_jobs
 def plot(
     in_data: Path,
     start: Optional[float],
@@ -436,6 +663,7 @@ def plot(
     width: int,
     height: int,
     *,
+    jobs: int,
     multiplot: bool,
     only_power: bool,
     recurse: bool = False,
@@ -444,20 +672,20 @@ def plot(
     files = path_to_flist(in_data, recurse=recurse)
     verbose_level = get_verbose_level()
     multiplot = multiplot and len(files) > 1
-    data = []
-    for file in files:
-        logger.info("Generating plot for '%s' ...", file.name)
-        try:
-            with Reader(file, verbose=verbose_level > 2) as shpr:
-                if multiplot:
-                    date = shpr.generate_plot_data(start, end, relative_timestamp=True)
-                    if date is None:
-                        continue
-                    data.append(date)
-                else:
-                    shpr.plot_to_file(start, end, width, height, only_pwr=only_power)
-        except TypeError:
-            logger.exception("ERROR: Will skip file. It caused an exception.")
+    results = process_files(
+        files,
+        _plot_file,
+        jobs=jobs,
+        verbose_level=verbose_level,
+        start=start,
+        end=end,
+        width=width,
+        height=height,
+        multiplot=multiplot,
+        only_power=only_power,
+    )
+    # ⤷ multiplot: plot-data of all files is gathered (in parallel) and plotted at once
+    data = [date for date in results.values() if date is not None]
     if multiplot:
         logger.info("Got %d datasets to plot", len(data))
         mpl_path = Reader.multiplot_to_file(data, in_data, width, height, only_pwr=only_power)
@@ -467,6 +695,25 @@ def plot(
             logger.info("Plot not generated, path was already in use.")
 
 
+def _plot_file(
+    file: Path,
+    verbose_level: int,
+    *,
+    start: Optional[float],
+    end: Optional[float],
+    width: int,
+    height: int,
+    multiplot: bool,
+    only_power: bool,
+) -> Optional[dict]:
+    logger.info("Generating plot for '%s' ...", file.name)
+    with Reader(file, verbose=verbose_level > 2) as shpr:
+        if multiplot:
+            return shpr.generate_plot_data(start, end, relative_timestamp=True)
+        shpr.plot_to_file(start, end, width, height, only_pwr=only_power)
+    return None
+
+
 if __name__ == "__main__":
     logger.info("This File should not be executed like this ...")
     cli()
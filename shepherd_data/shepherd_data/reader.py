@@ -1,9 +1,13 @@
 """Reader-Baseclass for opening shepherds hdf5-files."""
 
+import contextlib
 import math
 from collections.abc import Mapping
 from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from fractions import Fraction
+from functools import partial
 from pathlib import Path
 from typing import Optional
 from typing import Union
@@ -11,6 +15,7 @@ from typing import Union
 import h5py
 import numpy as np
 from matplotlib import pyplot as plt
+from tqdm import tqdm
 from tqdm import trange
 
 from shepherd_core import Reader as CoreReader
@@ -19,8 +24,291 @@ from shepherd_core import local_tz
 from shepherd_core.data_models import EnergyDType
 from shepherd_core.logger import get_verbose_level
 from shepherd_core.logger import logger
+from shepherd_core.time_segments import TIME_SEGMENTS
+from shepherd_core.time_segments import time_dataset
 
-# import samplerate  # noqa: ERA001, TODO: just a test-fn for now
+
+def timestamps_to_str(timestamps_s: np.ndarray) -> list[str]:
+    """Vectorized version of datetime.fromtimestamp(ts, tz).strftime("%Y-%m-%d %H:%M:%S.%f").
+
+    The fractional part is rounded half-even to microseconds, like CPython does,
+    so the output matches the element-wise version byte for byte.
+    Only the whole seconds get converted by datetime (once per unique second).
+    """
+    fraction, seconds = np.modf(np.asarray(timestamps_s, dtype=np.float64))
+    micros = np.rint(fraction * 1e6)
+    seconds[micros >= 1e6] += 1
+    micros[micros >= 1e6] -= 1e6
+    seconds[micros < 0] -= 1
+    micros[micros < 0] += 1e6
+    seconds_unique, seconds_idx = np.unique(seconds, return_inverse=True)
+    prefixes = [
+        datetime.fromtimestamp(int(second), tz=local_tz()).strftime("%Y-%m-%d %H:%M:%S")
+        for second in seconds_unique.tolist()
+    ]
+    return [
+        f"{prefixes[_idx]}.{_us:06d}"
+        for _idx, _us in zip(seconds_idx.tolist(), micros.astype(int).tolist())
+    ]
+
+
+def values_to_str(values: np.ndarray, separator: str = ";") -> list[str]:
+    """Convert a block of dataset-values to strings, one per row.
+
+    Matches str() of the single numpy-element (python-types are only used
+    for dtypes where the string-representation is identical).
+    Rows of 2D-datasets get joined by the separator.
+    """
+    if values.ndim > 1:
+        columns = [values_to_str(values[:, _col]) for _col in range(values.shape[1])]
+        return list(map(separator.join, zip(*columns)))
+    if values.dtype.kind in "biu" or values.dtype == np.float64:
+        return list(map(str, values.tolist()))
+    return list(map(str, values))
+
+
+def log_entries_to_str(dataset: h5py.Dataset, start: int, end: int) -> list[str]:
+    """Read a block of log-entries and convert them to strings, one per entry.
+
+    Faulty (variable-length) elements let the whole block-read fail,
+    so only that block falls back to reading element by element.
+    """
+    try:
+        values = dataset[start:end]
+    except OSError:
+        entries: list[str] = []
+        for idx in range(start, end):
+            try:
+                entries.append(str(dataset[idx]))
+            except OSError:  # noqa: PERF203
+                entries.append("[[[ extractor - faulty element ]]]")
+        return entries
+    if values.ndim > 1:
+        return list(map(str, values))
+    return values_to_str(values)
+
+
+DOWNSAMPLE_WARMUP_PERIODS: int = 64
+# ⤷ impulse-response of the filter decays below 1e-12 within ~46 periods of the factor
+DOWNSAMPLE_SHARD_WARMUPS: int = 4
+# ⤷ min length of a shard in warm-ups, limits reading the warm-up to +25 %
+
+
+def downsample_filter(ds_factor: float) -> np.ndarray:
+    """Design the 8th order butterworth filter (second-order sections) for downsampling.
+
+    note: cheby1 does not work well for static outputs
+    (2.8V can become 2.0V for constant buck-converters)
+    """
+    from scipy import signal  # here due to massive delay
+
+    return signal.iirfilter(
+        N=8,
+        Wn=1 / max(1.1, ds_factor),
+        btype="lowpass",
+        output="sos",
+        ftype="butter",
+    )
+
+
+def downsample_prime(filter_: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Prime the filter-state with the mean of the values to avoid starting from 0."""
+    from scipy import signal  # here due to massive delay
+
+    values = values.copy()
+    values[:] = values.mean()
+    _, state = signal.sosfilt(filter_, values, zi=np.zeros((filter_.shape[0], 2)))
+    return state
+
+
+def downsample_shard(
+    file_path: Path,
+    dataset: str,
+    start_n: int,
+    end_n: int,
+    warmup_n: int,
+    *,
+    ds_factor: int,
+    prime_n: int,
+    is_time: bool,
+) -> np.ndarray:
+    """Downsample a range of a dataset, worker of Reader.downsample() with jobs > 1.
+
+    The filter gets primed on the first samples and then runs over a warm-up
+    region in front of the range, so its state is settled when the range starts.
+    Without warm-up (first shard) this is identical to the sequential version.
+    """
+    from scipy import signal  # here due to massive delay
+
+    with h5py.File(file_path, "r") as h5file:
+        data = h5file[dataset][start_n - warmup_n : end_n]
+    if not is_time and ds_factor > 1:
+        filter_ = downsample_filter(ds_factor)
+        state = downsample_prime(filter_, data[:prime_n])
+        data, _ = signal.sosfilt(filter_, data, zi=state)
+    return data[warmup_n::ds_factor]
+
+
+class DecimationStage:
+    """Anti-aliasing filter & decimation for one step of a downsampling-cascade.
+
+    Filter-states and the decimation-phase are kept between calls,
+    so the iv-data can be streamed block by block.
+
+    Args:
+    ----
+        ratio: decimation-factor of this stage
+        prime_samples_n: samples used to prime the filter-state (mean of first block)
+
+    """
+
+    def __init__(self, ratio: int, prime_samples_n: int = 10_000) -> None:
+        self.ratio: int = ratio
+        self.prime_samples_n: int = prime_samples_n
+        self._filter = downsample_filter(ratio)
+        self._states: list[Optional[np.ndarray]] = [None, None]
+        self._phase: int = 0
+        # ⤷ position of next sample to keep, relative to start of next block
+
+    def process(
+        self, time: np.ndarray, voltage: np.ndarray, current: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Filter voltage & current and decimate all (time is only decimated)."""
+        from scipy import signal  # here due to massive delay
+
+        if time.shape[0] < 1 or self.ratio < 2:
+            return time, voltage, current
+        values_filtered = []
+        for idx, values in enumerate((voltage, current)):
+            if self._states[idx] is None:
+                # prime the state to avoid starting from 0
+                level = np.mean(values[: self.prime_samples_n])
+                self._states[idx] = signal.sosfilt_zi(self._filter) * level
+            values_new, self._states[idx] = signal.sosfilt(
+                self._filter, values, zi=self._states[idx]
+            )
+            values_filtered.append(values_new)
+        phase = self._phase
+        self._phase = (phase - time.shape[0]) % self.ratio
+        return (
+            time[phase :: self.ratio],
+            values_filtered[0][phase :: self.ratio],
+            values_filtered[1][phase :: self.ratio],
+        )
+
+    @staticmethod
+    def to_raw(values: np.ndarray, dtype: np.dtype) -> np.ndarray:
+        """Round filtered values and limit them to the range of the (unsigned) raw dtype."""
+        return np.clip(np.rint(values), 0, np.iinfo(dtype).max).astype(dtype)
+
+
+def resample_ratio(samplerate_src: float, samplerate_dst: float) -> tuple[int, int]:
+    """Approximate the ratio of sample-rates by a fraction up / down (limited to 1000 phases)."""
+    ratio = Fraction(samplerate_dst / samplerate_src).limit_denominator(1000)
+    if ratio <= 0:
+        raise ValueError("Ratio of sample-rates is too small")
+    return ratio.numerator, ratio.denominator
+
+
+def resample_timestamps(time: np.ndarray, positions: np.ndarray, interval: float) -> np.ndarray:
+    """Interpolate raw timestamps at (fractional) sample-positions.
+
+    Calculation is relative to the first timestamp, as float64 can't resolve ns of epoch-time.
+    Positions past the last timestamp get extrapolated with the (raw) sample-interval.
+    """
+    time_rel = (time.astype(np.int64) - np.int64(time[0])).astype(np.float64)
+    result = np.interp(positions, np.arange(time.shape[0]), time_rel)
+    beyond = positions > time.shape[0] - 1
+    result[beyond] = time_rel[-1] + (positions[beyond] - (time.shape[0] - 1)) * interval
+    return (np.rint(result).astype(np.int64) + np.int64(time[0])).astype(time.dtype)
+
+
+class PolyphaseResampler:
+    """Streaming version of scipy.signal.resample_poly() that carries its state across blocks.
+
+    Input gets fed block by block and only the history needed by the FIR-filter is kept,
+    so memory stays bounded and the output is identical to resampling all data at once.
+    In contrast to resample_poly() the signal gets extended with its first & last value
+    instead of zeros, avoiding transients at the borders.
+
+    Args:
+    ----
+        up: upsampling-factor
+        down: downsampling-factor
+
+    """
+
+    def __init__(self, up: int, down: int) -> None:
+        from scipy import signal  # here due to massive delay
+
+        divisor = math.gcd(up, down)
+        self.up: int = up // divisor
+        self.down: int = down // divisor
+        # same filter as resample_poly()
+        max_rate = max(self.up, self.down)
+        self._half_len: int = 10 * max_rate if max_rate > 1 else 0
+        if max_rate > 1:
+            self._filter: np.ndarray = (
+                signal.firwin(2 * self._half_len + 1, 1 / max_rate, window=("kaiser", 5.0))
+                * self.up
+            )
+        else:  # ⤷ equal rates, pass-through
+            self._filter = np.ones(1)
+        self._history: np.ndarray = np.empty((0,))
+        self._history_pos: int = 0  # input-index of first sample in history
+        self._input_n: int = 0
+        self._output_n: int = 0
+        self._first: Optional[float] = None
+
+    def _input_start(self, output_pos: int) -> int:
+        """First input-index that contributes to the output at given position."""
+        pos = output_pos * self.down + self._half_len - self._filter.shape[0] + 1
+        return -(-pos // self.up)
+
+    def process(self, values: np.ndarray, *, final: bool = False) -> np.ndarray:
+        """Feed next block of input, returns all outputs that can be calculated.
+
+        :param values: next block of input-samples
+        :param final: last block, output gets completed
+        :return: resampled values
+        """
+        from scipy import signal  # here due to massive delay
+
+        values = np.asarray(values, dtype=np.float64)
+        if self._first is None and values.shape[0] > 0:
+            self._first = values[0]
+        self._history = np.concatenate((self._history, values))
+        self._input_n += values.shape[0]
+        if self._first is None:
+            return np.empty((0,))
+        if final:
+            output_end = -(-self._input_n * self.up // self.down)
+        else:
+            output_end = max((self._input_n * self.up - 1 - self._half_len) // self.down + 1, 0)
+        if output_end <= self._output_n:
+            return np.empty((0,))
+        # window of input with all contributors, its start has to fit the output-phase
+        input_start = self._input_start(self._output_n)
+        if self.down > 1:
+            phase = (input_start * self.up - self._half_len) % self.down
+            input_start -= (phase * pow(self.up, -1, self.down)) % self.down
+        input_end = ((output_end - 1) * self.down + self._half_len) // self.up + 1
+        pad_start = max(self._history_pos - input_start, 0)
+        pad_end = max(input_end - self._input_n, 0)
+        window = self._history[max(input_start - self._history_pos, 0) : input_end]
+        if pad_start or pad_end:
+            window = np.concatenate(
+                (np.full(pad_start, self._first), window, np.full(pad_end, self._history[-1]))
+            )
+        offset = (self._half_len - input_start * self.up) // self.down
+        result = signal.upfirdn(self._filter, window, self.up, self.down)
+        result = result[offset + self._output_n : offset + output_end]
+        self._output_n = output_end
+        # drop history that is not needed anymore
+        history_start = min(max(self._input_start(output_end), self._history_pos), self._input_n)
+        self._history = self._history[history_start - self._history_pos :]
+        self._history_pos = history_start
+        return result
 
 
 class Reader(CoreReader):
@@ -33,6 +321,9 @@ class Reader(CoreReader):
 
     """
 
+    PLOT_POINTS_N: int = 100_000
+    # ⤷ point-budget for plots from a pyramid, min/max-envelopes keep short spikes visible
+
     def __init__(
         self,
         file_path: Path,
@@ -49,7 +340,11 @@ class Reader(CoreReader):
         :param raw: don't convert to si-units
         :return: number of processed entries
         """
-        if ("time" not in h5_group) or (h5_group["time"].shape[0] < 1):
+        if ("time" not in h5_group) and (TIME_SEGMENTS not in h5_group):
+            self._logger.warning("%s is empty, no csv generated", h5_group.name)
+            return 0
+        ds_time = time_dataset(h5_group)
+        if ds_time.shape[0] < 1:
             self._logger.warning("%s is empty, no csv generated", h5_group.name)
             return 0
         if not isinstance(self.file_path, Path):
@@ -59,19 +354,26 @@ class Reader(CoreReader):
             self._logger.info("File already exists, will skip '%s'", csv_path.name)
             return 0
         datasets: list[str] = [
-            str(key) for key in h5_group if isinstance(h5_group[key], h5py.Dataset)
+            str(key)
+            for key in h5_group
+            if isinstance(h5_group[key], h5py.Dataset) and key not in {"time", TIME_SEGMENTS}
         ]
-        datasets.remove("time")
         datasets = ["time", *datasets]
         separator = separator.strip().ljust(2)
         header_elements: list[str] = [
-            str(h5_group[key].attrs["description"]).replace(", ", separator) for key in datasets
+            str(ds_time.attrs["description"]).replace(", ", separator)
+            if key == "time"
+            else str(h5_group[key].attrs["description"]).replace(", ", separator)
+            for key in datasets
         ]
         header: str = separator.join(header_elements)
+        samples_n = ds_time.shape[0]
+        rows_n = 10 * self.CHUNK_SAMPLES_N
+        # ⤷ rows per block, keeps the string-buffer well below 100 MB
         with csv_path.open("w", encoding="utf-8-sig") as csv_file:
             self._logger.info("CSV-Generator will save '%s' to '%s'", h5_group.name, csv_path.name)
             csv_file.write(header + "\n")
-            ts_gain = h5_group["time"].attrs.get("gain", 1e-9)
+            ts_gain = ds_time.attrs.get("gain", 1e-9)
             # for converting data to si - if raw=false
             gains: dict[str, float] = {
                 key: h5_group[key].attrs.get("gain", 1.0) for key in datasets[1:]
@@ -79,18 +381,22 @@ class Reader(CoreReader):
             offsets: dict[str, float] = {
                 key: h5_group[key].attrs.get("offset", 1.0) for key in datasets[1:]
             }
-            for idx, time_ns in enumerate(h5_group["time"][:]):
-                timestamp = datetime.fromtimestamp(time_ns * ts_gain, tz=local_tz())
-                csv_file.write(timestamp.strftime("%Y-%m-%d %H:%M:%S.%f"))
+            for idx in trange(
+                0,
+                samples_n,
+                rows_n,
+                desc=f"csv {h5_group.name}",
+                leave=False,
+                disable=samples_n < 8 * rows_n,
+            ):
+                columns = [timestamps_to_str(ds_time[idx : idx + rows_n] * ts_gain)]
                 for key in datasets[1:]:
-                    values = h5_group[key][idx]
+                    values = h5_group[key][idx : idx + rows_n]
                     if not raw:
                         values = values * gains[key] + offsets[key]
-                    if isinstance(values, np.ndarray):
-                        values = separator.join([str(value) for value in values])
-                    csv_file.write(f"{separator}{values}")
-                csv_file.write("\n")
-        return h5_group["time"][:].shape[0]
+                    columns.append(values_to_str(values, separator))
+                csv_file.write("\n".join(map(separator.join, zip(*columns))) + "\n")
+        return samples_n
 
     def save_log(self, h5_group: h5py.Group, *, add_timestamp: bool = True) -> int:
         """Save dataset from groups as log, optimal for logged kernel- and console-output.
@@ -108,23 +414,31 @@ class Reader(CoreReader):
         if log_path.exists():
             self._logger.info("File already exists, will skip '%s'", log_path.name)
             return 0
-        datasets = [key if isinstance(h5_group[key], h5py.Dataset) else [] for key in h5_group]
+        datasets: list[str] = [
+            str(key) for key in h5_group if isinstance(h5_group[key], h5py.Dataset)
+        ]
         datasets.remove("time")
+        samples_n = h5_group["time"].shape[0]
+        rows_n = self.CHUNK_SAMPLES_N
         with log_path.open("w", encoding="utf-8-sig") as log_file:
             self._logger.info("Log-Generator will save '%s' to '%s'", h5_group.name, log_path.name)
-            for idx, time_ns in enumerate(h5_group["time"][:]):
+            for idx in trange(
+                0,
+                samples_n,
+                rows_n,
+                desc=f"log {h5_group.name}",
+                leave=False,
+                disable=samples_n < 8 * rows_n,
+            ):
+                end = min(idx + rows_n, samples_n)
                 if add_timestamp:
-                    timestamp = datetime.fromtimestamp(time_ns / 1e9, local_tz())
-                    # ⤷ TODO: these .fromtimestamp would benefit from included TZ
-                    log_file.write(timestamp.strftime("%Y-%m-%d %H:%M:%S.%f") + ":")
-                for key in datasets:
-                    try:
-                        message = str(h5_group[key][idx])
-                    except OSError:
-                        message = "[[[ extractor - faulty element ]]]"
-                    log_file.write(f"\t{message}")
-                log_file.write("\n")
-        return h5_group["time"].shape[0]
+                    timestamps = timestamps_to_str(h5_group["time"][idx:end] / 1e9)
+                    columns = [[f"{_ts}:" for _ts in timestamps]]
+                else:
+                    columns = [[""] * (end - idx)]
+                columns += [log_entries_to_str(h5_group[key], idx, end) for key in datasets]
+                log_file.write("\n".join(map("\t".join, zip(*columns))) + "\n")
+        return samples_n
 
     def warn_logs(
         self,
@@ -147,21 +461,18 @@ class Reader(CoreReader):
             min_level,
             limit,
         )
-        for idx, time_ns in enumerate(self.h5file[group_name]["time"][:]):
-            _level = self.h5file[group_name]["level"][idx]
-            if _level < min_level:
-                continue
-            _msg = self.h5file[group_name]["message"][idx]
-            _timestamp = datetime.fromtimestamp(time_ns / 1e9, local_tz())
+        h5_group = self.h5file[group_name]
+        levels = h5_group["level"][:]
+        for idx in np.flatnonzero(levels >= min_level)[:limit].tolist():
+            _level = levels[idx]
+            _msg = log_entries_to_str(h5_group["message"], idx, idx + 1)[0]
+            _timestamp = datetime.fromtimestamp(h5_group["time"][idx] / 1e9, local_tz())
             if _level < 30:
                 self._logger.info("    %s: %s", _timestamp, _msg)
             elif _level < 40:
                 self._logger.warning("    %s: %s", _timestamp, _msg)
             else:
                 self._logger.error("    %s: %s", _timestamp, _msg)
-            limit -= 1
-            if limit < 1:
-                break
         return _count
 
     def downsample(
@@ -186,6 +497,10 @@ class Reader(CoreReader):
         :param ds_factor: sampling-factor
         :param is_time: time is not really down-sampled, but decimated
         :return: resampled h5-dataset or numpy-array
+
+        With self.jobs > 1 datasets of this file get split into shards,
+        that are processed by worker-processes (see _downsample_sharded()).
+        Factors with a filter-warm-up too long for max_elements stay sequential.
         """
         from scipy import signal  # here due to massive delay
 
@@ -212,23 +527,28 @@ class Reader(CoreReader):
         elif isinstance(data_dst, (h5py.Dataset, np.ndarray)):
             data_dst.resize((dest_len,))
 
-        # 8th order butterworth filter for downsampling
-        # note: cheby1 does not work well for static outputs
-        # (2.8V can become 2.0V for constant buck-converters)
-        filter_ = signal.iirfilter(
-            N=8,
-            Wn=1 / max(1.1, ds_factor),
-            btype="lowpass",
-            output="sos",
-            ftype="butter",
-        )
+        if (
+            (self.jobs > 1)
+            and self._reader_opened
+            and isinstance(data_src, h5py.Dataset)
+            and data_src.file == self.h5file
+            and (is_time or self._downsample_shardable(ds_factor))
+        ):
+            output_pos = self._downsample_sharded(
+                data_src, data_dst, start_n, data_len, ds_factor, is_time=is_time
+            )
+            if isinstance(data_dst, np.ndarray):
+                data_dst.resize((output_pos,), refcheck=False)
+            else:
+                data_dst.resize((output_pos,))
+            return data_dst
+
+        filter_ = downsample_filter(ds_factor)
         # filter state - needed for sliced calculation
         f_state = np.zeros((filter_.shape[0], 2))
         # prime the state to avoid starting from 0
         if not is_time and ds_factor > 1:
-            slice_ds = data_src[start_n : start_n + self.CHUNK_SAMPLES_N]
-            slice_ds[:] = slice_ds[:].mean()
-            slice_ds, f_state = signal.sosfilt(filter_, slice_ds, zi=f_state)
+            f_state = downsample_prime(filter_, data_src[start_n : start_n + self.CHUNK_SAMPLES_N])
 
         output_pos = 0
         for _iter in trange(
@@ -248,7 +568,7 @@ class Reader(CoreReader):
             data_dst[output_pos : output_pos + slice_len] = slice_ds[:slice_len]
             # workaround to allow processing last slice (often smaller than expected),
             # wanted: [_iter * chunk_size_out : (_iter + 1) * chunk_size_out]
-            # this prevents future parallel processing!
+            # ⤷ the sharded version uses fixed offsets instead
             output_pos += slice_len
         if isinstance(data_dst, np.ndarray):
             data_dst.resize((output_pos,), refcheck=False)
@@ -256,20 +576,85 @@ class Reader(CoreReader):
             data_dst.resize((output_pos,))
         return data_dst
 
-    def cut_and_downsample_to_file(
+    def _downsample_shardable(self, ds_factor: int) -> bool:
+        """Check if shards of some warm-ups in length fit into memory (max_elements).
+
+        Otherwise the warm-up would dominate the reads and the sequential version is faster.
+        """
+        warmup_n = DOWNSAMPLE_WARMUP_PERIODS * ds_factor
+        return DOWNSAMPLE_SHARD_WARMUPS * warmup_n <= self.max_elements
+
+    def _downsample_shards(
+        self, start_n: int, data_len: int, ds_factor: int, *, is_time: bool
+    ) -> tuple[range, list[int], list[int]]:
+        """Split the source into shards, see _downsample_sharded().
+
+        :return: start, end & warm-up (samples in front of the start) of each shard
+        """
+        shard_periods = math.ceil(data_len / (4 * self.jobs * ds_factor))
+        # ⤷ some shards per worker to balance the load, limited by RAM & priming-length
+        shard_periods = max(shard_periods, DOWNSAMPLE_SHARD_WARMUPS * DOWNSAMPLE_WARMUP_PERIODS)
+        shard_periods = min(shard_periods, max(self.max_elements // ds_factor, 1))
+        shard_periods = max(shard_periods, math.ceil(self.CHUNK_SAMPLES_N / ds_factor))
+        shard_len = shard_periods * ds_factor
+        starts = range(start_n, start_n + data_len, shard_len)
+        ends = [min(_start + shard_len, start_n + data_len) for _start in starts]
+        warmup_n = 0 if is_time else DOWNSAMPLE_WARMUP_PERIODS * ds_factor
+        # ⤷ time is only decimated, no filter to settle
+        warmups = [min(_start - start_n, warmup_n) for _start in starts]
+        return starts, ends, warmups
+
+    def _downsample_sharded(
         self,
-        start_s: Optional[float],
-        end_s: Optional[float],
-        ds_factor: float,
-    ) -> Path:
-        """Cut source to given limits, downsample by factor and store result in separate file.
+        data_src: h5py.Dataset,
+        data_dst: Union[h5py.Dataset, np.ndarray],
+        start_n: int,
+        data_len: int,
+        ds_factor: int,
+        *,
+        is_time: bool,
+    ) -> int:
+        """Downsample with worker-processes, each handling an independent shard of the source.
 
-        Resulting file-name is derived from input-name by adding
-        - ".cut_x_to_y" and
-        - ".downsample_x"
-        when applicable.
+        Shards start at multiples of the factor (same decimation-phase as the sequential
+        version) and each worker lets the filter settle on a warm-up region in front of
+        its shard, so the output matches the sequential version within numerical noise.
+        Results get written to precomputed offsets of the destination.
+
+        :return: number of output-samples
         """
-        # prepare cut
+        dest_len = math.floor(data_len / ds_factor)
+        starts, ends, warmups = self._downsample_shards(
+            start_n, data_len, ds_factor, is_time=is_time
+        )
+        worker = partial(
+            downsample_shard,
+            self.file_path,
+            data_src.name,
+            ds_factor=ds_factor,
+            prime_n=self.CHUNK_SAMPLES_N,
+            is_time=is_time,
+        )
+        output_pos = 0
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            shards = executor.map(worker, starts, ends, warmups)
+            for start, shard in tqdm(
+                zip(starts, shards),
+                desc=f"downsampling {data_src.name}",
+                total=len(starts),
+                leave=False,
+                disable=len(starts) < 8,
+            ):
+                offset = (start - start_n) // ds_factor
+                slice_len = max(min(dest_len - offset, shard.shape[0]), 0)
+                data_dst[offset : offset + slice_len] = shard[:slice_len]
+                output_pos = max(output_pos, offset + slice_len)
+        return output_pos
+
+    def _cut_to_samples(
+        self, start_s: Optional[float], end_s: Optional[float]
+    ) -> tuple[float, float, int, int]:
+        """Limit cut-marks to the recording and convert them to sample-positions."""
         if not isinstance(start_s, (float, int)):
             start_s = 0
         if not isinstance(end_s, (float, int)):
@@ -280,23 +665,16 @@ class Reader(CoreReader):
         start_sample = round(start_s * self.samplerate_sps)
         end_sample = round(end_s * self.samplerate_sps)
 
-        # test input-parameters
         if end_sample < start_sample:
             msg = (
                 f"Cut & downsample for {self.file_path.name} failed because "
                 f"end-mark ({end_s:.3f}) is before start-mark ({start_s:.3f})."
             )
             raise ValueError(msg)
-        if ds_factor < 1:
-            msg = f"Cut & downsample for {self.file_path.name} failed because factor < 1"
-            raise ValueError(msg)
-        if ((end_sample - start_sample) / ds_factor) < 1000:
-            msg = (
-                f"Cut & downsample for {self.file_path.name} failed because "
-                f"resulting sample-size is too small",
-            )
-            raise ValueError(msg)
-        # assemble file-name of output
+        return start_s, end_s, start_sample, end_sample
+
+    def _downsample_path(self, start_s: float, end_s: float, ds_factor: float) -> Path:
+        """Derive file-name of output by adding ".cut_x_to_y" and ".downsample_x" if needed."""
         if start_s != 0.0 or end_s != self.runtime_s:
             start_str = f"{start_s:.3f}".replace(".", "s")
             end_str = f"{end_s:.3f}".replace(".", "s")
@@ -305,8 +683,47 @@ class Reader(CoreReader):
             cut_str = ""
 
         ds_str = f".downsample_x{round(ds_factor)}" if ds_factor > 1 else ""
+        return self.file_path.resolve().with_suffix(cut_str + ds_str + ".h5")
+
+    def _create_writer_like(self, dst_file: Path) -> CoreWriter:
+        """Open a new file with the same configuration as this one."""
+        shpw = CoreWriter(
+            dst_file,
+            mode=self.get_mode(),
+            datatype=self.get_datatype(),
+            window_samples=self.get_window_samples(),
+            cal_data=self.get_calibration_data(),
+            verbose=get_verbose_level() > 2,
+        )
+        shpw.store_hostname(self.get_hostname())
+        shpw.store_config(self.get_config())
+        return shpw
 
-        dst_file = self.file_path.resolve().with_suffix(cut_str + ds_str + ".h5")
+    def cut_and_downsample_to_file(
+        self,
+        start_s: Optional[float],
+        end_s: Optional[float],
+        ds_factor: float,
+    ) -> Path:
+        """Cut source to given limits, downsample by factor and store result in separate file.
+
+        Resulting file-name is derived from input-name by adding
+        - ".cut_x_to_y" and
+        - ".downsample_x"
+        when applicable.
+        """
+        start_s, end_s, start_sample, end_sample = self._cut_to_samples(start_s, end_s)
+        # test input-parameters
+        if ds_factor < 1:
+            msg = f"Cut & downsample for {self.file_path.name} failed because factor < 1"
+            raise ValueError(msg)
+        if ((end_sample - start_sample) / ds_factor) < 1000:
+            msg = (
+                f"Cut & downsample for {self.file_path.name} failed because "
+                f"resulting sample-size is too small",
+            )
+            raise ValueError(msg)
+        dst_file = self._downsample_path(start_s, end_s, ds_factor)
         if dst_file.exists():
             logger.warning(
                 "Cut & Downsample skipped because output-file %s already exists.", dst_file.name
@@ -322,17 +739,8 @@ class Reader(CoreReader):
         )
 
         # convert data
-        with CoreWriter(
-            dst_file,
-            mode=self.get_mode(),
-            datatype=self.get_datatype(),
-            window_samples=self.get_window_samples(),
-            cal_data=self.get_calibration_data(),
-            verbose=get_verbose_level() > 2,
-        ) as shpw:
+        with self._create_writer_like(dst_file) as shpw:
             shpw["ds_factor"] = ds_factor
-            shpw.store_hostname(self.get_hostname())
-            shpw.store_config(self.get_config())
             self.downsample(
                 self.ds_time,
                 shpw.ds_time,
@@ -358,6 +766,90 @@ class Reader(CoreReader):
 
         return dst_file
 
+    def cut_and_downsample_to_files(
+        self,
+        start_s: Optional[float],
+        end_s: Optional[float],
+        ds_factors: Sequence[float],
+    ) -> list[Path]:
+        """Cut source to given limits and downsample it by several factors in a single pass.
+
+        The source is read once and fed through a cascade of stages. Each stage filters
+        & decimates the output of the previous one, so the factors have to be
+        multiples of each other (like 5, 25, 100, 500, ...).
+        Resulting files are named like with cut_and_downsample_to_file().
+        Factors that would result in less than 1000 samples get skipped.
+
+        :return: paths of resulting files (including the ones that already existed)
+        """
+        start_s, end_s, start_sample, end_sample = self._cut_to_samples(start_s, end_s)
+        data_len = end_sample - start_sample
+        factors = sorted({max(1, math.floor(_f)) for _f in ds_factors})
+        factors_small = [_f for _f in factors if data_len / _f < 1000]
+        if len(factors_small) > 0:
+            self._logger.warning(
+                "Cascaded downsampling skips factors %s, resulting sample-size is too small",
+                factors_small,
+            )
+            factors = [_f for _f in factors if _f not in factors_small]
+        factors_prev = [1, *factors[:-1]]
+        if any(_f % _p != 0 for _f, _p in zip(factors, factors_prev)):
+            msg = f"Cascaded downsampling needs factors that are multiples of each other, {factors}"
+            raise ValueError(msg)
+        ratios = [_f // _p for _f, _p in zip(factors, factors_prev)]
+
+        dst_files = [self._downsample_path(start_s, end_s, _f) for _f in factors]
+        writers: list[Optional[CoreWriter]] = []
+        with contextlib.ExitStack() as stack:
+            for factor, dst_file in zip(factors, dst_files):
+                if dst_file.exists():
+                    logger.warning(
+                        "Cut & Downsample skipped because output-file %s already exists.",
+                        dst_file.name,
+                    )
+                    writers.append(None)
+                    continue
+                shpw = stack.enter_context(self._create_writer_like(dst_file))
+                shpw["ds_factor"] = factor
+                writers.append(shpw)
+            # ⤷ stages after the last new file are not needed
+            stages_n = max((_i + 1 for _i, _w in enumerate(writers) if _w is not None), default=0)
+            stages = [DecimationStage(_r, self.CHUNK_SAMPLES_N) for _r in ratios[:stages_n]]
+            if stages_n > 0:
+                logger.debug(
+                    "Cut & Downsample '%s' from %.3f s to %.3f s with factors = %s ...",
+                    self.file_path.name,
+                    start_s,
+                    end_s,
+                    factors[:stages_n],
+                )
+            iterations = math.ceil(data_len / self.max_elements) if stages_n > 0 else 0
+            for _iter in trange(
+                0, iterations, desc="cascaded downsampling", leave=False, disable=iterations < 8
+            ):
+                idx_start = start_sample + _iter * self.max_elements
+                idx_end = min(idx_start + self.max_elements, end_sample)
+                data = (
+                    self.ds_time[idx_start:idx_end],
+                    self.ds_voltage[idx_start:idx_end],
+                    self.ds_current[idx_start:idx_end],
+                )
+                for factor, stage, shpw in zip(factors, stages, writers):
+                    data = stage.process(*data)
+                    if shpw is None:
+                        continue
+                    # ⤷ same output-length as downsample()
+                    slice_len = min(
+                        math.floor(data_len / factor) - shpw.samples_n, data[0].shape[0]
+                    )
+                    if slice_len > 0:
+                        shpw.append_iv_data_raw(
+                            data[0][:slice_len],
+                            DecimationStage.to_raw(data[1][:slice_len], shpw.ds_voltage.dtype),
+                            DecimationStage.to_raw(data[2][:slice_len], shpw.ds_current.dtype),
+                        )
+        return dst_files
+
     def resample(
         self,
         data_src: Union[h5py.Dataset, np.ndarray],
@@ -370,6 +862,11 @@ class Reader(CoreReader):
     ) -> Union[None, h5py.Dataset, np.ndarray]:
         """Up- or down-sample the original trace-data.
 
+        IV-samples are streamed through a polyphase-filter (see PolyphaseResampler),
+        so memory-usage is bounded by self.max_elements.
+        The ratio of sample-rates gets approximated by a fraction (see resample_ratio()).
+        Timestamps are interpolated from the source, so gaps & jitter are preserved.
+
         :param data_src: original iv-data
         :param data_dst: resampled iv-traces
         :param start_n: start index of the source
@@ -378,7 +875,6 @@ class Reader(CoreReader):
         :param is_time: time-array is handled differently than IV-Samples
         :return: resampled iv-data
         """
-        self._logger.error("Resampling is still under construction - do not use for now!")
         if self.get_datatype() == EnergyDType.ivsurface:
             self._logger.warning("Resampling-Function was not written for IVSurfaces")
             return data_dst
@@ -392,14 +888,10 @@ class Reader(CoreReader):
         if data_len == 0:
             self._logger.warning("resampling failed because of data_len = 0")
             return data_dst
-        fs_ratio = samplerate_dst / self.samplerate_sps
-        dest_len = math.floor(data_len * fs_ratio) + 1
-        if fs_ratio <= 1.0:  # down-sampling
-            slice_inp_len = min(self.max_elements, data_len)
-            slice_out_len = round(slice_inp_len * fs_ratio)  # TODO: is that correct?
-        else:  # up-sampling
-            slice_out_len = min(self.max_elements, data_len * fs_ratio)
-            slice_inp_len = round(slice_out_len / fs_ratio)
+        up, down = resample_ratio(self.samplerate_sps, samplerate_dst)
+        dest_len = math.ceil(data_len * up / down)
+        # input-slices are sized to keep the output below max_elements
+        slice_inp_len = max(min(self.max_elements, (self.max_elements * down) // up), 1)
         iterations = math.ceil(data_len / slice_inp_len)
 
         if data_dst is None:
@@ -407,73 +899,114 @@ class Reader(CoreReader):
         elif isinstance(data_dst, (h5py.Dataset, np.ndarray)):
             data_dst.resize((dest_len,))
 
-        slice_inp_now = start_n
-        slice_out_now = 0
-
-        if is_time:
-            for _ in trange(
-                0,
-                iterations,
-                desc=f"resampling {data_src.name if isinstance(data_src, h5py.Dataset) else ''}",
-                leave=False,
-                disable=iterations < 8,
-            ):
-                tmin = data_src[slice_inp_now]
-                slice_inp_now += slice_inp_len
-                tmax = data_src[min(slice_inp_now, data_len - 1)]
-                slice_out_ds = np.arange(
-                    tmin, tmax, 1e9 / samplerate_dst
-                )  # will be rounded in h5-dataset
-                slice_out_nxt = slice_out_now + slice_out_ds.shape[0]
-                data_dst[slice_out_now:slice_out_nxt] = slice_out_ds
-                slice_out_now = slice_out_nxt
-        else:
-            """
-            resampler = samplerate.Resampler(
-                "sinc_medium",
-                channels=1,
-            )  # sinc_best, _medium, _fastest or linear
-            for _iter in trange(
-                0,
-                iterations,
-                desc=f"resampling {data_src.name}",
-                leave=False,
-                disable=iterations < 8,
-            ):
-                slice_inp_ds = data_src[slice_inp_now : slice_inp_now + slice_inp_len]
-                slice_inp_now += slice_inp_len
-                slice_out_ds = resampler.process(
-                    slice_inp_ds, fs_ratio, _iter == iterations - 1, verbose=True
+        resampler = PolyphaseResampler(up, down)
+        output_pos = 0
+        for _iter in trange(
+            0,
+            iterations,
+            desc=f"resampling {data_src.name if isinstance(data_src, h5py.Dataset) else ''}",
+            leave=False,
+            disable=iterations < 8,
+        ):
+            idx_start = start_n + _iter * slice_inp_len
+            idx_end = min(idx_start + slice_inp_len, _end_n)
+            if is_time:
+                # outputs with source-positions inside this slice
+                out_end = math.ceil((idx_end - start_n) * up / down)
+                positions = np.arange(output_pos, out_end) * (down / up) - (idx_start - start_n)
+                slice_out = resample_timestamps(
+                    data_src[idx_start : min(idx_end + 1, _end_n)],
+                    positions,
+                    self.sample_interval_ns,
                 )
-                # slice_out_ds = resampy.resample(slice_inp_ds, self.samplerate_sps,
-                #                                 samplerate_dst, filter="kaiser_fast")
-                slice_out_nxt = slice_out_now + slice_out_ds.shape[0]
-                # print(f"@{i}: got {slice_out_ds.shape[0]}")  # noqa: E800
-                data_dst[slice_out_now:slice_out_nxt] = slice_out_ds
-                slice_out_now = slice_out_nxt
-            resampler.reset()
-            """
+            else:
+                slice_out = resampler.process(data_src[idx_start:idx_end], final=idx_end >= _end_n)
+            data_dst[output_pos : output_pos + slice_out.shape[0]] = slice_out
+            output_pos += slice_out.shape[0]
 
         if isinstance(data_dst, np.ndarray):
-            data_dst.resize((slice_out_now,), refcheck=False)
+            data_dst.resize((output_pos,), refcheck=False)
         else:
-            data_dst.resize((slice_out_now,))
+            data_dst.resize((output_pos,))
 
         return data_dst
 
+    def cut_and_resample_to_file(
+        self,
+        start_s: Optional[float],
+        end_s: Optional[float],
+        samplerate_dst: float,
+    ) -> Path:
+        """Cut source to given limits, resample to a new rate and store result in separate file.
+
+        Resulting file-name is derived from input-name by adding
+        - ".cut_x_to_y" and
+        - ".resample_xsps"
+        when applicable. Up- and down-sampling is possible.
+        """
+        start_s, end_s, start_sample, end_sample = self._cut_to_samples(start_s, end_s)
+        if samplerate_dst <= 0:
+            msg = f"Cut & resample for {self.file_path.name} failed because samplerate <= 0"
+            raise ValueError(msg)
+        if ((end_sample - start_sample) * samplerate_dst / self.samplerate_sps) < 1000:
+            msg = (
+                f"Cut & resample for {self.file_path.name} failed because "
+                f"resulting sample-size is too small"
+            )
+            raise ValueError(msg)
+        dst_file = self._downsample_path(start_s, end_s, 1).with_suffix(
+            f".resample_{round(samplerate_dst)}sps.h5"
+        )
+        if dst_file.exists():
+            logger.warning(
+                "Cut & Resample skipped because output-file %s already exists.", dst_file.name
+            )
+            return dst_file
+
+        logger.debug(
+            "Cut & Resample '%s' from %.3f s to %.3f s with %.1f -> %.1f sps ...",
+            self.file_path.name,
+            start_s,
+            end_s,
+            self.samplerate_sps,
+            samplerate_dst,
+        )
+        with self._create_writer_like(dst_file) as shpw:
+            shpw["samplerate_sps"] = samplerate_dst
+            for data_src, data_dst, is_time in [
+                (self.ds_time, shpw.ds_time, True),
+                (self.ds_voltage, shpw.ds_voltage, False),
+                (self.ds_current, shpw.ds_current, False),
+            ]:
+                self.resample(
+                    data_src,
+                    data_dst,
+                    start_n=start_sample,
+                    end_n=end_sample,
+                    samplerate_dst=samplerate_dst,
+                    is_time=is_time,
+                )
+        return dst_file
+
     def generate_plot_data(
         self,
         start_s: Optional[float] = None,
         end_s: Optional[float] = None,
         *,
         relative_timestamp: bool = True,
+        points_n: Optional[int] = None,
     ) -> Optional[dict]:
         """Provide down-sampled iv-data that can be fed into plot_to_file().
 
+        If the file contains a pyramid (see Writer.build_pyramid()), the coarsest level
+        that still fills the point-budget is used and min/max-envelopes are added.
+        Otherwise, the data gets low-pass filtered & down-sampled.
+
         :param start_s: time in seconds, relative to start of recording
         :param end_s: time in seconds, relative to start of recording
         :param relative_timestamp: treat
-        :return: down-sampled size of ~ self.max_elements
+        :param points_n: point-budget, defaults to PLOT_POINTS_N (pyramid) or self.max_elements
+        :return: down-sampled size of ~ points_n
         """
         if self.get_datatype() == EnergyDType.ivsurface:
             self._logger.warning("Plot-Function was not written for IVSurfaces.")
@@ -488,9 +1021,20 @@ class Reader(CoreReader):
         if end_sample - start_sample < 5:
             self._logger.warning("Skip plot, because of small sample-size.")
             return None
-        samplerate_dst = max(round(self.max_elements / (end_s - start_s), 3), 0.001)
+        pyramid = self.get_pyramid()
+        budget_n = points_n or self.PLOT_POINTS_N
+        factors = [_f for _f in sorted(pyramid) if (end_sample - start_sample) // _f >= budget_n]
+        if factors:
+            data = self._plot_data_from_pyramid(
+                pyramid[factors[-1]], factors[-1], start_sample, end_sample, budget_n
+            )
+            data.update({"start_s": start_s, "end_s": end_s})
+            if relative_timestamp:
+                data["time"] = data["time"] - self._cal.time.raw_to_si(self.ds_time[0])
+            return data
+        samplerate_dst = max(round((points_n or self.max_elements) / (end_s - start_s), 3), 0.001)
         ds_factor = float(self.samplerate_sps / samplerate_dst)
-        data: dict = {
+        data = {
             "name": self.get_hostname(),
             "time": self._cal.time.raw_to_si(
                 self.downsample(
@@ -515,6 +1059,33 @@ class Reader(CoreReader):
             data["time"] = data["time"] - self._cal.time.raw_to_si(self.ds_time[0])
         return data
 
+    def _plot_data_from_pyramid(
+        self, level: h5py.Group, factor: int, start_n: int, end_n: int, budget_n: int
+    ) -> dict:
+        """Read a span of a pyramid-level and merge its buckets down to the point-budget.
+
+        :param level: group of pyramid-level
+        :param factor: samples per bucket of that level
+        :param start_n: first sample
+        :param end_n: last sample (not included)
+        :param budget_n: resulting number of points is between budget_n and 2 * budget_n
+        :return: plot-data with mean-traces and min/max-envelopes
+        """
+        start_b = start_n // factor
+        buckets_n = min(end_n // factor, level["time"].shape[0]) - start_b
+        step = max(buckets_n // budget_n, 1)
+        end_b = start_b + step * (buckets_n // step)
+        data: dict = {
+            "name": self.get_hostname(),
+            "time": self._cal.time.raw_to_si(level["time"][start_b:end_b:step]).astype(float),
+        }
+        for signal in ["voltage", "current", "power"]:
+            for stat, reduce in [("min", np.min), ("max", np.max), ("mean", np.mean)]:
+                values = level[f"{signal}_{stat}"][start_b:end_b].reshape(-1, step)
+                key = signal if stat == "mean" else f"{signal}_{stat}"
+                data[key] = reduce(values, axis=1).astype(float)
+        return data
+
     @staticmethod
     def assemble_plot(
         data: Union[Mapping, Sequence], width: int = 20, height: int = 10, *, only_pwr: bool = False
@@ -522,6 +1093,7 @@ class Reader(CoreReader):
         """Create the actual figure.
 
         Due to the 50 mA limits of the cape the default units for current & power are mA & mW.
+        Data from a pyramid comes with min/max-envelopes that get drawn as shaded area.
 
         :param data: plottable / down-sampled iv-data with some meta-data
                 -> created with generate_plot_data()
@@ -544,22 +1116,28 @@ class Reader(CoreReader):
             axs[1].set_ylabel("current [mA]")
             # last axis is set below
 
-        for date in data:
+        def _plot(ax: plt.Axes, date: Mapping, signal: str, scale: float) -> None:
             samples_n = min(len(date["time"]), len(date["voltage"]), len(date["current"]))
-            if not only_pwr:
-                axs[0].plot(
-                    date["time"][:samples_n], date["voltage"][:samples_n], label=date["name"]
-                )
-                axs[1].plot(
+            if signal == "power" and signal not in date:
+                values = date["voltage"][:samples_n] * date["current"][:samples_n]
+            else:
+                values = date[signal][:samples_n]
+            (line,) = ax.plot(date["time"][:samples_n], values * scale, label=date["name"])
+            if f"{signal}_min" in date:
+                ax.fill_between(
                     date["time"][:samples_n],
-                    date["current"][:samples_n] * 10**3,
-                    label=date["name"],
+                    date[f"{signal}_min"][:samples_n] * scale,
+                    date[f"{signal}_max"][:samples_n] * scale,
+                    color=line.get_color(),
+                    alpha=0.3,
+                    linewidth=0,
                 )
-            axs[-1].plot(
-                date["time"][:samples_n],
-                date["voltage"][:samples_n] * date["current"][:samples_n] * 10**3,
-                label=date["name"],
-            )
+
+        for date in data:
+            if not only_pwr:
+                _plot(axs[0], date, "voltage", 1)
+                _plot(axs[1], date, "current", 10**3)
+            _plot(axs[-1], date, "power", 10**3)
 
         if len(data) > 1:
             axs[0].legend(loc="lower center", ncol=len(data))
@@ -60,3 +60,21 @@ def test_cli_downsample_rate_file_short(data_h5: Path) -> None:
     res = CliRunner().invoke(cli, ["-v", "downsample", "-r", "200", str(data_h5)])
     assert res.exit_code == 0
     assert data_h5.with_suffix(".downsample_x500.h5").exists()
+
+
+def test_cli_downsample_file_cascade(data_h5: Path) -> None:
+    res = CliRunner().invoke(cli, ["--verbose", "downsample", "--cascade", str(data_h5)])
+    assert res.exit_code == 0
+    assert data_h5.with_suffix(".downsample_x5.h5").exists()
+    assert data_h5.with_suffix(".downsample_x500.h5").exists()
+    assert not data_h5.with_suffix(".downsample_x2500.h5").exists()  # too few samples
+
+
+def test_cli_downsample_file_resample(data_h5: Path) -> None:
+    res = CliRunner().invoke(
+        cli, ["--verbose", "downsample", "--resample", "--sample-rate", "3000", str(data_h5)]
+    )
+    assert res.exit_code == 0
+    assert data_h5.with_suffix(".resample_3000sps.h5").exists()
+    res = CliRunner().invoke(cli, ["--verbose", "downsample", "--resample", str(data_h5)])
+    assert res.exit_code != 0
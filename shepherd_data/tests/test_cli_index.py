@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import h5py
+from click.testing import CliRunner
+
+from shepherd_data import Reader
+from shepherd_data.cli import cli
+
+
+def test_cli_index_file(data_h5: Path) -> None:
+    res = CliRunner().invoke(cli, ["-v", "index", str(data_h5)])
+    assert res.exit_code == 0
+    with Reader(data_h5) as shpr:
+        assert len(shpr.get_pyramid()) > 0
+
+
+def test_cli_index_keeps_unaligned_data(data_h5: Path) -> None:
+    with h5py.File(data_h5, "r+") as h5file:
+        for name in ["time", "voltage", "current"]:
+            h5file["data"][name].resize((35_000,))
+        del h5file["data_index"]
+    res = CliRunner().invoke(cli, ["-v", "index", str(data_h5)])
+    assert res.exit_code == 0
+    with Reader(data_h5) as shpr:
+        assert shpr.samples_n == 35_000
+        assert shpr.get_index().samples_n == 35_000
+        assert len(shpr.get_pyramid()) > 0
+    with h5py.File(data_h5, "r") as h5file:
+        assert "data_index" in h5file  # ⤷ stored, not rebuilt by the Reader
+
+
+def test_cli_index_dir(data_h5: Path) -> None:
+    res = CliRunner().invoke(cli, ["-v", "index", str(data_h5.parent)])
+    assert res.exit_code == 0
+
+
+def test_cli_index_then_plot(data_h5: Path) -> None:
+    res = CliRunner().invoke(cli, ["-v", "index", str(data_h5)])
+    assert res.exit_code == 0
+    with Reader(data_h5) as shpr:
+        data = shpr.generate_plot_data(points_n=1_000)
+        assert data is not None
+        assert "power_max" in data
+        assert 1_000 <= len(data["time"]) < 2_000
+        assert all(data["voltage_min"] <= data["voltage_max"])
+    res = CliRunner().invoke(cli, ["-v", "plot", str(data_h5)])
+    assert res.exit_code == 0
+    assert data_h5.with_suffix(".plot_0s000_to_10s000.png").exists()
@@ -118,3 +118,11 @@ def test_cli_multiplot_dir_min(tmp_path: Path) -> None:
     res = CliRunner().invoke(cli, ["-v", "plot", "-m", str(tmp_path)])
     assert res.exit_code == 0
     assert tmp_path.with_suffix(".multiplot_0s000_to_10s000.png").exists()  # full duration of file
+
+
+def test_cli_multiplot_dir_parallel(tmp_path: Path) -> None:
+    generate_h5_file(tmp_path, "hrv_file1.h5")
+    generate_h5_file(tmp_path, "hrv_file2.h5")
+    res = CliRunner().invoke(cli, ["-v", "plot", "-m", "-j", "2", str(tmp_path)])
+    assert res.exit_code == 0
+    assert tmp_path.with_suffix(".multiplot_0s000_to_10s000.png").exists()  # full duration of file
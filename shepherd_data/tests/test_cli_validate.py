@@ -1,9 +1,13 @@
+import logging
 from pathlib import Path
 
+import pytest
 from click.testing import CliRunner
 
 from shepherd_data.cli import cli
 
+from .conftest import generate_h5_file
+
 
 def test_cli_validate_file(data_h5: Path) -> None:
     res = CliRunner().invoke(cli, ["-v", "validate", str(data_h5)])
@@ -13,3 +17,15 @@ def test_cli_validate_file(data_h5: Path) -> None:
 def test_cli_validate_dir(data_h5: Path) -> None:
     res = CliRunner().invoke(cli, ["-v", "validate", str(data_h5.parent)])
     assert res.exit_code == 0
+
+
+def test_cli_validate_dir_parallel(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    generate_h5_file(tmp_path, "hrv_file1.h5")
+    generate_h5_file(tmp_path, "hrv_file2.h5")
+    with (tmp_path / "hrv_faulty.h5").open("w") as fh:
+        fh.write("no hdf5 content")
+    with caplog.at_level(logging.INFO):
+        res = CliRunner().invoke(cli, ["-v", "validate", "--jobs", "2", str(tmp_path)])
+    assert res.exit_code == 0
+    assert "Validating 'hrv_file1.h5'" in caplog.text
+    assert "1 of 3 files failed: hrv_faulty.h5" in caplog.text
@@ -1,3 +1,217 @@
 # TODO:
 #  - confirm energy stays same after resampling
 #  - length should also stay same
+from datetime import datetime
+from pathlib import Path
+
+import h5py
+import numpy as np
+import pytest
+
+from shepherd_core import local_tz
+from shepherd_data import Reader
+from shepherd_data import Writer
+
+
+def _save_csv_reference(h5_group: h5py.Group, separator: str = ";") -> str:
+    """Row-by-row export of the previous implementation, serves as reference."""
+    datasets = [str(key) for key in h5_group if isinstance(h5_group[key], h5py.Dataset)]
+    datasets.remove("time")
+    separator = separator.strip().ljust(2)
+    ts_gain = h5_group["time"].attrs.get("gain", 1e-9)
+    gains = {key: h5_group[key].attrs.get("gain", 1.0) for key in datasets}
+    offsets = {key: h5_group[key].attrs.get("offset", 1.0) for key in datasets}
+    lines = []
+    for idx, time_ns in enumerate(h5_group["time"][:]):
+        timestamp = datetime.fromtimestamp(time_ns * ts_gain, tz=local_tz())
+        line = timestamp.strftime("%Y-%m-%d %H:%M:%S.%f")
+        for key in datasets:
+            values = h5_group[key][idx] * gains[key] + offsets[key]
+            if isinstance(values, np.ndarray):
+                values = separator.join([str(value) for value in values])
+            line += f"{separator}{values}"
+        lines.append(line + "\n")
+    return "".join(lines)
+
+
+def test_reader_save_csv_matches_reference(data_h5: Path) -> None:
+    rng = np.random.default_rng(42)
+    samples_n = 5_432
+    with h5py.File(data_h5, "r+") as h5f:
+        grp = h5f.create_group("sys_util")
+        time_ns = 1_700_000_000 * 10**9 + np.cumsum(rng.integers(1, 10**8, samples_n))
+        grp.create_dataset("time", data=time_ns.astype("u8"))
+        grp.create_dataset("cpu", data=rng.integers(0, 100, samples_n).astype("u1"))
+        grp.create_dataset("ram", data=rng.random((samples_n, 2)).astype("f4"))
+        grp.create_dataset("io", data=rng.integers(0, 2**32, (samples_n, 3)).astype("u4"))
+        grp["io"].attrs["gain"] = 1.234e-6
+        grp["io"].attrs["offset"] = -0.5
+        for key in grp:
+            grp[key].attrs["description"] = f"{key} [x], more"
+    with Reader(data_h5, verbose=True) as sfr:
+        sfr.CHUNK_SAMPLES_N = 100  # several blocks
+        assert sfr.save_csv(sfr["sys_util"]) == samples_n
+        with data_h5.with_suffix(".sys_util.csv").open(encoding="utf-8-sig") as csv:
+            _header = csv.readline()
+            content = csv.read()
+        assert content == _save_csv_reference(sfr["sys_util"])
+
+
+def test_reader_save_log_matches_reference(data_h5: Path) -> None:
+    rng = np.random.default_rng(7)
+    samples_n = 1_234
+    with h5py.File(data_h5, "r+") as h5f:
+        grp = h5f.create_group("sheep")
+        time_ns = 1_700_000_000 * 10**9 + np.cumsum(rng.integers(1, 10**9, samples_n))
+        grp.create_dataset("time", data=time_ns.astype("u8"))
+        grp.create_dataset("level", data=rng.choice([10, 20, 30, 40], samples_n).astype("u1"))
+        messages = [f"msg {_i} ä" for _i in range(samples_n)]
+        grp.create_dataset("message", data=messages, dtype=h5py.string_dtype())
+    with Reader(data_h5, verbose=True) as sfr:
+        sfr.CHUNK_SAMPLES_N = 100  # several blocks
+        assert sfr.save_log(sfr["sheep"]) == samples_n
+        content = data_h5.with_suffix(".sheep.log").read_text(encoding="utf-8-sig")
+        grp = sfr["sheep"]
+        reference = ""
+        for idx, time_ns in enumerate(grp["time"][:]):
+            timestamp = datetime.fromtimestamp(time_ns / 1e9, local_tz())
+            reference += timestamp.strftime("%Y-%m-%d %H:%M:%S.%f") + ":"
+            reference += f"\t{grp['level'][idx]}\t{grp['message'][idx]}\n"
+        assert content == reference
+        levels = grp["level"][:]
+        assert sfr.count_errors_in_log("sheep", 40) == np.sum(levels >= 40)
+        assert sfr.warn_logs("sheep", 30, show=True) == np.sum(levels >= 30)
+
+
+def test_reader_downsample_cascade(data_h5: Path) -> None:
+    factors = [5, 25, 100]
+    with Reader(data_h5, verbose=True) as sfr:
+        references = []
+        for factor in factors:
+            path_ds = sfr.cut_and_downsample_to_file(None, None, factor)
+            with Reader(path_ds, verbose=True) as sfd:
+                references.append((sfd.ds_time[:], sfd.ds_voltage[:], sfd.energy()))
+            path_ds.unlink()
+        sfr.max_elements = 12_345  # blocks that are not aligned with the factors
+        paths_ds = sfr.cut_and_downsample_to_files(None, None, [*factors, 1_000_000])
+        time_src = sfr.ds_time[:]
+    assert len(paths_ds) == len(factors)  # last factor gets skipped, too few samples
+    for factor, path_ds, (time_ref, voltage_ref, energy_ref) in zip(factors, paths_ds, references):
+        with Reader(path_ds, verbose=True) as sfd:
+            assert sfd["ds_factor"] == factor
+            assert np.array_equal(sfd.ds_time[:], time_src[::factor][: time_ref.shape[0]])
+            assert np.array_equal(sfd.ds_time[:], time_ref)
+            voltage = sfd.ds_voltage[:].astype(float)
+            assert np.median(np.abs(voltage - voltage_ref)) < 1e-3 * voltage_ref.mean()
+            assert sfd.energy() == pytest.approx(energy_ref, rel=1e-3)
+
+
+def test_reader_downsample_cascade_factors(data_h5: Path) -> None:
+    with Reader(data_h5, verbose=True) as sfr, pytest.raises(ValueError):  # noqa: PT011
+        sfr.cut_and_downsample_to_files(None, None, [5, 12])
+
+
+def test_reader_downsample_sharded(data_h5: Path) -> None:
+    with Reader(data_h5, verbose=True) as sfr:
+        for ds_factor, is_time in [(5, False), (100, False), (100, True)]:
+            data_ref = sfr.downsample(sfr.ds_voltage, None, 1_234, None, ds_factor, is_time=is_time)
+            sfr.jobs = 2
+            sfr.max_elements = 100_000  # several shards
+            data = sfr.downsample(sfr.ds_voltage, None, 1_234, None, ds_factor, is_time=is_time)
+            sfr.jobs = 1
+            sfr.max_elements = 40 * sfr.samplerate_sps
+            assert data.shape == data_ref.shape
+            assert np.allclose(data, data_ref, rtol=1e-9, atol=0)
+
+
+@pytest.mark.parametrize("ds_factor", [5, 100, 1_000])
+def test_reader_downsample_sharded_warmup(data_h5: Path, ds_factor: int) -> None:
+    with Reader(data_h5, verbose=True) as sfr:
+        sfr.jobs = 4
+        sfr.max_elements = 100_000
+        if not sfr._downsample_shardable(ds_factor):  # noqa: SLF001
+            assert ds_factor == 1_000  # ⤷ warm-up of 64k samples, falls back to sequential
+            return
+        starts, ends, warmups = sfr._downsample_shards(  # noqa: SLF001
+            1_234, sfr.samples_n - 1_234, ds_factor, is_time=False
+        )
+        assert ends[-1] == sfr.samples_n
+        assert sum(warmups) <= 0.25 * (sfr.samples_n - 1_234)
+        assert all(_end - _start <= sfr.max_elements for _start, _end in zip(starts, ends))
+        _, _, warmups = sfr._downsample_shards(  # noqa: SLF001
+            1_234, sfr.samples_n - 1_234, ds_factor, is_time=True
+        )
+        assert sum(warmups) == 0
+
+
+def test_reader_downsample_sharded_fallback(data_h5: Path) -> None:
+    with Reader(data_h5, verbose=True) as sfr:
+        data_ref = sfr.downsample(sfr.ds_voltage, None, 0, None, 1_000)
+        sfr.jobs = 2
+        sfr.max_elements = 100_000
+        data = sfr.downsample(sfr.ds_voltage, None, 0, None, 1_000)
+        assert np.array_equal(data, data_ref)  # ⤷ sequential, bit-exact
+
+
+@pytest.mark.parametrize("samplerate_dst", [1_000, 300_000, 7_000])
+def test_reader_resample_matches_polyphase(data_h5: Path, samplerate_dst: int) -> None:
+    from scipy import signal
+
+    with Reader(data_h5, verbose=True) as sfr:
+        voltage = sfr.ds_voltage[:].astype(float)
+        data = sfr.resample(sfr.ds_voltage, None, samplerate_dst=samplerate_dst)
+        sfr.max_elements = 12_345  # several blocks, not aligned with the ratio
+        data_blocks = sfr.resample(sfr.ds_voltage, None, samplerate_dst=samplerate_dst)
+        up, down = samplerate_dst // 1000, sfr.samplerate_sps // 1000
+    reference = signal.resample_poly(voltage, up, down)
+    assert data.shape == reference.shape
+    assert np.array_equal(data, data_blocks)
+    margin = data.shape[0] // 10  # resample_poly pads with zeros
+    assert np.allclose(data[margin:-margin], reference[margin:-margin], rtol=1e-9)
+
+
+def test_reader_resample_constant(data_h5: Path) -> None:
+    with Reader(data_h5, verbose=True) as sfr:
+        sfr.max_elements = 10_000
+        data = sfr.resample(np.full(100_000, 7.0), None, samplerate_dst=3_000)
+    assert data.shape == (3_000,)
+    assert np.allclose(data, 7.0, rtol=1e-6)  # ripple of filter
+
+
+def test_reader_resample_to_file(data_h5: Path) -> None:
+    with Reader(data_h5, verbose=True) as sfr:
+        path_rs = sfr.cut_and_resample_to_file(None, None, 3_000)
+        duration = sfr.runtime_s
+        energy = sfr.energy()
+        time_start = int(sfr.ds_time[0])
+    assert path_rs.name.endswith(".resample_3000sps.h5")
+    with Reader(path_rs, verbose=True) as sfd:
+        assert sfd.samplerate_sps == 3_000
+        assert sfd.ds_time.shape[0] == round(3_000 * duration)
+        intervals = np.diff(sfd.ds_time[:].astype(np.int64))
+        assert np.all(np.abs(intervals - 1e9 / 3_000) <= 1)
+        assert int(sfd.ds_time[0]) == time_start
+        assert sfd.energy() == pytest.approx(energy, rel=1e-3)
+
+
+def test_reader_time_segments(data_h5: Path) -> None:
+    path_implicit = data_h5.with_suffix(".implicit.h5")
+    with Reader(data_h5, verbose=True) as sfr, Writer(path_implicit, time_segments=True) as sfw:
+        sfw.store_hostname(sfr.get_hostname())
+        sfw.append_iv_data_raw(sfr.ds_time[:], sfr.ds_voltage[:], sfr.ds_current[:])
+        time_ref = sfr.ds_time[:]
+        path_ds = sfr.cut_and_downsample_to_file(None, None, 100)
+        sfr.CHUNK_SAMPLES_N = 100_000
+        sfr.save_csv(sfr["data"])
+    with Reader(path_implicit, verbose=True) as sfi:
+        assert "time" not in sfi["data"]
+        assert np.array_equal(sfi.ds_time[:], time_ref)
+        path_ids = sfi.cut_and_downsample_to_file(None, None, 100)
+        sfi.CHUNK_SAMPLES_N = 100_000
+        assert sfi.save_csv(sfi["data"]) == time_ref.shape[0]
+    with Reader(path_ds) as sfd, Reader(path_ids) as sfid:
+        assert np.array_equal(sfd.ds_time[:], sfid.ds_time[:])
+        assert np.array_equal(sfd.ds_voltage[:], sfid.ds_voltage[:])
+    csv = data_h5.with_suffix(".data.csv").read_text(encoding="utf-8-sig")
+    csv_implicit = path_implicit.with_suffix(".data.csv").read_text(encoding="utf-8-sig")
+    assert csv.split("\n", 1)[1] == csv_implicit.split("\n", 1)[1]  # without header